@@ -3,15 +3,23 @@ from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, data, meal, report, setting
+from routers import admin, auth, data, meal, report, setting
 from routers.request import history
 from routers.request import requests
 from dotenv import load_dotenv
 from services.startup import lifespan
 import logging
-from src.middleware import TokenRenewalMiddleware
+from src.middleware import (
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    TokenRenewalMiddleware,
+)
+from services.count_cache import install_count_invalidation
+from db.rollup import install_rollup_maintenance
+from services.metrics import register_pool
+from services.query_stats import install_query_stats
+from db.database import engine, read_engine
 from hris_db.database import haris_db_engine
-import logfire
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,12 +27,11 @@ load_dotenv()
 
 logfire_api_key = os.getenv("LOGFIRE_TOKEN")
 logfire_env = os.getenv("LOGFIRE_ENV", "development")
-
-# Configure Logfire using the API key
-if logfire_api_key:
-    logfire.configure(token=logfire_api_key, environment=logfire_env)
-else:
-    raise ValueError("LOGFIRE_TOKEN is not set in the environment.")
+# Fraction of traces exported to Logfire (1.0 exports everything)
+logfire_sample_rate = float(os.getenv("LOGFIRE_SAMPLE_RATE", "0.1"))
+logfire_capture_headers = (
+    os.getenv("LOGFIRE_CAPTURE_HEADERS", "false").lower() == "true"
+)
 
 
 logging.basicConfig(
@@ -38,6 +45,19 @@ logger = logging.getLogger(__name__)
 # Initialize FastAPI app with custom lifespan
 app = FastAPI(lifespan=lifespan)
 
+# Logfire is optional: the built-in /metrics endpoint covers local monitoring
+if logfire_api_key:
+    import logfire
+
+    logfire.configure(
+        token=logfire_api_key,
+        environment=logfire_env,
+        sampling=logfire.SamplingOptions(head=logfire_sample_rate),
+    )
+    logfire.instrument_fastapi(app, capture_headers=logfire_capture_headers)
+else:
+    logger.info("LOGFIRE_TOKEN is not set; Logfire tracing is disabled.")
+
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
@@ -61,20 +81,28 @@ app.add_middleware(
     allow_credentials=True,  # Allow cookies and credentials
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["Content-Disposition"],  # Export file names
 )
 
 app.add_middleware(TokenRenewalMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
+# Record per-request SQL statistics on every engine
+for db_engine in (engine, read_engine, haris_db_engine):
+    install_query_stats(db_engine)
 
-# Define lifespan event handler for FastAPI
-async def lifespan(app: FastAPI):
-    # Startup: could include additional initialization logic here
-    yield
-    # Shutdown: dispose the haris_db_engine to clean up pooled connections
-    await haris_db_engine.dispose()
+# Drop cached listing counts whenever requests or request lines change
+install_count_invalidation()
 
+# Keep the dashboard rollup in step with request and request line writes
+install_rollup_maintenance()
 
-logfire.instrument_fastapi(app, capture_headers=True)
+# Expose connection pool usage on /metrics
+register_pool("app", engine)
+if read_engine is not engine:
+    register_pool("app_read", read_engine)
+register_pool("hris", haris_db_engine)
 
 # Include additional routers
 app.include_router(data.router, tags=["Data"])
@@ -84,3 +112,4 @@ app.include_router(setting.router, tags=["Security Settings"])
 app.include_router(auth.router, tags=["Authentication"])
 app.include_router(history.router, tags=["Request"])
 app.include_router(meal.router, tags=["Meals"])
+app.include_router(admin.router, tags=["Admin"])
@@ -0,0 +1,108 @@
+"""
+bench_hris_reads.py
+
+Compares the two ways of reading HRIS attendance on a synthetic data set:
+whole HRISEmployeeAttendanceWithDetails entities (identity map and model
+construction per row) against the projected columns wrapped in
+AttendanceRecord tuples (hris_db.records).
+
+The rows live in an in-memory SQLite copy of the attendance view, so the
+numbers measure the client-side cost of each read path, not the network.
+
+Usage:
+    python bench_hris_reads.py                  # 1,000,000 rows
+    python bench_hris_reads.py --rows 200000 --repeat 5
+"""
+
+import gc
+import time
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from hris_db.models import HRISEmployeeAttendanceWithDetails
+from hris_db.records import (
+    AttendanceRecord,
+    select_attendance_records,
+    to_records,
+)
+
+INSERT_BATCH_SIZE = 50_000
+
+
+def synthetic_rows(count: int):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        day = start + timedelta(days=i // 5000)
+        yield {
+            "Id": i + 1,
+            "EmployeeCode": str(1000 + i % 5000),
+            "Date": day,
+            "DateIn": day + timedelta(hours=8),
+            "DateOut": day + timedelta(hours=17),
+        }
+
+
+async def load(engine, count: int) -> None:
+    table = HRISEmployeeAttendanceWithDetails.__table__
+    async with engine.begin() as conn:
+        await conn.run_sync(table.create)
+        batch = []
+        for row in synthetic_rows(count):
+            batch.append(row)
+            if len(batch) == INSERT_BATCH_SIZE:
+                await conn.execute(insert(table), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(table), batch)
+
+
+async def read_entities(engine) -> int:
+    async with AsyncSession(engine) as session:
+        result = await session.execute(
+            select(HRISEmployeeAttendanceWithDetails)
+        )
+        return len(result.scalars().all())
+
+
+async def read_records(engine) -> int:
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select_attendance_records())
+        return len(to_records(result, AttendanceRecord))
+
+
+async def main_async(count: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        await load(engine, count)
+        print(f"Loaded {count:,} synthetic attendance rows.")
+        for name, read in (
+            ("entities", read_entities),
+            ("records", read_records),
+        ):
+            best = None
+            for _ in range(repeat):
+                gc.collect()
+                started = time.perf_counter()
+                rows = await read(engine)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(
+                f"{name:>8}: {rows:,} rows in {best:.2f}s "
+                f"({rows / best:,.0f} rows/s, best of {repeat})"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark HRIS attendance read paths."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rows, args.repeat))
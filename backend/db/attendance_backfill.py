@@ -0,0 +1,205 @@
+"""
+Background fill of attendance onto recent request lines.
+
+Request lines from the last ATTENDANCE_BACKFILL_DAYS days that still lack
+attendance_in / attendance_out (or shift hours, when a lookup is given) are
+matched against the local `attendance` mirror (the interval overlapping the
+meal window, see db.attendance_reconciliation) in chunks of
+ATTENDANCE_BACKFILL_CHUNK_SIZE lines, walking request_line.id upwards.
+The last processed id is checkpointed in `sync_state` after every chunk, so
+a run stopped by ATTENDANCE_BACKFILL_MAX_CHUNKS (or a failure) resumes where
+it left off; once the end is reached the next run starts over, retrying the
+lines whose attendance had not arrived yet.
+
+Reports only read the columns this fills.
+"""
+
+import os
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.attendance_reconciliation import match_attendance
+from db.bulk import bulk_update_by_id
+from db.models import Request, RequestLine, SyncState
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_BACKFILL_DAYS = int(os.getenv("ATTENDANCE_BACKFILL_DAYS", "7"))
+ATTENDANCE_BACKFILL_CHUNK_SIZE = int(
+    os.getenv("ATTENDANCE_BACKFILL_CHUNK_SIZE", "1000")
+)
+ATTENDANCE_BACKFILL_MAX_CHUNKS = int(
+    os.getenv("ATTENDANCE_BACKFILL_MAX_CHUNKS", "20")
+)
+
+BACKFILL_NAME = "attendance_backfill"
+
+# (day, employee_ids) -> {employee_id: shift hours}
+ShiftHoursLookup = Callable[[date, List[int]], Awaitable[Dict[int, float]]]
+
+
+async def _attendance_changes(
+    session: AsyncSession, rows: List, clear_missing: bool = False
+) -> Dict[int, Dict]:
+    matches = await match_attendance(session, rows)
+    changes = {}
+    for row in rows:
+        match = matches[row.id]
+        if match is None and not clear_missing:
+            continue
+        date_in, date_out = match or (None, None)
+        changed = {
+            name: value
+            for name, value in (
+                ("attendance_in", date_in),
+                ("attendance_out", date_out),
+            )
+            if getattr(row, name) != value
+        }
+        if changed:
+            changes[row.id] = changed
+    return changes
+
+
+async def _shift_hours_changes(
+    rows: List, shift_hours: ShiftHoursLookup
+) -> Dict[int, Dict]:
+    rows_by_day: Dict[date, List] = {}
+    for row in rows:
+        if row.shift_hours is None:
+            rows_by_day.setdefault(row.request_time.date(), []).append(row)
+
+    changes = {}
+    for day, day_rows in rows_by_day.items():
+        hours = await shift_hours(day, [row.employee_id for row in day_rows])
+        for row in day_rows:
+            if row.employee_id in hours:
+                changes[row.id] = {"shift_hours": hours[row.employee_id]}
+    return changes
+
+
+async def backfill_attendance(
+    session: AsyncSession,
+    days: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_chunks: Optional[int] = None,
+    shift_hours: Optional[ShiftHoursLookup] = None,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Fill missing attendance (and shift hours) of recent request lines.
+
+    Args:
+        session (AsyncSession): Session on the application database.
+        days (Optional[int]): Days back to look at, ATTENDANCE_BACKFILL_DAYS
+            by default.
+        chunk_size (Optional[int]): Lines per chunk.
+        max_chunks (Optional[int]): Chunks processed by this call.
+        shift_hours (Optional[ShiftHoursLookup]): Fills shift_hours too.
+        now (Optional[datetime]): End of the window.
+
+    Returns:
+        int: The number of request lines updated.
+    """
+    now = now or datetime.now()
+    days = ATTENDANCE_BACKFILL_DAYS if days is None else days
+    chunk_size = chunk_size or ATTENDANCE_BACKFILL_CHUNK_SIZE
+    max_chunks = max_chunks or ATTENDANCE_BACKFILL_MAX_CHUNKS
+    since = datetime.combine((now - timedelta(days=days)).date(), time.min)
+
+    state = await session.get(SyncState, BACKFILL_NAME)
+    if state is None:
+        state = SyncState(name=BACKFILL_NAME)
+
+    pending = [
+        RequestLine.attendance_in.is_(None),
+        RequestLine.attendance_out.is_(None),
+    ]
+    if shift_hours is not None:
+        pending.append(RequestLine.shift_hours.is_(None))
+
+    updated = 0
+    for _ in range(max_chunks):
+        stmt = (
+            select(
+                RequestLine.id,
+                RequestLine.employee_id,
+                RequestLine.employee_code,
+                RequestLine.attendance_in,
+                RequestLine.attendance_out,
+                RequestLine.shift_hours,
+                RequestLine.meal_id,
+                Request.request_time,
+            )
+            .join(Request, Request.id == RequestLine.request_id)
+            .where(Request.request_time.between(since, now))
+            .where(or_(*pending))
+            .where(RequestLine.id > (state.position or 0))
+            .order_by(RequestLine.id)
+            .limit(chunk_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            # Reached the end; the next run starts over
+            state.position = None
+            state.last_synced_at = now
+            break
+
+        changes = await _attendance_changes(session, rows)
+        if shift_hours is not None:
+            for line_id, values in (
+                await _shift_hours_changes(rows, shift_hours)
+            ).items():
+                changes.setdefault(line_id, {}).update(values)
+
+        updated += await bulk_update_by_id(session, RequestLine, changes)
+        state.position = rows[-1].id
+        session.add(state)
+        await session.commit()
+
+    state.rows_synced = updated
+    session.add(state)
+    await session.commit()
+
+    logger.info(f"Backfilled attendance of {updated} request lines.")
+    return updated
+
+
+async def apply_attendance_for_day(session: AsyncSession, day: date) -> int:
+    """
+    Set the attendance of every request line of a day (by request_time) to
+    what the local mirror holds, clearing it where the mirror has none.
+    Running it again for the same day changes nothing.
+
+    The caller commits.
+
+    Returns:
+        int: The number of request lines updated.
+    """
+    rows = (
+        await session.execute(
+            select(
+                RequestLine.id,
+                RequestLine.employee_code,
+                RequestLine.attendance_in,
+                RequestLine.attendance_out,
+                RequestLine.meal_id,
+                Request.request_time,
+            )
+            .join(Request, Request.id == RequestLine.request_id)
+            .where(
+                Request.request_time.between(
+                    datetime.combine(day, time.min),
+                    datetime.combine(day, time.max),
+                )
+            )
+        )
+    ).all()
+    if not rows:
+        return 0
+    changes = await _attendance_changes(session, rows, clear_missing=True)
+    return await bulk_update_by_id(session, RequestLine, changes)
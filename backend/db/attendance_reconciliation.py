@@ -0,0 +1,434 @@
+"""
+Vectorized reconciliation of request lines against attendance intervals.
+
+Every accepted request line of a range gets the meal window it was ordered
+for: each `MealSchedule` of its meal placed on the request day, ending on the
+next day when `schedule_to` is not after `schedule_from` (overnight meals;
+a request made after midnight but before the end of such a window belongs to
+the window that started the previous day). Meals without a schedule use the
+whole request day.
+
+The windows are then intersected with the employees' attendance intervals
+(date_in to date_out, from the local mirror) in a single NumPy pass:
+intervals are sorted by (employee_code, date_in) into one int64 key, so the
+candidates of every window are found with two `searchsorted` calls instead
+of a per-line lookup. Attendance crossing midnight is matched like any other
+interval, whatever its `date`.
+
+A line is present when one of its windows touches an attendance interval;
+lines without are flagged as missing. The interval that overlaps its
+windows the most is the line's attendance, which `match_attendance` returns
+for the attendance fill (db.attendance_backfill).
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import (
+    Attendance,
+    MealSchedule,
+    Request,
+    RequestLine,
+    cairo_tz,
+)
+
+logger = logging.getLogger(__name__)
+
+# Missing line ids listed per reconciliation response
+RECONCILIATION_MISSING_IDS_LIMIT = int(
+    os.getenv("RECONCILIATION_MISSING_IDS_LIMIT", "1000")
+)
+
+MINUTES_PER_DAY = 24 * 60
+# Employee code in the high bits, minutes since the range base in the low
+# bits: sorting the keys sorts by employee, then by time
+_CODE_SHIFT = np.int64(32)
+
+# meal_id -> [(schedule_from, schedule_to)]
+MealWindows = Dict[int, List[Tuple[time, time]]]
+
+
+@dataclass
+class Reconciliation:
+    """
+    Per-line result of a reconciliation, aligned with `line_ids`.
+
+    Attributes:
+        line_ids (np.ndarray): Request line ids.
+        present (np.ndarray): True if attendance touches the meal window.
+        overlap_minutes (np.ndarray): Attended minutes within the window.
+        attendance_index (np.ndarray): Index, in the attendance passed to
+            `reconcile`, of the interval overlapping the window the most;
+            -1 for missing lines.
+    """
+
+    line_ids: np.ndarray
+    present: np.ndarray
+    overlap_minutes: np.ndarray
+    attendance_index: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "Reconciliation":
+        empty = np.empty(0, dtype=np.int64)
+        return cls(empty, empty.astype(bool), empty, empty)
+
+    @property
+    def missing_line_ids(self) -> List[int]:
+        return self.line_ids[~self.present].tolist()
+
+    def summary(
+        self,
+        missing_after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Dict:
+        """
+        Totals of the reconciliation, with one page of the missing line ids:
+        at most `limit` (RECONCILIATION_MISSING_IDS_LIMIT) ids after
+        `missing_after`, in id order. `next_missing_after` is the value to
+        pass for the next page, None on the last one.
+        """
+        limit = limit or RECONCILIATION_MISSING_IDS_LIMIT
+        missing = np.sort(self.line_ids[~self.present])
+        if missing_after is not None:
+            missing = missing[missing > missing_after]
+        page = missing[:limit].tolist()
+        return {
+            "lines_total": int(self.line_ids.size),
+            "lines_present": int(self.present.sum()),
+            "lines_missing": int((~self.present).sum()),
+            "overlap_minutes_total": int(self.overlap_minutes.sum()),
+            "missing_line_ids": page,
+            "next_missing_after": page[-1] if missing.size > limit else None,
+        }
+
+
+def to_local_time(value: datetime) -> datetime:
+    """
+    A request time as naive Cairo time, the clock meal schedules and the
+    attendance mirror use. Naive values (as stored) are Cairo time already;
+    aware values are converted.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(cairo_tz).replace(tzinfo=None)
+
+
+def _to_minutes(values) -> Tuple[np.ndarray, np.ndarray]:
+    """Naive datetimes (or datetime64) to int64 minutes; None becomes NaT."""
+    array = np.asarray(values, dtype="datetime64[m]")
+    return array.astype(np.int64), np.isnat(array)
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def meal_windows(
+    request_minutes: np.ndarray,
+    meal_ids: np.ndarray,
+    schedules: MealWindows,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Place the schedules of each line's meal around its request time.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: For every window, the
+            index of its line, its start and its end, in minutes.
+    """
+    day_start = request_minutes - request_minutes % MINUTES_PER_DAY
+    minute_of_day = request_minutes - day_start
+
+    lines, starts, ends = [], [], []
+    unscheduled = ~np.isin(meal_ids, list(schedules))
+    if unscheduled.any():
+        index = np.flatnonzero(unscheduled)
+        lines.append(index)
+        starts.append(day_start[index])
+        ends.append(day_start[index] + MINUTES_PER_DAY)
+
+    for meal_id, meal_schedules in schedules.items():
+        index = np.flatnonzero(meal_ids == meal_id)
+        if index.size == 0:
+            continue
+        for schedule_from, schedule_to in meal_schedules:
+            start = _minute_of_day(schedule_from)
+            end = _minute_of_day(schedule_to)
+            anchor = day_start[index]
+            if end <= start:
+                end += MINUTES_PER_DAY
+                # Ordered after midnight, within the window of the day before
+                anchor = anchor - MINUTES_PER_DAY * (
+                    minute_of_day[index] < end - MINUTES_PER_DAY
+                )
+            lines.append(index)
+            starts.append(anchor + start)
+            ends.append(anchor + end)
+
+    if not lines:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(lines), np.concatenate(starts), np.concatenate(ends)
+
+
+def reconcile(
+    line_ids: Sequence[int],
+    employee_codes: Sequence[int],
+    request_times: Sequence[datetime],
+    meal_ids: Sequence[int],
+    schedules: MealWindows,
+    attendance_codes: Sequence[int],
+    attendance_in: Sequence[datetime],
+    attendance_out: Sequence[datetime],
+) -> Reconciliation:
+    """
+    Compute presence and overlap minutes of request lines in one pass.
+
+    The line and attendance arguments are parallel sequences (or arrays).
+    An attendance record missing its check-in or check-out counts as a
+    single punch at the time it has; one with neither never matches.
+    """
+    line_ids = np.asarray(line_ids, dtype=np.int64)
+    codes = np.asarray(employee_codes, dtype=np.int64)
+    requested, _ = _to_minutes(request_times)
+    window_line, window_start, window_end = meal_windows(
+        requested, np.asarray(meal_ids, dtype=np.int64), schedules
+    )
+
+    present = np.zeros(line_ids.size, dtype=bool)
+    overlap = np.zeros(line_ids.size, dtype=np.int64)
+    matched = np.full(line_ids.size, -1, dtype=np.int64)
+
+    check_in, no_in = _to_minutes(attendance_in)
+    check_out, no_out = _to_minutes(attendance_out)
+    check_in = np.where(no_in, check_out, check_in)
+    check_out = np.maximum(np.where(no_out, check_in, check_out), check_in)
+    keep = ~(no_in & no_out)
+    attendance_codes = np.asarray(attendance_codes, dtype=np.int64)[keep]
+    check_in, check_out = check_in[keep], check_out[keep]
+    if attendance_codes.size == 0 or window_line.size == 0:
+        return Reconciliation(line_ids, present, overlap, matched)
+
+    base = min(check_in.min(), window_start.min())
+    order = np.lexsort((check_in, attendance_codes))
+    # Position of each sorted interval in the caller's attendance
+    source_index = np.flatnonzero(keep)[order]
+    attendance_codes = attendance_codes[order]
+    check_in, check_out = check_in[order], check_out[order]
+    in_keys = (attendance_codes << _CODE_SHIFT) + (check_in - base)
+    # Running maximum of the check-out keys: the code in the high bits keeps
+    # it within each employee, and it stays sorted even if intervals overlap
+    out_keys = np.maximum.accumulate(
+        (attendance_codes << _CODE_SHIFT) + (check_out - base)
+    )
+
+    window_codes = codes[window_line] << _CODE_SHIFT
+    # Intervals in [first, last) may touch the window: they start no later
+    # than its end and are not all over before its start
+    first = np.searchsorted(out_keys, window_codes + (window_start - base))
+    last = np.searchsorted(
+        in_keys, window_codes + (window_end - base), side="right"
+    )
+    counts = np.maximum(last - first, 0)
+
+    # One row per (window, candidate interval)
+    pair_window = np.repeat(np.arange(window_line.size), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+    pair_interval = np.repeat(first, counts) + offsets
+
+    pair_start = np.maximum(check_in[pair_interval], window_start[pair_window])
+    pair_end = np.minimum(check_out[pair_interval], window_end[pair_window])
+    touches = pair_end >= pair_start
+    pair_line = window_line[pair_window]
+
+    present[pair_line[touches]] = True
+    minutes = np.bincount(
+        pair_line,
+        weights=np.maximum(pair_end - pair_start, 0),
+        minlength=line_ids.size,
+    ).astype(np.int64)
+    # Overlapping windows or punches could count the same minutes twice;
+    # never report more than the windows' length
+    longest = np.bincount(
+        window_line,
+        weights=window_end - window_start,
+        minlength=line_ids.size,
+    ).astype(np.int64)
+    np.minimum(minutes, longest, out=overlap)
+
+    # Per line, the touching interval with the longest overlap (the
+    # earliest on a tie): sort the touching pairs by line, then by overlap
+    # descending, and keep the first pair of each line
+    hits = np.flatnonzero(touches)
+    if hits.size:
+        hit_lines = pair_line[hits]
+        hits = hits[
+            np.lexsort(
+                (
+                    pair_interval[hits],
+                    pair_start[hits] - pair_end[hits],
+                    hit_lines,
+                )
+            )
+        ]
+        hit_lines = pair_line[hits]
+        first_of_line = np.r_[True, hit_lines[1:] != hit_lines[:-1]]
+        best = hits[first_of_line]
+        matched[pair_line[best]] = source_index[pair_interval[best]]
+
+    return Reconciliation(line_ids, present, overlap, matched)
+
+
+async def read_meal_windows(session: AsyncSession) -> MealWindows:
+    schedules: MealWindows = {}
+    for meal_id, schedule_from, schedule_to in (
+        await session.execute(
+            select(
+                MealSchedule.meal_id,
+                MealSchedule.schedule_from,
+                MealSchedule.schedule_to,
+            )
+        )
+    ).all():
+        schedules.setdefault(meal_id, []).append((schedule_from, schedule_to))
+    return schedules
+
+
+async def match_attendance(
+    session: AsyncSession, lines: Sequence
+) -> Dict[int, Optional[Tuple[datetime, datetime]]]:
+    """
+    Find the attendance of request lines by meal window overlap.
+
+    Args:
+        session (AsyncSession): Session on the application database.
+        lines (Sequence): Rows with `id`, `employee_code`, `request_time`
+            and `meal_id`; request times go through `to_local_time`.
+
+    Returns:
+        Dict[int, Optional[Tuple[datetime, datetime]]]: line id ->
+            (date_in, date_out) of its attendance, None when it has none.
+    """
+    if not lines:
+        return {}
+    request_times = [to_local_time(line.request_time) for line in lines]
+    # Overnight windows and shifts reach into the neighbouring days
+    first = datetime.combine(min(request_times).date(), time.min)
+    last = datetime.combine(max(request_times).date(), time.max)
+    attendance = (
+        await session.execute(
+            select(
+                Attendance.employee_code,
+                Attendance.date_in,
+                Attendance.date_out,
+            )
+            .where(
+                Attendance.employee_code.in_(
+                    {line.employee_code for line in lines}
+                )
+            )
+            .where(
+                Attendance.date.between(
+                    first - timedelta(days=1), last + timedelta(days=1)
+                )
+            )
+        )
+    ).all()
+
+    result = reconcile(
+        [line.id for line in lines],
+        [line.employee_code for line in lines],
+        request_times,
+        [line.meal_id for line in lines],
+        await read_meal_windows(session),
+        [row.employee_code for row in attendance],
+        [row.date_in for row in attendance],
+        [row.date_out for row in attendance],
+    )
+    return {
+        line_id: (
+            (attendance[index].date_in, attendance[index].date_out)
+            if index >= 0
+            else None
+        )
+        for line_id, index in zip(
+            result.line_ids.tolist(), result.attendance_index.tolist()
+        )
+    }
+
+
+async def reconcile_request_lines(
+    session: AsyncSession, start: datetime, end: datetime
+) -> Reconciliation:
+    """
+    Reconcile the accepted request lines with request_time in [start, end]
+    against the local attendance mirror.
+
+    Lines, attendance and schedules are read as plain rows with one query
+    each; no ORM objects are built. Attendance is read for the whole range
+    (by `date`, which is indexed) rather than per employee.
+    """
+    lines = (
+        await session.execute(
+            select(
+                RequestLine.id,
+                RequestLine.employee_code,
+                Request.request_time,
+                RequestLine.meal_id,
+            )
+            .join(Request, Request.id == RequestLine.request_id)
+            .where(Request.status_id == 3)
+            .where(RequestLine.is_accepted == True)
+            .where(Request.request_time.between(start, end))
+            .order_by(RequestLine.id)
+        )
+    ).all()
+    if not lines:
+        return Reconciliation.empty()
+
+    # Overnight windows and shifts reach into the neighbouring days
+    attendance = (
+        await session.execute(
+            select(
+                Attendance.employee_code,
+                Attendance.date_in,
+                Attendance.date_out,
+            ).where(
+                Attendance.date.between(
+                    start - timedelta(days=1), end + timedelta(days=1)
+                )
+            )
+        )
+    ).all()
+
+    schedules = await read_meal_windows(session)
+
+    line_ids, codes, request_times, meal_ids = zip(*lines)
+    if attendance:
+        attendance_codes, attendance_in, attendance_out = zip(*attendance)
+    else:
+        attendance_codes = attendance_in = attendance_out = ()
+
+    result = reconcile(
+        line_ids,
+        codes,
+        request_times,
+        meal_ids,
+        schedules,
+        attendance_codes,
+        attendance_in,
+        attendance_out,
+    )
+    logger.info(
+        f"Reconciled {result.line_ids.size} request lines, "
+        f"{len(result.missing_line_ids)} without attendance."
+    )
+    return result
@@ -0,0 +1,79 @@
+"""
+Set-based updates of many rows by primary key.
+
+`bulk_update_by_id` writes per-row values with one
+`UPDATE ... SET col = CASE id WHEN ... END WHERE id IN (...)` per chunk of
+rows instead of one UPDATE per object through the unit of work.
+"""
+
+import os
+import logging
+from typing import Any, Dict, Iterable, Type
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement
+BULK_UPDATE_CHUNK_SIZE = int(os.getenv("BULK_UPDATE_CHUNK_SIZE", "500"))
+
+
+async def bulk_update_by_id(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    changes: Dict[int, Dict[str, Any]],
+    objects: Iterable[SQLModel] = (),
+) -> int:
+    """
+    Update rows of `model` by id with their own values.
+
+    Only the columns given for a row are changed; other columns keep their
+    value. The caller commits.
+
+    Args:
+        session (AsyncSession): Session the statements run in.
+        model (Type[SQLModel]): Mapped class with an integer `id` key.
+        changes (Dict[int, Dict[str, Any]]): id -> {column: new value}.
+        objects (Iterable[SQLModel]): Loaded instances to bring in line with
+            the new values, without marking them dirty.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    if not changes:
+        return 0
+
+    ids = list(changes)
+    updated = 0
+    for i in range(0, len(ids), BULK_UPDATE_CHUNK_SIZE):
+        chunk = ids[i : i + BULK_UPDATE_CHUNK_SIZE]
+        columns = {name for row_id in chunk for name in changes[row_id]}
+        values = {}
+        for name in sorted(columns):
+            column = getattr(model, name)
+            values[name] = case(
+                {
+                    row_id: changes[row_id][name]
+                    for row_id in chunk
+                    if name in changes[row_id]
+                },
+                value=model.id,
+                else_=column,
+            )
+        result = await session.execute(
+            update(model)
+            .where(model.id.in_(chunk))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+
+    for obj in objects:
+        for name, value in changes.get(obj.id, {}).items():
+            set_committed_value(obj, name, value)
+
+    logger.info(f"Bulk updated {updated} {model.__tablename__} rows.")
+    return updated
@@ -1,7 +1,12 @@
 import os
+import time
+import socket
 import asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
 from dotenv import load_dotenv
 import logging
 
@@ -22,30 +27,145 @@ DB_NAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_SERVER}/{DB_NAME}?charset=utf8mb4"
 
-# Create the async engine
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Connection pool settings from .env
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "1"))
+
+# Optional read replica. When DB_READ_SERVER is not set, reads use the primary.
+DB_READ_SERVER = os.getenv("DB_READ_SERVER")
+DB_READ_YOUR_WRITES_SECONDS = int(
+    os.getenv("DB_READ_YOUR_WRITES_SECONDS", "15")
+)
+
+# Identifies this process in the `worker` column of the job rows it runs
+# (export and attendance resync jobs), which every worker shares.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Create the process-wide async engine. The pool is shared by every request,
+# so connections are reused instead of paying a fresh handshake per call.
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 
 # Create session factory
 async_session_factory = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+if DB_READ_SERVER:
+    READ_DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_READ_SERVER}/{DB_NAME}?charset=utf8mb4"
+    read_engine = create_async_engine(
+        READ_DATABASE_URL,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+else:
+    read_engine = engine
 
-async def get_application_session():
+read_session_factory = sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# The client carries the read-your-writes flag, so it holds whichever worker
+# serves its next read. Its value is the epoch second until which that
+# client's reads go to the primary. The cookie covers browser calls; callers
+# that cannot keep cookies (server-side proxies) echo the header back.
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+
+def mark_recent_write(response: Response) -> None:
     """
-    Dependency function to provide an application-level async database session.
-    Ensures proper cleanup after use.
+    Route the client's reads to the primary for DB_READ_YOUR_WRITES_SECONDS
+    so they see their own writes despite replica lag.
     """
+    if read_engine is engine:
+        return
+    until = str(int(time.time()) + DB_READ_YOUR_WRITES_SECONDS)
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        until,
+        max_age=DB_READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite="lax",
+    )
+    response.headers[READ_PRIMARY_HEADER] = until
 
-    engine = create_async_engine(DATABASE_URL, echo=False)
 
-    # Set up the session
-    AsyncSessionLocal = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
+def has_recent_write(request: Request) -> bool:
+    """
+    Check whether the client wrote recently, from the cookie or the echoed
+    header. Values beyond the configured window are ignored.
+    """
+    value = request.cookies.get(READ_PRIMARY_COOKIE) or request.headers.get(
+        READ_PRIMARY_HEADER
     )
-
     try:
-        async with AsyncSessionLocal() as session:
-            yield session
-    finally:
-        await engine.dispose()
+        until = int(value)
+    except (TypeError, ValueError):
+        return False
+    now = time.time()
+    return now <= until <= now + DB_READ_YOUR_WRITES_SECONDS
+
+
+async def warm_up_application_engine() -> None:
+    """
+    Open DB_POOL_WARM connections at startup so the first requests do not
+    pay the connection setup cost.
+    """
+    warm_count = max(0, min(DB_POOL_WARM, DB_POOL_SIZE))
+    if not warm_count:
+        return
+
+    async def _ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Run the pings concurrently so each one checks out its own connection.
+    await asyncio.gather(*(_ping() for _ in range(warm_count)))
+    logger.info(f"Application database pool warmed ({warm_count}).")
+
+
+async def dispose_application_engine() -> None:
+    """
+    Close all pooled connections of the application (and replica) engine.
+    """
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    logger.info("Application database pool disposed.")
+
+
+async def get_application_session():
+    """
+    Dependency function to provide an application-level async database session.
+    An AsyncSession checks no connection out of the pool until its first
+    query, so routes that never query cost nothing. Ensures proper cleanup
+    after use.
+    """
+    async with async_session_factory() as session:
+        yield session
+
+
+async def get_read_session(use_primary: bool = False):
+    """
+    Provide a session bound to the read replica, or to the primary when
+    use_primary is set or no replica is configured.
+    """
+    factory = async_session_factory if use_primary else read_session_factory
+    async with factory() as session:
+        yield session
@@ -0,0 +1,344 @@
+"""
+Versioned schema migrations for the application database.
+
+Each migration is a plain function that receives a synchronous SQLAlchemy
+Connection, so the same code runs against MySQL in production and against
+SQLite in tests. Applied versions are recorded in the `schema_migration`
+table; running the migrations again only applies the pending ones.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --check    # report missing indexes only
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+import db.models  # noqa: F401  registers the tables on SQLModel.metadata
+from db.models import (
+    Attendance,
+    AttendanceResyncJob,
+    DailyDepartmentMealRollup,
+    ExportJob,
+    SyncState,
+)
+from db.rollup import rebuild_rollup
+from db.search import normalize_name
+
+logger = logging.getLogger(__name__)
+
+migration_metadata = MetaData()
+
+schema_migration_table = Table(
+    "schema_migration",
+    migration_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    A single schema change.
+
+    Attributes:
+        version (int): Monotonic version number, applied in ascending order.
+        name (str): Short description stored with the applied version.
+        upgrade (Callable[[Connection], None]): Applies the change.
+    """
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _existing_index_names(conn: Connection, table_name: str) -> set:
+    return {ix["name"] for ix in inspect(conn).get_indexes(table_name)}
+
+
+def create_index_if_missing(
+    conn: Connection,
+    table_name: str,
+    index_name: str,
+    columns: Sequence[str],
+    **dialect_kwargs,
+) -> bool:
+    """
+    Create an index unless the table already has one with the same name.
+
+    Dialect options such as `mysql_prefix="FULLTEXT"` are passed through to
+    the Index and ignored by other databases.
+
+    Returns:
+        bool: True if the index was created.
+    """
+    if index_name in _existing_index_names(conn, table_name):
+        return False
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    Index(
+        index_name, *[table.c[column] for column in columns], **dialect_kwargs
+    ).create(conn)
+    logger.info(f"Created index {index_name} on {table_name}.")
+    return True
+
+
+def add_column_if_missing(
+    conn: Connection, table_name: str, column: Column
+) -> bool:
+    """
+    Add a nullable column unless the table already has it.
+
+    Returns:
+        bool: True if the column was added.
+    """
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name in existing:
+        return False
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(
+        f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type} NULL"
+    )
+    logger.info(f"Added column {column.name} to {table_name}.")
+    return True
+
+
+# ------------------------------------------------------------------------------
+# Migrations
+# ------------------------------------------------------------------------------
+HOT_PATH_INDEXES: List[Tuple[str, str, List[str]]] = [
+    ("request", "ix_request_deleted_time", ["is_deleted", "request_time"]),
+    ("request", "ix_request_requester_time", ["requester_id", "request_time"]),
+    ("request", "ix_request_status_time", ["status_id", "request_time"]),
+    ("request", "ix_request_created_time", ["created_time"]),
+    (
+        "request_line",
+        "ix_request_line_request_accepted",
+        ["request_id", "is_accepted", "is_deleted"],
+    ),
+    (
+        "request_line",
+        "ix_request_line_department_accepted",
+        ["department_id", "is_accepted", "request_id"],
+    ),
+    ("request_line", "ix_request_line_employee_code", ["employee_code"]),
+    ("employee", "ix_employee_name", ["name"]),
+]
+
+
+def _0001_hot_path_indexes(conn: Connection) -> None:
+    for table_name, index_name, columns in HOT_PATH_INDEXES:
+        create_index_if_missing(conn, table_name, index_name, columns)
+
+
+# table, source name column
+NAME_SEARCH_TABLES: List[Tuple[str, str]] = [
+    ("employee", "name"),
+    ("account", "fullname"),
+]
+
+
+def _0002_name_search(conn: Connection) -> None:
+    for table_name, name_column in NAME_SEARCH_TABLES:
+        add_column_if_missing(
+            conn, table_name, Column("search_name", String(255))
+        )
+
+        # Backfill the normalized names; later writes keep them in sync
+        table = Table(table_name, MetaData(), autoload_with=conn)
+        rows = conn.execute(
+            select(table.c.id, table.c[name_column]).where(
+                table.c.search_name.is_(None)
+            )
+        ).all()
+        if rows:
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(search_name=bindparam("normalized")),
+                [
+                    {"row_id": row.id, "normalized": normalize_name(row[1])}
+                    for row in rows
+                ],
+            )
+            logger.info(f"Normalized {len(rows)} names in {table_name}.")
+
+        create_index_if_missing(
+            conn,
+            table_name,
+            f"ft_{table_name}_search_name",
+            ["search_name"],
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        )
+
+
+def _0003_daily_department_meal_rollup(conn: Connection) -> None:
+    DailyDepartmentMealRollup.__table__.create(conn, checkfirst=True)
+    rows = rebuild_rollup(conn)
+    logger.info(f"Built {rows} daily department meal rollup rows.")
+
+
+def _0004_attendance_mirror(conn: Connection) -> None:
+    # Filled by the attendance sync on its first run
+    Attendance.__table__.create(conn, checkfirst=True)
+    SyncState.__table__.create(conn, checkfirst=True)
+    for index in Attendance.__table__.indexes:
+        create_index_if_missing(
+            conn,
+            Attendance.__tablename__,
+            index.name,
+            [column.name for column in index.columns],
+        )
+
+
+def _0005_sync_state_position(conn: Connection) -> None:
+    add_column_if_missing(conn, "sync_state", Column("position", Integer))
+
+
+def _0006_attendance_resync_jobs(conn: Connection) -> None:
+    AttendanceResyncJob.__table__.create(conn, checkfirst=True)
+    create_index_if_missing(
+        conn,
+        AttendanceResyncJob.__tablename__,
+        "ix_attendance_resync_job_status",
+        ["status"],
+    )
+
+
+def _0007_export_jobs(conn: Connection) -> None:
+    ExportJob.__table__.create(conn, checkfirst=True)
+    for index in ExportJob.__table__.indexes:
+        create_index_if_missing(
+            conn,
+            ExportJob.__tablename__,
+            index.name,
+            [column.name for column in index.columns],
+        )
+
+
+def _0008_attendance_resync_leases(conn: Connection) -> None:
+    table = AttendanceResyncJob.__tablename__
+    add_column_if_missing(conn, table, Column("worker", String(64)))
+    add_column_if_missing(conn, table, Column("heartbeat_at", DateTime))
+    add_column_if_missing(conn, table, Column("cancel_requested", Boolean))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "hot path indexes", _0001_hot_path_indexes),
+    Migration(2, "normalized name search", _0002_name_search),
+    Migration(
+        3, "daily department meal rollup", _0003_daily_department_meal_rollup
+    ),
+    Migration(4, "local attendance mirror", _0004_attendance_mirror),
+    Migration(5, "sync state checkpoint", _0005_sync_state_position),
+    Migration(6, "attendance resync jobs", _0006_attendance_resync_jobs),
+    Migration(7, "export jobs", _0007_export_jobs),
+    Migration(8, "attendance resync leases", _0008_attendance_resync_leases),
+]
+
+
+# ------------------------------------------------------------------------------
+# Runner
+# ------------------------------------------------------------------------------
+def applied_versions(conn: Connection) -> set:
+    """Return the set of migration versions already applied."""
+    schema_migration_table.create(conn, checkfirst=True)
+    rows = conn.execute(select(schema_migration_table.c.version)).all()
+    return {row.version for row in rows}
+
+
+def run_migrations(conn: Connection) -> List[int]:
+    """
+    Apply every pending migration in version order.
+
+    Each migration runs and is recorded in its own transaction step so a
+    failure leaves the earlier versions applied.
+
+    Returns:
+        List[int]: The versions applied by this call.
+    """
+    done = applied_versions(conn)
+    conn.commit()
+
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        logger.info(
+            f"Applying migration {migration.version}: {migration.name}"
+        )
+        migration.upgrade(conn)
+        conn.execute(
+            schema_migration_table.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.now(),
+            )
+        )
+        conn.commit()
+        applied.append(migration.version)
+
+    if not applied:
+        logger.info("Database schema is up to date.")
+    return applied
+
+
+def find_missing_indexes(conn: Connection) -> List[str]:
+    """
+    Compare the indexes declared on the models with the live database.
+
+    Returns:
+        List[str]: "table.index" entries that are declared but missing.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name and index.name not in existing:
+                missing.append(f"{table.name}.{index.name}")
+    return missing
+
+
+async def check_expected_indexes(async_engine: AsyncEngine) -> List[str]:
+    """
+    Log a warning for every model index missing from the database.
+
+    Returns:
+        List[str]: The missing "table.index" entries.
+    """
+    async with async_engine.connect() as conn:
+        missing = await conn.run_sync(find_missing_indexes)
+    if missing:
+        logger.warning(
+            f"Missing {len(missing)} expected index(es): {', '.join(missing)}. "
+            "Run `python migrate.py` to create them."
+        )
+    else:
+        logger.info("All expected indexes are present.")
+    return missing
@@ -1,9 +1,12 @@
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import pytz
+from sqlalchemy import Index, event
 from sqlmodel import Field, Relationship, SQLModel
 from datetime import time
 
+from db.search import normalize_name
+
 # Default timezone
 cairo_tz = pytz.timezone("Africa/Cairo")
 
@@ -63,10 +66,22 @@ class Employee(SQLModel, table=True):
     """
 
     __tablename__ = "employee"
+    __table_args__ = (
+        Index("ix_employee_name", "name"),
+        # name search (see db.search)
+        Index(
+            "ft_employee_search_name",
+            "search_name",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     code: int = Field(nullable=False, unique=True)
     name: str | None = None
+    # normalize_name(name), kept in sync on insert/update
+    search_name: str | None = Field(default=None, max_length=255)
     title: str | None = None
     is_active: bool
     department_id: int = Field(foreign_key="department.id", nullable=False)
@@ -151,10 +166,21 @@ class Account(SQLModel, table=True):
     """
 
     __tablename__ = "account"
+    __table_args__ = (
+        # requester search (see db.search)
+        Index(
+            "ft_account_search_name",
+            "search_name",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str
     fullname: str | None = None
+    # normalize_name(fullname), kept in sync on insert/update
+    search_name: str | None = Field(default=None, max_length=255)
     password: str | None = None
     title: str | None = None
     is_active: bool | None = True
@@ -207,6 +233,16 @@ class Request(SQLModel, table=True):
     """
 
     __tablename__ = "request"
+    __table_args__ = (
+        # requests listing: is_deleted filter, request_time range and order
+        Index("ix_request_deleted_time", "is_deleted", "request_time"),
+        # history listing: requester filter ordered by request_time
+        Index("ix_request_requester_time", "requester_id", "request_time"),
+        # report details and scheduled promotion: status filter + time range
+        Index("ix_request_status_time", "status_id", "request_time"),
+        # dashboard: created_time range
+        Index("ix_request_created_time", "created_time"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     status_id: int = Field(
@@ -253,6 +289,23 @@ class RequestLine(SQLModel, table=True):
     """
 
     __tablename__ = "request_line"
+    __table_args__ = (
+        # request aggregates and report details join on request_id
+        Index(
+            "ix_request_line_request_accepted",
+            "request_id",
+            "is_accepted",
+            "is_deleted",
+        ),
+        # dashboard: accepted lines grouped by department
+        Index(
+            "ix_request_line_department_accepted",
+            "department_id",
+            "is_accepted",
+            "request_id",
+        ),
+        Index("ix_request_line_employee_code", "employee_code"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     employee_id: int = Field(foreign_key="employee.id", nullable=False)
@@ -368,3 +421,137 @@ class Menu(SQLModel, table=True):
 
     # Relationships
     requests: List["Request"] = Relationship(back_populates="menu")
+
+
+class DailyDepartmentMealRollup(SQLModel, table=True):
+    """
+    Request line counts per day (of Request.created_time), department and
+    meal, maintained incrementally by db.rollup for the dashboard.
+    """
+
+    __tablename__ = "daily_department_meal_rollup"
+
+    day: date = Field(primary_key=True)
+    department_id: int = Field(foreign_key="department.id", primary_key=True)
+    meal_id: int = Field(foreign_key="meal.id", primary_key=True)
+    accepted_count: int = Field(default=0, nullable=False)
+    total_count: int = Field(default=0, nullable=False)
+
+
+class Attendance(SQLModel, table=True):
+    """
+    Local mirror of HRIS TmsEmployeeAttendenceWithDetails, kept up to date by
+    hris_db.attendance_sync so attendance matching never queries HRIS.
+    """
+
+    __tablename__ = "attendance"
+    __table_args__ = (
+        # request lines are matched on employee code and attendance day
+        Index("ix_attendance_code_date", "employee_code", "date"),
+        Index("ix_attendance_date", "date"),
+    )
+
+    # HRIS attendance Id
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    employee_code: int = Field(nullable=False)
+    date: datetime = Field(nullable=False)
+    date_in: datetime | None = None
+    date_out: datetime | None = None
+
+
+class SyncState(SQLModel, table=True):
+    """
+    Progress of an incremental replication from HRIS.
+    """
+
+    __tablename__ = "sync_state"
+
+    name: str = Field(primary_key=True, max_length=64)
+    # Highest source timestamp replicated so far
+    watermark: datetime | None = None
+    last_synced_at: datetime | None = None
+    rows_synced: int = Field(default=0, nullable=False)
+    # Last processed row id of a chunked job, None when it starts over
+    position: int | None = None
+
+
+class AttendanceResyncJob(SQLModel, table=True):
+    """
+    An admin-requested re-sync of attendance for a date range, processed one
+    day at a time. `next_day` is the checkpoint a resumed job starts from.
+    """
+
+    __tablename__ = "attendance_resync_job"
+    __table_args__ = (Index("ix_attendance_resync_job_status", "status"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    requested_by_id: int | None = Field(default=None, foreign_key="account.id")
+    start_day: date = Field(nullable=False)
+    end_day: date = Field(nullable=False)
+    next_day: date | None = None
+    # queued, running, completed, failed or cancelled
+    status: str = Field(default="queued", max_length=16, nullable=False)
+    days_total: int = Field(default=0, nullable=False)
+    days_done: int = Field(default=0, nullable=False)
+    attendance_rows: int = Field(default=0, nullable=False)
+    lines_updated: int = Field(default=0, nullable=False)
+    error: str | None = Field(default=None, max_length=255)
+    # Worker holding a running job, renewed after every day; a job whose
+    # heartbeat is older than the lease may be claimed by another worker
+    worker: str | None = Field(default=None, max_length=64)
+    heartbeat_at: datetime | None = None
+    # Set by a cancel from any worker; the runner stops before its next day
+    cancel_requested: bool | None = False
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class ExportJob(SQLModel, table=True):
+    """
+    A report export written in the background by one worker (`worker`) to
+    the shared EXPORT_DIR. The row is the job's state for every worker:
+    status polls, downloads and cancellations read it, and `heartbeat_at`
+    tells whether the worker running it is still alive.
+    """
+
+    __tablename__ = "export_job"
+    __table_args__ = (
+        Index("ix_export_job_owner_status", "owner_id", "status"),
+        Index("ix_export_job_status", "status"),
+    )
+
+    id: str = Field(primary_key=True, max_length=32)
+    owner_id: int = Field(nullable=False)
+    # csv, xlsx or parquet
+    format: str = Field(max_length=16, nullable=False)
+    start_time: datetime | None = None
+    end_time: datetime | None = None
+    query: str | None = Field(default=None, max_length=255)
+    # queued, running, completed, failed or cancelled
+    status: str = Field(default="queued", max_length=16, nullable=False)
+    rows_written: int = Field(default=0, nullable=False)
+    total_rows: int | None = None
+    error: str | None = Field(default=None, max_length=255)
+    path: str | None = Field(default=None, max_length=255)
+    worker: str | None = Field(default=None, max_length=64)
+    heartbeat_at: datetime | None = None
+    cancel_requested: bool = Field(default=False, nullable=False)
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    finished_at: datetime | None = None
+
+
+# ------------------------------------------------------------------------------
+# Keep the normalized search names in sync with ORM writes. Core INSERT/UPDATE
+# statements (HRIS replication) set search_name explicitly.
+# ------------------------------------------------------------------------------
+@event.listens_for(Employee, "before_insert")
+@event.listens_for(Employee, "before_update")
+def _set_employee_search_name(mapper, connection, target: Employee) -> None:
+    target.search_name = normalize_name(target.name)
+
+
+@event.listens_for(Account, "before_insert")
+@event.listens_for(Account, "before_update")
+def _set_account_search_name(mapper, connection, target: Account) -> None:
+    target.search_name = normalize_name(target.fullname)
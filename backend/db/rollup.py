@@ -0,0 +1,315 @@
+"""
+Daily department/meal rollup for the requests dashboard.
+
+`daily_department_meal_rollup` holds, per day of Request.created_time,
+department and meal, the number of accepted and of non-deleted request
+lines. Every flush applies per-cell deltas in the same transaction: the
+changes of request lines (created, accepted, rejected, deleted or moved to
+another department) and of requests (meal or creation day) are read from
+the attribute history, old and new values alike, and added to the affected
+cells with one upsert (`INSERT ... ON DUPLICATE KEY UPDATE count = count +
+delta`). Only the touched rollup rows are locked, by primary key and in a
+fixed order, so concurrent submissions neither scan nor gap-lock a range of
+cells.
+
+`rebuild_rollup` recomputes a whole date range (or everything) and backs
+the `rebuild_rollup.py` command.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, inspect, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from db.models import DailyDepartmentMealRollup, Request, RequestLine
+
+logger = logging.getLogger(__name__)
+
+# Attributes whose changes move counts between rollup cells
+TRACKED_LINE_FIELDS = (
+    "request_id",
+    "department_id",
+    "is_accepted",
+    "is_deleted",
+)
+TRACKED_REQUEST_FIELDS = ("created_time", "meal_id")
+
+Rollup = DailyDepartmentMealRollup
+
+# (day, meal_id) of a request: where its lines are counted
+RequestKey = Tuple[date, int]
+# (request_id, department_id, accepted, counted) of a request line
+LineState = Tuple[int, int, int, int]
+
+
+def _as_date(value) -> date:
+    # SQLite returns DATE() as a string
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _refresh(
+    conn: Connection,
+    first_day: Optional[date] = None,
+    last_day: Optional[date] = None,
+    department_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    Replace the rollup rows in a day range (and optionally a set of
+    departments) with a fresh aggregate of request_line.
+    """
+    day = func.date(Request.created_time)
+    aggregate = (
+        select(
+            day.label("day"),
+            RequestLine.department_id,
+            Request.meal_id,
+            func.sum(case((RequestLine.is_accepted == True, 1), else_=0)),
+            func.sum(case((RequestLine.is_deleted == True, 0), else_=1)),
+        )
+        .join(Request, Request.id == RequestLine.request_id)
+        .group_by(day, RequestLine.department_id, Request.meal_id)
+    )
+    clear = delete(Rollup)
+
+    if first_day is not None:
+        aggregate = aggregate.where(
+            Request.created_time >= datetime.combine(first_day, time.min)
+        )
+        clear = clear.where(Rollup.day >= first_day)
+    if last_day is not None:
+        aggregate = aggregate.where(
+            Request.created_time
+            < datetime.combine(last_day + timedelta(days=1), time.min)
+        )
+        clear = clear.where(Rollup.day <= last_day)
+    if department_ids is not None:
+        department_ids = list(department_ids)
+        aggregate = aggregate.where(
+            RequestLine.department_id.in_(department_ids)
+        )
+        clear = clear.where(Rollup.department_id.in_(department_ids))
+
+    conn.execute(clear)
+    conn.execute(
+        insert(Rollup).from_select(
+            [
+                "day",
+                "department_id",
+                "meal_id",
+                "accepted_count",
+                "total_count",
+            ],
+            aggregate,
+        )
+    )
+
+
+def _upsert_deltas(conn: Connection, deltas: Dict[tuple, List[int]]) -> None:
+    """
+    Add (accepted, total) deltas to rollup cells, creating missing cells.
+    Cells are written in key order so concurrent transactions lock them in
+    the same order.
+    """
+    rows = [
+        {
+            "day": day,
+            "department_id": department_id,
+            "meal_id": meal_id,
+            "accepted_count": accepted,
+            "total_count": total,
+        }
+        for (day, department_id, meal_id), (accepted, total) in sorted(
+            deltas.items()
+        )
+        if accepted or total
+    ]
+    if not rows:
+        return
+
+    table = Rollup.__table__
+    if conn.dialect.name == "sqlite":
+        stmt = sqlite.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key],
+            set_={
+                "accepted_count": table.c.accepted_count
+                + stmt.excluded.accepted_count,
+                "total_count": table.c.total_count + stmt.excluded.total_count,
+            },
+        )
+    else:
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            accepted_count=table.c.accepted_count
+            + stmt.inserted.accepted_count,
+            total_count=table.c.total_count + stmt.inserted.total_count,
+        )
+    conn.execute(stmt, rows)
+
+
+def apply_line_changes(
+    conn: Connection,
+    changes: List[Tuple[Optional[LineState], Optional[LineState]]],
+    moved: Dict[int, RequestKey],
+) -> None:
+    """
+    Apply the rollup deltas of a flush.
+
+    Args:
+        changes: (before, after) states of the request lines written by the
+            flush; None for a line that did not exist before or no longer
+            exists.
+        moved: Requests whose day or meal changed, with their key before the
+            flush.
+    """
+    request_ids = set(moved)
+    for before, after in changes:
+        request_ids.update(s[0] for s in (before, after) if s is not None)
+    if not request_ids:
+        return
+    keys: Dict[int, RequestKey] = {
+        request_id: (_as_date(created_time), meal_id)
+        for request_id, created_time, meal_id in conn.execute(
+            select(Request.id, Request.created_time, Request.meal_id).where(
+                Request.id.in_(request_ids)
+            )
+        )
+    }
+
+    deltas: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(key, department_id, accepted, total):
+        if key is None or None in key or department_id is None:
+            return
+        cell = deltas[(key[0], department_id, key[1])]
+        cell[0] += accepted
+        cell[1] += total
+
+    # A moved request takes the current counts of its lines along...
+    if moved:
+        for request_id, department_id, accepted, total in conn.execute(
+            select(
+                RequestLine.request_id,
+                RequestLine.department_id,
+                func.sum(case((RequestLine.is_accepted == True, 1), else_=0)),
+                func.sum(case((RequestLine.is_deleted == True, 0), else_=1)),
+            )
+            .where(RequestLine.request_id.in_(moved))
+            .group_by(RequestLine.request_id, RequestLine.department_id)
+        ):
+            add(moved[request_id], department_id, -accepted, -total)
+            add(keys.get(request_id), department_id, accepted, total)
+
+    # ...so line changes are counted where the request was before the flush
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            request_id, department_id, accepted, total = state
+            key = moved.get(request_id) or keys.get(request_id)
+            add(key, department_id, sign * accepted, sign * total)
+
+    _upsert_deltas(conn, deltas)
+
+
+def rebuild_rollup(
+    conn: Connection,
+    first_day: Optional[date] = None,
+    last_day: Optional[date] = None,
+) -> int:
+    """
+    Rebuild the rollup for a day range, or for all data when no range is
+    given.
+
+    Returns:
+        int: The number of rollup rows in the rebuilt range.
+    """
+    _refresh(conn, first_day, last_day)
+    count_stmt = select(func.count()).select_from(Rollup)
+    if first_day is not None:
+        count_stmt = count_stmt.where(Rollup.day >= first_day)
+    if last_day is not None:
+        count_stmt = count_stmt.where(Rollup.day <= last_day)
+    return conn.execute(count_stmt).scalar() or 0
+
+
+# ------------------------------------------------------------------------------
+# Incremental maintenance
+# ------------------------------------------------------------------------------
+def _changed(obj, fields) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def _before_and_after(obj, name) -> tuple:
+    """The value of an attribute before and after the current flush."""
+    history = inspect(obj).attrs[name].history
+    if not history.has_changes():
+        value = (
+            history.unchanged[0] if history.unchanged else getattr(obj, name)
+        )
+        return value, value
+    before = history.deleted[0] if history.deleted else None
+    after = history.added[0] if history.added else None
+    return before, after
+
+
+def _line_states(line: RequestLine) -> Tuple[LineState, LineState]:
+    states = []
+    for request_id, department_id, is_accepted, is_deleted in zip(
+        *(_before_and_after(line, name) for name in TRACKED_LINE_FIELDS)
+    ):
+        states.append(
+            (
+                request_id,
+                department_id,
+                1 if is_accepted else 0,
+                0 if is_deleted else 1,
+            )
+        )
+    return states[0], states[1]
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes, moved = session.info.setdefault("rollup_changes", ([], {}))
+    for obj in session.new:
+        if isinstance(obj, RequestLine):
+            changes.append((None, _line_states(obj)[1]))
+    for obj in session.dirty:
+        if isinstance(obj, RequestLine) and _changed(obj, TRACKED_LINE_FIELDS):
+            changes.append(_line_states(obj))
+        elif isinstance(obj, Request) and _changed(
+            obj, TRACKED_REQUEST_FIELDS
+        ):
+            created_time, _ = _before_and_after(obj, "created_time")
+            meal_id, _ = _before_and_after(obj, "meal_id")
+            moved.setdefault(obj.id, (_as_date(created_time), meal_id))
+    for obj in session.deleted:
+        if isinstance(obj, RequestLine):
+            changes.append((_line_states(obj)[0], None))
+
+
+def _after_flush_postexec(session: Session, flush_context) -> None:
+    pending = session.info.pop("rollup_changes", None)
+    if pending and (pending[0] or pending[1]):
+        apply_line_changes(session.connection(), *pending)
+
+
+def install_rollup_maintenance() -> None:
+    """
+    Keep the rollup in step with ORM writes to requests and request lines.
+    Safe to call more than once.
+    """
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_flush_postexec", _after_flush_postexec)
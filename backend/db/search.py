@@ -0,0 +1,139 @@
+"""
+Name search for employees and accounts.
+
+Names are stored a second time in a `search_name` column, normalized so that
+the spelling variants users type interchangeably compare equal: Arabic alef
+forms, alef maqsura / ya, ta marbuta / ha, hamza carriers, tatweel and
+diacritics are folded, Latin text is case-folded and whitespace collapsed.
+
+On MySQL the column carries a FULLTEXT index with the ngram parser, so a
+search is an index lookup instead of a `LIKE '%x%'` scan. Other databases
+(SQLite in the tests) fall back to LIKE on the normalized column.
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import Boolean, bindparam
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Must match the server's ngram_token_size (MySQL default: 2). Terms shorter
+# than this cannot be found through the ngram index.
+NGRAM_TOKEN_SIZE = 2
+
+_ARABIC_FOLDING = str.maketrans(
+    {
+        "آ": "ا",  # alef with madda above -> alef
+        "أ": "ا",  # alef with hamza above -> alef
+        "إ": "ا",  # alef with hamza below -> alef
+        "ٱ": "ا",  # alef wasla -> alef
+        "ى": "ي",  # alef maqsura -> ya
+        "ی": "ي",  # farsi ya -> ya
+        "ئ": "ي",  # ya with hamza above -> ya
+        "ؤ": "و",  # waw with hamza above -> waw
+        "ة": "ه",  # ta marbuta -> ha
+        "ک": "ك",  # keheh -> kaf
+        "ـ": None,  # tatweel
+    }
+)
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+_ARABIC_DIACRITICS = re.compile(
+    r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]"
+)
+_WHITESPACE = re.compile(r"\s+")
+LIKE_ESCAPE = "!"
+# Characters with a meaning in MySQL boolean full-text syntax
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+def normalize_name(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize a person's name for searching.
+
+    Args:
+        value (Optional[str]): The name as stored or typed.
+
+    Returns:
+        Optional[str]: The normalized name, or None for None.
+    """
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKC", value)
+    text = _ARABIC_DIACRITICS.sub("", text)
+    text = text.translate(_ARABIC_FOLDING)
+    text = text.casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class name_matches(FunctionElement):
+    """
+    `column` contains every term of the search. Compiles to a boolean-mode
+    MATCH ... AGAINST on MySQL and to LIKE elsewhere.
+    """
+
+    type = Boolean()
+    name = "name_matches"
+    inherit_cache = True
+
+
+@compiles(name_matches)
+def _compile_name_matches(element, compiler, **kw):
+    column, _, like_pattern = list(element.clauses)
+    return (
+        f"{compiler.process(column, **kw)} LIKE "
+        f"{compiler.process(like_pattern, **kw)} ESCAPE '{LIKE_ESCAPE}'"
+    )
+
+
+@compiles(name_matches, "mysql")
+def _compile_name_matches_mysql(element, compiler, **kw):
+    column, boolean_query, _ = list(element.clauses)
+    return (
+        f"MATCH ({compiler.process(column, **kw)}) "
+        f"AGAINST ({compiler.process(boolean_query, **kw)} IN BOOLEAN MODE)"
+    )
+
+
+def name_search_condition(column, query: Optional[str]):
+    """
+    Build the WHERE condition matching `query` against a `search_name`
+    column.
+
+    On MySQL every term must appear in the name, in any order. Terms shorter
+    than the ngram size, and other databases, fall back to LIKE on the
+    normalized column with the terms in the order typed.
+
+    Args:
+        column: The `search_name` column to search.
+        query (Optional[str]): The text typed by the user.
+
+    Returns:
+        The condition, or None when the query is empty.
+    """
+    normalized = normalize_name(query)
+    if normalized:
+        normalized = _WHITESPACE.sub(
+            " ", _BOOLEAN_OPERATORS.sub(" ", normalized)
+        ).strip()
+    if not normalized:
+        return None
+
+    terms = normalized.split(" ")
+    escaped = (
+        normalized.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+    like_pattern = "%" + escaped.replace(" ", "%") + "%"
+
+    if any(len(term) < NGRAM_TOKEN_SIZE for term in terms):
+        return column.like(like_pattern, escape=LIKE_ESCAPE)
+
+    boolean_query = " ".join(f'+"{term}"' for term in terms)
+    return name_matches(
+        column,
+        bindparam("name_query", boolean_query, unique=True),
+        bindparam("name_like", like_pattern, unique=True),
+    )
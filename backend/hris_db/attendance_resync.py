@@ -0,0 +1,420 @@
+"""
+Admin-requested attendance re-sync for past date ranges.
+
+A job re-reads the HRIS attendance of each day of its range, replaces that
+day in the local mirror and re-applies it to the day's request lines, then
+checkpoints `next_day` in the same transaction. Re-running a day gives the
+same result, so a failed, cancelled or interrupted job is resumed from its
+checkpoint without redoing finished days.
+
+Every worker may start a job, so a job is run by the worker that claims it:
+a conditional UPDATE moves it to running under that worker's WORKER_ID, and
+only one worker's claim matches. Running is a lease renewed by the heartbeat
+written with every day's checkpoint; the checkpoint only commits while the
+worker still holds the lease. Jobs left queued, or running with a heartbeat
+older than ATTENDANCE_RESYNC_LEASE_SECONDS (their worker stopped), are
+claimed at startup and every ATTENDANCE_RESYNC_RECLAIM_MINUTES. A cancel
+from any worker sets `cancel_requested`, which the runner checks between
+days.
+
+Days of a job are processed one after the other and at most
+ATTENDANCE_RESYNC_CONCURRENCY jobs run at once per worker, which bounds the
+HRIS load on top of the process-wide HRIS semaphore.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.attendance_backfill import apply_attendance_for_day
+from db.database import WORKER_ID, async_session_factory
+from db.models import AttendanceResyncJob
+from hris_db.attendance_sync import replace_attendance_window
+from hris_db.clone import scheduler
+from hris_db.database import hris_read_session_factory
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_RESYNC_MAX_DAYS = int(
+    os.getenv("ATTENDANCE_RESYNC_MAX_DAYS", "366")
+)
+ATTENDANCE_RESYNC_CONCURRENCY = int(
+    os.getenv("ATTENDANCE_RESYNC_CONCURRENCY", "1")
+)
+# Must exceed the time one day takes to re-sync
+ATTENDANCE_RESYNC_LEASE_SECONDS = int(
+    os.getenv("ATTENDANCE_RESYNC_LEASE_SECONDS", "600")
+)
+ATTENDANCE_RESYNC_RECLAIM_MINUTES = int(
+    os.getenv("ATTENDANCE_RESYNC_RECLAIM_MINUTES", "5")
+)
+RECLAIM_JOB_ID = "attendance_resync_reclaim_task"
+
+ACTIVE_STATUSES = ("queued", "running")
+RESUMABLE_STATUSES = ("failed", "cancelled")
+
+
+class ResyncRangeError(ValueError):
+    """Raised for an empty, reversed or too long date range."""
+
+
+# Tasks of the jobs this worker runs
+_tasks: Dict[int, asyncio.Task] = {}
+_slots = asyncio.Semaphore(ATTENDANCE_RESYNC_CONCURRENCY)
+# Set on shutdown: interrupted jobs are released to be resumed later
+_stopping = False
+
+
+def resync_job_as_dict(job: AttendanceResyncJob) -> Dict:
+    progress = None
+    if job.days_total:
+        progress = round(job.days_done / job.days_total * 100, 1)
+    return {
+        "id": job.id,
+        "start_day": job.start_day,
+        "end_day": job.end_day,
+        "next_day": job.next_day,
+        "status": job.status,
+        "days_total": job.days_total,
+        "days_done": job.days_done,
+        "progress": progress,
+        "attendance_rows": job.attendance_rows,
+        "lines_updated": job.lines_updated,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def read_resync_job(
+    session: AsyncSession, job_id: int
+) -> Optional[AttendanceResyncJob]:
+    return await session.get(AttendanceResyncJob, job_id)
+
+
+async def read_resync_jobs(
+    session: AsyncSession, limit: int = 50
+) -> List[AttendanceResyncJob]:
+    result = await session.execute(
+        select(AttendanceResyncJob)
+        .order_by(AttendanceResyncJob.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+def _held_by_this_worker():
+    return and_(
+        AttendanceResyncJob.status == "running",
+        AttendanceResyncJob.worker == WORKER_ID,
+    )
+
+
+def _claimable(now: datetime):
+    """Queued jobs, and running jobs whose lease expired."""
+    expired = now - timedelta(seconds=ATTENDANCE_RESYNC_LEASE_SECONDS)
+    return or_(
+        AttendanceResyncJob.status == "queued",
+        and_(
+            AttendanceResyncJob.status == "running",
+            or_(
+                AttendanceResyncJob.heartbeat_at == None,
+                AttendanceResyncJob.heartbeat_at < expired,
+            ),
+        ),
+    )
+
+
+async def _claim(session: AsyncSession, job_id: int) -> bool:
+    """
+    Take the lease of a claimable job for this worker. Returns False if the
+    job is not claimable or another worker claimed it first.
+    """
+    now = datetime.now()
+    result = await session.execute(
+        update(AttendanceResyncJob)
+        .where(AttendanceResyncJob.id == job_id, _claimable(now))
+        .values(
+            status="running",
+            worker=WORKER_ID,
+            heartbeat_at=now,
+            updated_at=now,
+        )
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def _finish(
+    session: AsyncSession,
+    job_id: int,
+    status: str,
+    error: Optional[str] = None,
+) -> None:
+    """Record the outcome of a job, if this worker still holds it."""
+    now = datetime.now()
+    await session.execute(
+        update(AttendanceResyncJob)
+        .where(AttendanceResyncJob.id == job_id, _held_by_this_worker())
+        .values(
+            status=status,
+            error=error[:255] if error else None,
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    await session.commit()
+
+
+async def _release(session: AsyncSession, job_id: int) -> None:
+    """Give a job back as queued, for another worker to resume."""
+    await session.execute(
+        update(AttendanceResyncJob)
+        .where(AttendanceResyncJob.id == job_id, _held_by_this_worker())
+        .values(status="queued", worker=None, updated_at=datetime.now())
+    )
+    await session.commit()
+
+
+async def _run_day(session: AsyncSession, day: date) -> Tuple[int, int]:
+    async with hris_read_session_factory() as hris_session:
+        rows, _ = await replace_attendance_window(
+            hris_session,
+            session,
+            datetime.combine(day, time.min),
+            datetime.combine(day + timedelta(days=1), time.min),
+        )
+    lines = await apply_attendance_for_day(session, day)
+    return rows, lines
+
+
+async def _run_job(job_id: int) -> None:
+    try:
+        async with _slots, async_session_factory() as session:
+            if not await _claim(session, job_id):
+                return
+            await _run_claimed_job(session, job_id)
+    finally:
+        _tasks.pop(job_id, None)
+
+
+async def _run_claimed_job(session: AsyncSession, job_id: int) -> None:
+    Job = AttendanceResyncJob
+    try:
+        job = await session.get(Job, job_id, populate_existing=True)
+        logger.info(f"Attendance resync {job_id} started at {job.next_day}.")
+        while job.next_day is not None:
+            if job.cancel_requested:
+                await _finish(session, job_id, "cancelled")
+                logger.info(f"Attendance resync {job_id} cancelled.")
+                return
+
+            day = job.next_day
+            rows, lines = await _run_day(session, day)
+
+            # The day, its checkpoint and the heartbeat are committed
+            # together, and only while this worker holds the lease
+            following = day + timedelta(days=1)
+            now = datetime.now()
+            checkpoint = await session.execute(
+                update(Job)
+                .where(Job.id == job_id, _held_by_this_worker())
+                .values(
+                    next_day=following if following <= job.end_day else None,
+                    days_done=Job.days_done + 1,
+                    attendance_rows=Job.attendance_rows + rows,
+                    lines_updated=Job.lines_updated + lines,
+                    heartbeat_at=now,
+                    updated_at=now,
+                )
+            )
+            if checkpoint.rowcount != 1:
+                await session.rollback()
+                logger.warning(
+                    f"Attendance resync {job_id} lost its lease at {day}."
+                )
+                return
+            await session.commit()
+            job = await session.get(Job, job_id, populate_existing=True)
+
+        await _finish(session, job_id, "completed")
+        logger.info(
+            f"Attendance resync {job_id} completed: "
+            f"{job.lines_updated} request lines updated."
+        )
+    except asyncio.CancelledError:
+        await session.rollback()
+        if _stopping:
+            await _release(session, job_id)
+        else:
+            await _finish(session, job_id, "cancelled")
+            logger.info(f"Attendance resync {job_id} cancelled.")
+        raise
+    except Exception as e:
+        await session.rollback()
+        await _finish(session, job_id, "failed", str(e))
+        logger.error(f"Attendance resync {job_id} failed: {e}", exc_info=True)
+
+
+def _start(job_id: int) -> None:
+    task = _tasks.get(job_id)
+    if task is not None and not task.done():
+        return
+    _tasks[job_id] = asyncio.create_task(_run_job(job_id))
+
+
+async def submit_resync_job(
+    session: AsyncSession,
+    start_day: date,
+    end_day: date,
+    requested_by_id: Optional[int] = None,
+) -> AttendanceResyncJob:
+    """
+    Create a re-sync job for a date range and start it, or return the active
+    job that already covers exactly that range.
+
+    Raises:
+        ResyncRangeError: If the range is reversed, in the future or longer
+            than ATTENDANCE_RESYNC_MAX_DAYS.
+    """
+    if end_day < start_day:
+        raise ResyncRangeError("end_date must not be before start_date.")
+    if start_day > date.today():
+        raise ResyncRangeError("The range starts in the future.")
+    days_total = (end_day - start_day).days + 1
+    if days_total > ATTENDANCE_RESYNC_MAX_DAYS:
+        raise ResyncRangeError(
+            f"At most {ATTENDANCE_RESYNC_MAX_DAYS} days can be re-synced at once."
+        )
+
+    result = await session.execute(
+        select(AttendanceResyncJob).where(
+            AttendanceResyncJob.start_day == start_day,
+            AttendanceResyncJob.end_day == end_day,
+            AttendanceResyncJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    job = result.scalars().first()
+    if job is None:
+        job = AttendanceResyncJob(
+            requested_by_id=requested_by_id,
+            start_day=start_day,
+            end_day=end_day,
+            next_day=start_day,
+            days_total=days_total,
+        )
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        logger.info(
+            f"Attendance resync {job.id} queued for {start_day} to {end_day}."
+        )
+    _start(job.id)
+    return job
+
+
+async def resume_resync_job(
+    session: AsyncSession, job: AttendanceResyncJob
+) -> AttendanceResyncJob:
+    """
+    Restart a failed or cancelled job from its checkpoint. Active jobs are
+    only started if they are claimable (queued, or their lease expired).
+    """
+    await session.refresh(job)
+    if job.status in RESUMABLE_STATUSES and job.next_day is not None:
+        job.status = "queued"
+        job.error = None
+        job.cancel_requested = False
+        job.finished_at = None
+        job.updated_at = datetime.now()
+        session.add(job)
+        await session.commit()
+    if job.status in ACTIVE_STATUSES:
+        _start(job.id)
+    return job
+
+
+async def cancel_resync_job(
+    session: AsyncSession, job: AttendanceResyncJob
+) -> AttendanceResyncJob:
+    """
+    Stop a queued or running job; finished days are kept.
+
+    A queued job, or one whose worker stopped, is cancelled at once. A job
+    running on this worker is stopped mid-day. A job running on another
+    worker is flagged and stops before its next day, so it may still be
+    reported as running until then.
+    """
+    now = datetime.now()
+    await session.execute(
+        update(AttendanceResyncJob)
+        .where(
+            AttendanceResyncJob.id == job.id,
+            AttendanceResyncJob.status.in_(ACTIVE_STATUSES),
+        )
+        .values(cancel_requested=True, updated_at=now)
+    )
+    await session.execute(
+        update(AttendanceResyncJob)
+        .where(AttendanceResyncJob.id == job.id, _claimable(now))
+        .values(status="cancelled", worker=None, finished_at=now)
+    )
+    await session.commit()
+
+    task = _tasks.get(job.id)
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await session.refresh(job)
+    return job
+
+
+async def resume_interrupted_resync_jobs() -> int:
+    """
+    Start the jobs that are queued or whose worker stopped. Every worker
+    runs this; the claim decides which one runs each job.
+
+    Returns:
+        int: The number of jobs found to resume.
+    """
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(AttendanceResyncJob.id).where(_claimable(datetime.now()))
+        )
+        job_ids = result.scalars().all()
+    for job_id in job_ids:
+        _start(job_id)
+    if job_ids:
+        logger.info(f"Resuming {len(job_ids)} attendance resync job(s).")
+    return len(job_ids)
+
+
+def schedule_resync_reclaim() -> None:
+    """
+    Look for abandoned jobs every ATTENDANCE_RESYNC_RECLAIM_MINUTES, so the
+    jobs of a stopped worker are resumed by the others.
+    """
+    scheduler.add_job(
+        resume_interrupted_resync_jobs,
+        trigger=IntervalTrigger(minutes=ATTENDANCE_RESYNC_RECLAIM_MINUTES),
+        id=RECLAIM_JOB_ID,
+        replace_existing=True,
+    )
+    logger.info("Scheduled attendance resync reclaim task.")
+
+
+async def stop_resync_jobs() -> None:
+    """Stop running jobs on shutdown, releasing them to be resumed later."""
+    global _stopping
+    _stopping = True
+    tasks = [task for task in _tasks.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
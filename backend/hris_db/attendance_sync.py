@@ -0,0 +1,302 @@
+"""
+Incremental replication of HRIS attendance into the local `attendance` table.
+
+Each run reads the attendance records whose `Date` is at or after the stored
+watermark minus ATTENDANCE_LATE_ARRIVAL_HOURS, so punches recorded late (or
+corrected) in HRIS are picked up again, and replaces that window locally.
+The first run starts ATTENDANCE_SYNC_INITIAL_DAYS back.
+
+Reports and request submissions match request lines against the local table;
+HRIS is only queried here, so while HRIS is down they keep working on the
+last synced data; `read_attendance_freshness` tells callers how old it is.
+A second job, `run_attendance_backfill`, copies
+the synced attendance onto recent request lines (see db.attendance_backfill).
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.attendance_backfill import backfill_attendance
+from db.database import async_session_factory
+from db.models import Attendance, SyncState
+from hris_db.clone import scheduler
+from hris_db.database import hris_breaker, hris_call, hris_read_session_factory
+from hris_db.models import HRISEmployeeAttendanceWithDetails
+from hris_db.records import (
+    AttendanceRecord,
+    select_attendance_records,
+    to_records,
+)
+from hris_db.shift_snapshot import shift_snapshot
+from services.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_SYNC_INTERVAL_MINUTES = int(
+    os.getenv("ATTENDANCE_SYNC_INTERVAL_MINUTES", "10")
+)
+ATTENDANCE_LATE_ARRIVAL_HOURS = int(
+    os.getenv("ATTENDANCE_LATE_ARRIVAL_HOURS", "48")
+)
+ATTENDANCE_SYNC_INITIAL_DAYS = int(
+    os.getenv("ATTENDANCE_SYNC_INITIAL_DAYS", "90")
+)
+ATTENDANCE_SYNC_BATCH_SIZE = int(
+    os.getenv("ATTENDANCE_SYNC_BATCH_SIZE", "5000")
+)
+ATTENDANCE_BACKFILL_INTERVAL_MINUTES = int(
+    os.getenv("ATTENDANCE_BACKFILL_INTERVAL_MINUTES", "10")
+)
+# The mirror counts as stale when the last successful sync is older than this
+ATTENDANCE_STALE_AFTER_MINUTES = int(
+    os.getenv(
+        "ATTENDANCE_STALE_AFTER_MINUTES",
+        str(3 * ATTENDANCE_SYNC_INTERVAL_MINUTES),
+    )
+)
+
+SYNC_NAME = "attendance"
+BACKFILL_JOB_ID = "attendance_backfill_task"
+
+
+def _to_local_rows(records) -> List[dict]:
+    rows = []
+    for record in records:
+        try:
+            employee_code = int(record.employee_code)
+        except (TypeError, ValueError):
+            # Codes that are not numeric cannot match a request line
+            continue
+        rows.append(
+            {
+                "id": record.id,
+                "employee_code": employee_code,
+                "date": record.date,
+                "date_in": record.date_in,
+                "date_out": record.date_out,
+            }
+        )
+    return rows
+
+
+async def replace_attendance_window(
+    hris_session: AsyncSession,
+    app_session: AsyncSession,
+    window_start: datetime,
+    window_end: Optional[datetime] = None,
+) -> Tuple[int, Optional[datetime]]:
+    """
+    Replace the local attendance rows with `window_start <= date`
+    (and `date < window_end` when given) by the HRIS records of that window.
+
+    The records are streamed from HRIS and written in batches of
+    ATTENDANCE_SYNC_BATCH_SIZE, so the window is never held in memory. The
+    caller commits, so the window is swapped in one transaction.
+
+    Records are keyed on the view's `Id`, which is the identity of the
+    underlying TMS attendance row: it is assigned once and kept when the
+    row is corrected, so a record whose Date moved is still found by it.
+    A view row fanned out by a join would repeat its Id (next to each other,
+    as rows are ordered by Date and Id); that fails the sync instead of
+    keeping one of the copies.
+
+    Returns:
+        Tuple[int, Optional[datetime]]: The number of rows written and the
+            newest Date read from HRIS.
+    """
+    source = HRISEmployeeAttendanceWithDetails
+    statement = (
+        select_attendance_records()
+        .where(source.date >= window_start)
+        .order_by(source.date, source.id)
+        .execution_options(yield_per=ATTENDANCE_SYNC_BATCH_SIZE)
+    )
+    local_window = delete(Attendance).where(Attendance.date >= window_start)
+    if window_end is not None:
+        statement = statement.where(source.date < window_end)
+        local_window = local_window.where(Attendance.date < window_end)
+
+    await app_session.execute(local_window)
+    written = 0
+    latest = None
+    previous_id = None
+    async with hris_call("attendance_sync"):
+        result = await hris_session.stream(statement)
+        async for partition in result.partitions():
+            records = to_records(partition, AttendanceRecord)
+            for record in records:
+                if record.id == previous_id:
+                    raise ValueError(
+                        f"HRIS attendance returned record {record.id} twice."
+                    )
+                previous_id = record.id
+            # Records are ordered by Date, the last one is the newest
+            latest = records[-1].date
+            rows = _to_local_rows(records)
+            if not rows:
+                continue
+            ids = [row["id"] for row in rows]
+            # A record whose Date moved into the window is still stored
+            # under its old date
+            await app_session.execute(
+                delete(Attendance).where(Attendance.id.in_(ids))
+            )
+            await app_session.execute(insert(Attendance), rows)
+            written += len(rows)
+
+    return written, latest
+
+
+async def sync_attendance(
+    hris_session: AsyncSession,
+    app_session: AsyncSession,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Replicate new and recently changed attendance records from HRIS.
+
+    The local rows in the sync window are replaced in one transaction, so
+    readers never see a partially synced window.
+
+    Args:
+        hris_session (AsyncSession): Session on the HRIS database.
+        app_session (AsyncSession): Session on the application database.
+        now (Optional[datetime]): Current time, for the first sync window.
+
+    Returns:
+        int: The number of attendance records written.
+    """
+    now = now or datetime.now()
+    state = await app_session.get(SyncState, SYNC_NAME)
+    if state is None:
+        state = SyncState(name=SYNC_NAME)
+    if state.watermark is not None:
+        window_start = state.watermark - timedelta(
+            hours=ATTENDANCE_LATE_ARRIVAL_HOURS
+        )
+    else:
+        window_start = now - timedelta(days=ATTENDANCE_SYNC_INITIAL_DAYS)
+
+    rows_written, latest = await replace_attendance_window(
+        hris_session, app_session, window_start
+    )
+    if latest is not None and (
+        state.watermark is None or latest > state.watermark
+    ):
+        state.watermark = latest
+    state.last_synced_at = now
+    state.rows_synced = rows_written
+    app_session.add(state)
+    await app_session.commit()
+
+    logger.info(
+        f"Synced {rows_written} attendance records since {window_start}."
+    )
+    return rows_written
+
+
+async def run_attendance_sync() -> None:
+    """
+    Scheduler entry point: run one sync with dedicated sessions.
+    """
+    try:
+        async with hris_read_session_factory() as hris_session:
+            async with async_session_factory() as app_session:
+                await sync_attendance(hris_session, app_session)
+    except CircuitOpenError as e:
+        logger.warning(f"Attendance sync skipped: {e}")
+    except Exception as e:
+        logger.error(f"Attendance sync failed: {e}", exc_info=True)
+
+
+async def read_attendance_freshness(
+    session: AsyncSession, now: Optional[datetime] = None
+) -> Tuple[Optional[datetime], bool]:
+    """
+    Tell how current the local attendance mirror is.
+
+    Returns:
+        Tuple[Optional[datetime], bool]: The time of the last successful
+            sync, and whether the mirror is stale: never synced, not synced
+            for ATTENDANCE_STALE_AFTER_MINUTES, or the HRIS circuit breaker
+            is not closed.
+    """
+    now = now or datetime.now()
+    state = await session.get(SyncState, SYNC_NAME)
+    synced_at = state.last_synced_at if state is not None else None
+    stale = (
+        synced_at is None
+        or now - synced_at
+        > timedelta(minutes=ATTENDANCE_STALE_AFTER_MINUTES)
+        or not hris_breaker.is_closed
+    )
+    return synced_at, stale
+
+
+def schedule_attendance_sync() -> None:
+    """
+    Schedule the attendance sync every ATTENDANCE_SYNC_INTERVAL_MINUTES,
+    starting right away.
+    """
+    scheduler.add_job(
+        run_attendance_sync,
+        trigger=IntervalTrigger(minutes=ATTENDANCE_SYNC_INTERVAL_MINUTES),
+        id="attendance_sync_task",
+        replace_existing=True,
+        next_run_time=datetime.now(),
+    )
+    logger.info("Scheduled attendance sync task.")
+
+
+async def run_attendance_backfill() -> None:
+    """
+    Scheduler entry point: fill attendance and shift hours of recent request
+    lines. HRIS is only reached when the shift snapshot has to load a day.
+    """
+    try:
+        async with (
+            async_session_factory() as session,
+            hris_read_session_factory() as hris_session,
+        ):
+            async def shift_hours(day, employee_ids):
+                return await shift_snapshot.get_hours(
+                    hris_session, employee_ids, day
+                )
+
+            await backfill_attendance(session, shift_hours=shift_hours)
+    except Exception as e:
+        logger.error(f"Attendance backfill failed: {e}", exc_info=True)
+
+
+def schedule_attendance_backfill() -> None:
+    """
+    Schedule the request line backfill every
+    ATTENDANCE_BACKFILL_INTERVAL_MINUTES.
+    """
+    scheduler.add_job(
+        run_attendance_backfill,
+        trigger=IntervalTrigger(minutes=ATTENDANCE_BACKFILL_INTERVAL_MINUTES),
+        id=BACKFILL_JOB_ID,
+        replace_existing=True,
+    )
+    logger.info("Scheduled attendance backfill task.")
+
+
+def trigger_attendance_backfill() -> bool:
+    """
+    Run the backfill job as soon as possible instead of at its next interval.
+
+    Returns:
+        bool: False if the job is not scheduled.
+    """
+    job = scheduler.get_job(BACKFILL_JOB_ID)
+    if job is None:
+        return False
+    job.modify(next_run_time=datetime.now())
+    return True
@@ -13,6 +13,8 @@ from hris_db.models import (
     HRISEmployeePosition,
 )
 from services.active_directory import read_domain_users_from_ldap
+from hris_db.database import hris_call
+from db.search import normalize_name
 from services.schema import DomainUser as DomainUserSchema
 from sqlalchemy.dialects.mysql import insert
 from sqlalchemy import delete, select
@@ -87,7 +89,8 @@ async def _create_or_update_security_users(
             HRISHRISSecurityUser.is_deleted == False,
             HRISHRISSecurityUser.is_locked == False,
         )
-        result = await hris_session.execute(statement)
+        async with hris_call("security_users"):
+            result = await hris_session.execute(statement)
         hris_sec_users = result.scalars().all()
 
         if not hris_sec_users:
@@ -156,11 +159,9 @@ async def _create_or_update_departments(
     logger.info("Fetching HRIS departments from the HRIS database.")
 
     try:
-        hris_departments = (
-            (await hris_session.execute(select(HRISOrganizationUnit)))
-            .scalars()
-            .all()
-        )
+        async with hris_call("departments"):
+            result = await hris_session.execute(select(HRISOrganizationUnit))
+        hris_departments = result.scalars().all()
         if not hris_departments:
             logger.info("No HRIS departments found.")
             return
@@ -221,7 +222,8 @@ async def _create_or_update_employees(
             .where(HRISEmployee.is_active == True)
         )
 
-        result = await hris_session.execute(statement)
+        async with hris_call("employees"):
+            result = await hris_session.execute(statement)
         hris_employees_with_positions = result.all()
 
         if not hris_employees_with_positions:
@@ -250,6 +252,7 @@ async def _create_or_update_employees(
                 id=emp_data.id,
                 code=emp_data.code,
                 name=fullname,
+                search_name=normalize_name(fullname),
                 title=emp_data.title,
                 is_active=True,
                 department_id=emp_data.org_unit_id,
@@ -259,6 +262,7 @@ async def _create_or_update_employees(
             update_stmt = {
                 "code": insert_stmt.inserted.code,
                 "name": insert_stmt.inserted.name,
+                "search_name": insert_stmt.inserted.search_name,
                 "title": insert_stmt.inserted.title,
                 "is_active": insert_stmt.inserted.is_active,
                 "department_id": insert_stmt.inserted.department_id,
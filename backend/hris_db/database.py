@@ -1,12 +1,20 @@
 import os
+import asyncio
+import logging
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import observe_external_call
 
 # Load environment variables from the .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SQL_DSN = (
     f"DRIVER={os.getenv("HRIS_DB_DRIVER")};"
     f"SERVER={os.getenv("HRIS_DB_SERVER")};"
@@ -15,16 +23,111 @@ SQL_DSN = (
     f"PWD={os.getenv("HRIS_DB_PASSWORD")}"
 )
 
+# Connection pool and query settings from .env
+HRIS_DB_POOL_SIZE = int(os.getenv("HRIS_DB_POOL_SIZE", "5"))
+HRIS_DB_MAX_OVERFLOW = int(os.getenv("HRIS_DB_MAX_OVERFLOW", "5"))
+HRIS_DB_POOL_RECYCLE = int(os.getenv("HRIS_DB_POOL_RECYCLE", "1800"))
+HRIS_DB_POOL_TIMEOUT = int(os.getenv("HRIS_DB_POOL_TIMEOUT", "30"))
+HRIS_DB_POOL_PRE_PING = (
+    os.getenv("HRIS_DB_POOL_PRE_PING", "true").lower() == "true"
+)
+HRIS_DB_LOGIN_TIMEOUT = int(os.getenv("HRIS_DB_LOGIN_TIMEOUT", "10"))
+HRIS_DB_STATEMENT_TIMEOUT = int(os.getenv("HRIS_DB_STATEMENT_TIMEOUT", "30"))
+HRIS_DB_READONLY = os.getenv("HRIS_DB_READONLY", "true").lower() == "true"
+# "READ UNCOMMITTED", "SNAPSHOT" or empty for the server default
+HRIS_DB_READ_ISOLATION = os.getenv(
+    "HRIS_DB_READ_ISOLATION", "READ UNCOMMITTED"
+)
+HRIS_DB_MAX_CONCURRENCY = int(os.getenv("HRIS_DB_MAX_CONCURRENCY", "4"))
+# Consecutive failed HRIS calls that open the circuit breaker, and how long
+# calls fail fast before a probe is let through
+HRIS_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("HRIS_BREAKER_FAILURE_THRESHOLD", "5")
+)
+HRIS_BREAKER_RESET_SECONDS = int(os.getenv("HRIS_BREAKER_RESET_SECONDS", "30"))
+HRIS_BREAKER_HALF_OPEN_CALLS = int(
+    os.getenv("HRIS_BREAKER_HALF_OPEN_CALLS", "1")
+)
+
 haris_db_engine = create_async_engine(
-    "mssql+aioodbc:///?odbc_connect=" + SQL_DSN, echo=False
+    "mssql+aioodbc:///?odbc_connect=" + SQL_DSN,
+    echo=False,
+    pool_size=HRIS_DB_POOL_SIZE,
+    max_overflow=HRIS_DB_MAX_OVERFLOW,
+    pool_recycle=HRIS_DB_POOL_RECYCLE,
+    pool_timeout=HRIS_DB_POOL_TIMEOUT,
+    pool_pre_ping=HRIS_DB_POOL_PRE_PING,
+    connect_args={
+        "timeout": HRIS_DB_LOGIN_TIMEOUT,
+        "readonly": HRIS_DB_READONLY,
+    },
+)
+
+
+@event.listens_for(haris_db_engine.sync_engine, "connect")
+def _set_statement_timeout(dbapi_connection, connection_record):
+    """
+    Apply the per-statement query timeout to every new HRIS connection.
+    """
+    driver_connection = connection_record.driver_connection
+    pyodbc_connection = getattr(driver_connection, "_conn", None)
+    if pyodbc_connection is None:
+        logger.warning("Could not apply HRIS statement timeout.")
+        return
+    pyodbc_connection.timeout = HRIS_DB_STATEMENT_TIMEOUT
+
+
+# Engine used for the attendance and shift views. It shares the pool with
+# haris_db_engine and only changes the isolation level, so report refreshes
+# do not take shared locks that block HRIS writers.
+hris_read_engine = (
+    haris_db_engine.execution_options(isolation_level=HRIS_DB_READ_ISOLATION)
+    if HRIS_DB_READ_ISOLATION
+    else haris_db_engine
+)
+
+hris_session_factory = sessionmaker(
+    bind=haris_db_engine, class_=AsyncSession, expire_on_commit=False
+)
+hris_read_session_factory = sessionmaker(
+    bind=hris_read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Caps how many HRIS queries run at once across the whole process.
+hris_concurrency = asyncio.Semaphore(HRIS_DB_MAX_CONCURRENCY)
+
+hris_breaker = CircuitBreaker(
+    "hris",
+    failure_threshold=HRIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=HRIS_BREAKER_RESET_SECONDS,
+    half_open_max_calls=HRIS_BREAKER_HALF_OPEN_CALLS,
 )
 
 
+@asynccontextmanager
+async def hris_call(operation: str):
+    """
+    Wrap one HRIS query: fail fast while the circuit breaker is open, take a
+    slot of hris_concurrency and record the call's latency.
+
+    The breaker is checked before waiting for a slot, so during an outage
+    callers get CircuitOpenError right away instead of queueing up behind
+    queries that are bound to time out.
+    """
+    async with hris_breaker.guard(), hris_concurrency:
+        async with observe_external_call("hris", operation):
+            yield
+
+
 async def get_hris_session() -> AsyncGenerator[AsyncSession, None]:
+    async with hris_session_factory() as session:
+        yield session
+
 
-    # Set up the session
-    AsyncSessionLocal = sessionmaker(
-        bind=haris_db_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with AsyncSessionLocal() as session:
+async def get_hris_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide an HRIS session using the configured read isolation level. It
+    only connects on its first query.
+    """
+    async with hris_read_session_factory() as session:
         yield session
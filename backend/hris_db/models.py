@@ -5,7 +5,7 @@ from sqlalchemy import (
     MetaData,
     Column,
     Integer,
-    String,
+    NVARCHAR,
     DateTime,
     Date,
     Boolean,
@@ -16,6 +16,14 @@ from sqlalchemy import (
 # Separate MetaData instance for the 'live' database models
 live_metadata = MetaData()
 
+# HRIS text columns are NVARCHAR. Declaring them as such makes parameters
+# compared with them bind as NVARCHAR (SQL_WVARCHAR) rather than VARCHAR, so
+# SQL Server needs no implicit conversion and can seek the column's index.
+HRIS_CODE_LENGTH = 50
+HRIS_NAME_LENGTH = 250
+HRISCode = NVARCHAR(HRIS_CODE_LENGTH)
+HRISName = NVARCHAR(HRIS_NAME_LENGTH)
+
 
 class LiveBase(SQLModel):
     """
@@ -36,7 +44,7 @@ class HRISEmployeeAttendanceWithDetails(LiveBase, table=True):
         default=None,
         sa_column=Column("Id", Integer, primary_key=True, autoincrement=True),
     )
-    employee_code: str = Field(sa_column=Column("EmployeeCode", String, nullable=False))
+    employee_code: str = Field(sa_column=Column("EmployeeCode", HRISCode, nullable=False))
     date: Optional[datetime] = Field(default=None, sa_column=Column("Date", DateTime))
     date_in: Optional[datetime] = Field(
         default=None, sa_column=Column("DateIn", DateTime)
@@ -64,19 +72,19 @@ class HRISEmployee(LiveBase, table=True):
         default=None,
         sa_column=Column("Id", Integer, primary_key=True, autoincrement=True),
     )
-    code: Optional[str] = Field(default=None, sa_column=Column("Code", String))
-    ar_f_name: Optional[str] = Field(default=None, sa_column=Column("ArFName", String))
-    ar_s_name: Optional[str] = Field(default=None, sa_column=Column("ArSName", String))
+    code: Optional[str] = Field(default=None, sa_column=Column("Code", HRISCode))
+    ar_f_name: Optional[str] = Field(default=None, sa_column=Column("ArFName", HRISName))
+    ar_s_name: Optional[str] = Field(default=None, sa_column=Column("ArSName", HRISName))
     ar_th_name: Optional[str] = Field(
-        default=None, sa_column=Column("ArThName", String)
+        default=None, sa_column=Column("ArThName", HRISName)
     )
-    ar_l_name: Optional[str] = Field(default=None, sa_column=Column("ArLName", String))
-    en_f_name: Optional[str] = Field(default=None, sa_column=Column("EnFName", String))
-    en_s_name: Optional[str] = Field(default=None, sa_column=Column("EnSName", String))
+    ar_l_name: Optional[str] = Field(default=None, sa_column=Column("ArLName", HRISName))
+    en_f_name: Optional[str] = Field(default=None, sa_column=Column("EnFName", HRISName))
+    en_s_name: Optional[str] = Field(default=None, sa_column=Column("EnSName", HRISName))
     en_th_name: Optional[str] = Field(
-        default=None, sa_column=Column("EnThName", String)
+        default=None, sa_column=Column("EnThName", HRISName)
     )
-    en_l_name: Optional[str] = Field(default=None, sa_column=Column("EnLName", String))
+    en_l_name: Optional[str] = Field(default=None, sa_column=Column("EnLName", HRISName))
     birthdate: Optional[date] = Field(default=None, sa_column=Column("Birthdate", Date))
     is_active: Optional[Boolean] = Field(
         default=None, sa_column=Column("IsActive", Boolean)
@@ -140,7 +148,7 @@ class HRISPosition(LiveBase, table=True):
         default=None,
         sa_column=Column("Id", Integer, primary_key=True, autoincrement=True),
     )
-    en_name: Optional[str] = Field(default=None, sa_column=Column("EnName", String))
+    en_name: Optional[str] = Field(default=None, sa_column=Column("EnName", HRISName))
 
     employee_positions: List[HRISEmployeePosition] = Relationship(
         back_populates="position"
@@ -162,7 +170,7 @@ class HRISOrganizationUnit(LiveBase, table=True):
         default=None,
         sa_column=Column("ID", Integer, primary_key=True, autoincrement=True),
     )
-    name: Optional[str] = Field(default=None, sa_column=Column("EnName", String))
+    name: Optional[str] = Field(default=None, sa_column=Column("EnName", HRISName))
 
     employee_positions: List[HRISEmployeePosition] = Relationship(
         back_populates="org_unit"
@@ -214,7 +222,7 @@ class TMSShift(LiveBase, table=True):
         default=None,
         sa_column=Column("Id", Integer, primary_key=True, autoincrement=True),
     )
-    code: Optional[str] = Field(default=None, sa_column=Column("Code", String))
+    code: Optional[str] = Field(default=None, sa_column=Column("Code", HRISCode))
 
     shift_assignments: List[HRISShiftAssignment] = Relationship(back_populates="shift")
 
@@ -239,7 +247,7 @@ class HRISAttendanceEngineResult(LiveBase, table=True):
     )
     employee_id: int = Field(sa_column=Column("Employee_Id", Integer, nullable=False))
     employee_code: Optional[str] = Field(
-        default=None, sa_column=Column("Employee_Code", String)
+        default=None, sa_column=Column("Employee_Code", HRISCode)
     )
     in_date: Optional[datetime] = Field(
         default=None, sa_column=Column("In_Date", DateTime)
@@ -267,7 +275,7 @@ class HRISHRISSecurityUser(LiveBase, table=True):
         default=None,
         sa_column=Column("ID", Integer, primary_key=True, autoincrement=True),
     )
-    name: Optional[str] = Field(default=None, sa_column=Column("Name", String))
+    name: Optional[str] = Field(default=None, sa_column=Column("Name", HRISName))
     is_locked: Optional[bool] = Field(
         default=None, sa_column=Column("IsLocked", Boolean)
     )
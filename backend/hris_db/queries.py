@@ -0,0 +1,217 @@
+"""
+Query helpers for the HRIS database.
+
+Lookups by a set of keys (employee codes or ids) go through `read_by_keys`:
+small sets are sent as `IN (...)` lists in parallel batches, larger sets are
+loaded into a session temp table and joined, which keeps the statement text
+(and so the cached plan) the same whatever the number of keys and stays clear
+of SQL Server's 2,100 parameter limit.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from typing import Any, Callable, List, Sequence, Union
+
+from sqlalchemy import Column, MetaData, Table, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+from sqlalchemy.types import TypeEngine
+
+from hris_db.database import hris_call, hris_read_session_factory
+from hris_db.records import to_records
+
+logger = logging.getLogger(__name__)
+
+# Batches of a single call that may run at the same time. Every batch also
+# goes through hris_call, which caps HRIS queries process-wide and fails
+# fast while the HRIS circuit breaker is open.
+HRIS_BATCH_CONCURRENCY = int(os.getenv("HRIS_BATCH_CONCURRENCY", "4"))
+
+# Key sets larger than this are joined through a temp table
+HRIS_TEMP_TABLE_THRESHOLD = int(os.getenv("HRIS_TEMP_TABLE_THRESHOLD", "500"))
+# Rows per INSERT ... VALUES into the temp table (SQL Server allows 1,000)
+TEMP_TABLE_INSERT_SIZE = 1000
+
+# A batch of keys, or a SELECT of the keys in the temp table; both can be
+# passed to ColumnOperators.in_()
+KeySource = Union[Sequence, Select]
+
+
+def _fetch(result, scalars: bool, record_type: type | None) -> List[Any]:
+    if record_type is not None:
+        return to_records(result, record_type)
+    return result.scalars().all() if scalars else result.all()
+
+
+async def read_in_batches(
+    build_statement: Callable[[KeySource], Select],
+    keys: Sequence,
+    batch_size: int,
+    operation: str,
+    concurrency: int | None = None,
+    scalars: bool = True,
+    record_type: type | None = None,
+) -> List[Any]:
+    """
+    Run one query per batch of keys in parallel and merge the results.
+
+    Each batch runs on its own session, so batches use separate pooled
+    connections. Results are returned in batch order.
+
+    Args:
+        build_statement (Callable): Builds the statement for a batch of keys.
+        keys (Sequence): Keys to split into batches.
+        batch_size (int): Number of keys per batch.
+        operation (str): Operation label for external_call_duration_seconds.
+        concurrency (int | None): Batches of this call running at once,
+            HRIS_BATCH_CONCURRENCY by default.
+        scalars (bool): Return the first column of each row instead of rows.
+        record_type (type | None): NamedTuple to wrap each row in (see
+            hris_db.records); overrides `scalars`.
+
+    Returns:
+        List[Any]: The rows (or scalars, or records) of all batches.
+
+    Raises:
+        Exception: The error of the first failed batch; the remaining
+            batches are cancelled.
+    """
+    batches = [
+        keys[i : i + batch_size] for i in range(0, len(keys), batch_size)
+    ]
+    if not batches:
+        return []
+
+    limit = asyncio.Semaphore(concurrency or HRIS_BATCH_CONCURRENCY)
+
+    async def run_batch(index: int, batch: Sequence) -> List[Any]:
+        async with limit, hris_read_session_factory() as session:
+            try:
+                async with hris_call(operation):
+                    result = await session.execute(build_statement(batch))
+                    return _fetch(result, scalars, record_type)
+            except Exception as e:
+                logger.error(
+                    f"HRIS {operation} batch {index + 1}/{len(batches)} "
+                    f"failed: {e}"
+                )
+                raise
+
+    tasks = [
+        asyncio.create_task(run_batch(index, batch))
+        for index, batch in enumerate(batches)
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return [row for batch_rows in results for row in batch_rows]
+
+
+async def _drop_temp_table(conn: AsyncConnection, key_table: Table) -> None:
+    """
+    Drop a temp table without masking the error of the lookup that used it.
+    If the drop fails the connection is discarded instead of going back to
+    the pool, which drops the table with it.
+    """
+    try:
+        await conn.run_sync(key_table.drop)
+    except Exception as e:
+        logger.warning(
+            f"Dropping {key_table.name} failed, discarding the connection: {e}"
+        )
+        await conn.invalidate()
+
+
+async def read_with_temp_table(
+    build_statement: Callable[[KeySource], Select],
+    keys: Sequence,
+    key_type: TypeEngine,
+    operation: str,
+    scalars: bool = True,
+    record_type: type | None = None,
+) -> List[Any]:
+    """
+    Load the keys into a `#temp` table on a dedicated connection and run the
+    statement with `column IN (SELECT key FROM #temp)`.
+
+    Args:
+        build_statement (Callable): Builds the statement for a key source.
+        keys (Sequence): The keys, of the same type as the joined column.
+        key_type (TypeEngine): Column type of the temp table; pass the joined
+            column's own type (e.g. `Model.column.type`) so the keys are
+            stored and compared without an implicit conversion.
+        operation (str): Operation label for external_call_duration_seconds.
+        scalars (bool): Return the first column of each row instead of rows.
+        record_type (type | None): NamedTuple to wrap each row in.
+
+    Returns:
+        List[Any]: The rows (or scalars, or records) of the statement.
+    """
+    # Temp tables live as long as the connection, which goes back to the
+    # pool afterwards: use a unique name and drop it when done.
+    key_table = Table(
+        f"#keys_{uuid.uuid4().hex[:12]}",
+        MetaData(),
+        Column("key", key_type, primary_key=True),
+    )
+    unique_keys = list(dict.fromkeys(keys))
+
+    async with hris_read_session_factory() as session:
+        async with hris_call(operation):
+            conn = await session.connection()
+            await conn.run_sync(key_table.create)
+            try:
+                for i in range(0, len(unique_keys), TEMP_TABLE_INSERT_SIZE):
+                    chunk = unique_keys[i : i + TEMP_TABLE_INSERT_SIZE]
+                    await conn.execute(
+                        insert(key_table).values([{"key": k} for k in chunk])
+                    )
+                result = await conn.execute(
+                    build_statement(select(key_table.c.key))
+                )
+                rows = _fetch(result, scalars, record_type)
+            finally:
+                await _drop_temp_table(conn, key_table)
+    return rows
+
+
+async def read_by_keys(
+    build_statement: Callable[[KeySource], Select],
+    keys: Sequence,
+    key_type: TypeEngine,
+    batch_size: int,
+    operation: str,
+    scalars: bool = True,
+    record_type: type | None = None,
+) -> List[Any]:
+    """
+    Run a keyed lookup with `IN (...)` batches, or through a temp table when
+    there are more than HRIS_TEMP_TABLE_THRESHOLD keys.
+
+    `build_statement` receives either a batch of keys or a SELECT of the
+    keys and should filter with `column.in_(...)`.
+    """
+    if len(keys) > HRIS_TEMP_TABLE_THRESHOLD:
+        return await read_with_temp_table(
+            build_statement,
+            keys,
+            key_type,
+            operation,
+            scalars=scalars,
+            record_type=record_type,
+        )
+    return await read_in_batches(
+        build_statement,
+        keys,
+        batch_size,
+        operation,
+        scalars=scalars,
+        record_type=record_type,
+    )
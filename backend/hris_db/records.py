@@ -0,0 +1,44 @@
+"""
+Lightweight records for HRIS reads.
+
+Attendance reads only use a handful of columns, so they select those
+columns instead of whole SQLModel entities and wrap each row in a
+NamedTuple. This skips the identity map and the Pydantic model construction
+per row, which dominate the cost of large attendance reads. Compare both
+read paths with backend/bench_hris_reads.py:
+
+    python bench_hris_reads.py --rows 1000000 --repeat 2
+"""
+
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from hris_db.models import HRISEmployeeAttendanceWithDetails
+
+
+class AttendanceRecord(NamedTuple):
+    id: int
+    employee_code: str
+    date: Optional[datetime]
+    date_in: Optional[datetime]
+    date_out: Optional[datetime]
+
+
+def select_attendance_records() -> Select:
+    """SELECT of the AttendanceRecord columns, in field order."""
+    source = HRISEmployeeAttendanceWithDetails
+    return select(
+        source.id,
+        source.employee_code,
+        source.date,
+        source.date_in,
+        source.date_out,
+    )
+
+
+def to_records(rows: Iterable, record_type: type) -> List:
+    """Wrap result rows (tuples in field order) in `record_type`."""
+    return list(map(record_type._make, rows))
@@ -0,0 +1,275 @@
+"""
+In-process snapshot of the HRIS shift assignments per day.
+
+`TMS_ShiftAssignment` is loaded once per day into an
+`employee_id -> duration_hours` map shared by every request, so enriching
+request lines is a dict lookup instead of an HRIS round trip. A day is
+reloaded when it is older than SHIFT_SNAPSHOT_MAX_AGE_MINUTES, today's
+snapshot is refreshed by a scheduled job, and employees missing from a
+snapshot (assigned after it was loaded) are fetched once on demand.
+
+Concurrent requests for a day that is not loaded share one load, and HRIS
+is never queried while holding the snapshot lock: the lock only guards
+merging a load into the snapshot, so lookups of loaded days are not held
+up by another day's load.
+
+When HRIS cannot be reached (including while its circuit breaker is open)
+the last good load of the day is served as is and the result is marked
+`stale`; without one the result is empty and stale.
+
+The snapshot is per process; at most SHIFT_SNAPSHOT_DAYS days are kept,
+the least recently used day being dropped first.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from hris_db.clone import scheduler
+from hris_db.database import hris_call, hris_read_session_factory
+from hris_db.models import HRISShiftAssignment
+from hris_db.queries import read_by_keys
+from services.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+SHIFT_SNAPSHOT_MAX_AGE_MINUTES = int(
+    os.getenv("SHIFT_SNAPSHOT_MAX_AGE_MINUTES", "60")
+)
+SHIFT_SNAPSHOT_REFRESH_MINUTES = int(
+    os.getenv("SHIFT_SNAPSHOT_REFRESH_MINUTES", "30")
+)
+SHIFT_SNAPSHOT_DAYS = int(os.getenv("SHIFT_SNAPSHOT_DAYS", "7"))
+
+# Employee ids per IN (...) when loading missing employees; the batches are
+# read in parallel, large sets go through a temp table
+SHIFT_LOOKUP_BATCH_SIZE = 1000
+
+
+@dataclass
+class DayShifts:
+    """
+    Shift hours of one day.
+
+    Attributes:
+        day (date): The assignment date (DateFrom).
+        hours (Dict[int, float]): employee_id -> duration_hours.
+        loaded_at (float): Monotonic time of the full load.
+        checked (Set[int]): Employees looked up on a miss, with or without
+            an assignment, so they are not queried again until the next load.
+    """
+
+    day: date
+    hours: Dict[int, float]
+    loaded_at: float = field(default_factory=time.monotonic)
+    checked: Set[int] = field(default_factory=set)
+
+    @property
+    def is_stale(self) -> bool:
+        age = time.monotonic() - self.loaded_at
+        return age > SHIFT_SNAPSHOT_MAX_AGE_MINUTES * 60
+
+
+class ShiftHours(dict):
+    """
+    employee_id -> shift hours, with `stale` set when HRIS could not be
+    reached and older (or no) data was returned.
+    """
+
+    def __init__(self, *args, stale: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stale = stale
+
+
+class ShiftSnapshot:
+    """
+    Shared per-day shift hours lookup.
+    """
+
+    def __init__(self):
+        self._days: "OrderedDict[date, DayShifts]" = OrderedDict()
+        # Full loads in flight, awaited by every request for their day
+        self._loading: Dict[date, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+
+    async def _load(
+        self,
+        hris_session: AsyncSession,
+        day: date,
+        employee_ids: Optional[List[int]] = None,
+    ) -> Dict[int, float]:
+        statement = select(
+            HRISShiftAssignment.employee_id,
+            HRISShiftAssignment.duration_hours,
+        ).where(HRISShiftAssignment.date_from == day)
+
+        if employee_ids is None:
+            async with hris_call("shifts"):
+                result = await hris_session.execute(statement)
+            rows = result.all()
+        else:
+            rows = await read_by_keys(
+                lambda keys: statement.where(
+                    HRISShiftAssignment.employee_id.in_(keys)
+                ),
+                employee_ids,
+                HRISShiftAssignment.employee_id.type,
+                SHIFT_LOOKUP_BATCH_SIZE,
+                "shifts",
+                scalars=False,
+            )
+
+        hours: Dict[int, float] = {}
+        for employee_id, duration_hours in rows:
+            # The first assignment wins, as before
+            if duration_hours is not None:
+                hours.setdefault(employee_id, duration_hours)
+        return hours
+
+    async def _load_day(
+        self, hris_session: AsyncSession, day: date
+    ) -> DayShifts:
+        """
+        Load every shift assignment of a day into the snapshot. A load of
+        the day already in flight is joined instead of starting another.
+        """
+        loading = self._loading.get(day)
+        if loading is not None:
+            # Shielded: a cancelled waiter must not cancel the shared load
+            return await asyncio.shield(loading)
+
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[day] = loading
+        try:
+            snapshot = DayShifts(
+                day=day, hours=await self._load(hris_session, day)
+            )
+            async with self._lock:
+                self._days[day] = snapshot
+                self._days.move_to_end(day)
+                while len(self._days) > SHIFT_SNAPSHOT_DAYS:
+                    self._days.popitem(last=False)
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                e = RuntimeError(f"Shift load of {day} was cancelled.")
+            loading.set_exception(e)
+            # Marked retrieved: the waiters, if any, raise it themselves
+            loading.exception()
+            raise
+        else:
+            loading.set_result(snapshot)
+        finally:
+            del self._loading[day]
+
+        logger.info(
+            f"Loaded {len(snapshot.hours)} shift assignments for {day}."
+        )
+        return snapshot
+
+    async def refresh(
+        self, hris_session: AsyncSession, day: Optional[date] = None
+    ) -> DayShifts:
+        """Reload every shift assignment of a day (today by default)."""
+        return await self._load_day(hris_session, day or date.today())
+
+    async def get_hours(
+        self,
+        hris_session: AsyncSession,
+        employee_ids: Iterable[int],
+        day: Optional[date] = None,
+    ) -> ShiftHours:
+        """
+        Return the shift hours of the given employees on a day (today by
+        default). Employees without an assignment are left out.
+
+        HRIS is only queried when the day is not loaded or stale, or for
+        employees that were not in the snapshot yet. If that query fails the
+        snapshot already held is used and the result is marked stale.
+        """
+        day = day or date.today()
+        employee_ids = set(employee_ids)
+        stale = False
+
+        async with self._lock:
+            snapshot = self._days.get(day)
+            if snapshot is not None:
+                self._days.move_to_end(day)
+        if snapshot is None or snapshot.is_stale:
+            try:
+                snapshot = await self._load_day(hris_session, day)
+            except Exception as e:
+                logger.warning(f"Serving stale shift hours for {day}: {e}")
+                if snapshot is None:
+                    return ShiftHours(stale=True)
+                stale = True
+
+        missing = [
+            employee_id
+            for employee_id in employee_ids
+            if employee_id not in snapshot.hours
+            and employee_id not in snapshot.checked
+        ]
+        if missing and not stale:
+            try:
+                found = await self._load(hris_session, day, missing)
+            except Exception as e:
+                logger.warning(
+                    f"Shift lookup of {len(missing)} employees failed: {e}"
+                )
+                stale = True
+            else:
+                async with self._lock:
+                    snapshot.hours.update(found)
+                    snapshot.checked.update(missing)
+
+        return ShiftHours(
+            {
+                employee_id: snapshot.hours[employee_id]
+                for employee_id in employee_ids
+                if employee_id in snapshot.hours
+            },
+            stale=stale,
+        )
+
+    def clear(self) -> None:
+        self._days.clear()
+
+
+shift_snapshot = ShiftSnapshot()
+
+
+async def refresh_shift_snapshot() -> None:
+    """
+    Scheduler entry point: reload today's shift assignments.
+    """
+    try:
+        async with hris_read_session_factory() as hris_session:
+            await shift_snapshot.refresh(hris_session)
+    except CircuitOpenError as e:
+        logger.warning(f"Shift snapshot refresh skipped: {e}")
+    except Exception as e:
+        logger.error(f"Shift snapshot refresh failed: {e}", exc_info=True)
+
+
+def schedule_shift_snapshot_refresh() -> None:
+    """
+    Refresh today's snapshot every SHIFT_SNAPSHOT_REFRESH_MINUTES, starting
+    right away so the first submissions find it loaded.
+    """
+    scheduler.add_job(
+        refresh_shift_snapshot,
+        trigger=IntervalTrigger(minutes=SHIFT_SNAPSHOT_REFRESH_MINUTES),
+        id="shift_snapshot_task",
+        replace_existing=True,
+        next_run_time=datetime.now(),
+    )
+    logger.info("Scheduled shift snapshot refresh task.")
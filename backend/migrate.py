@@ -0,0 +1,43 @@
+"""
+migrate.py
+
+Applies pending schema migrations to the application database and reports
+any index declared on the models that is still missing.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --check    # only report missing indexes
+"""
+
+import argparse
+import asyncio
+
+from db.database import engine
+from db.migrations import find_missing_indexes, run_migrations
+
+
+async def main_async(check_only: bool) -> None:
+    try:
+        async with engine.connect() as conn:
+            if not check_only:
+                applied = await conn.run_sync(run_migrations)
+                print(f"Applied migrations: {applied or 'none'}")
+
+            missing = await conn.run_sync(find_missing_indexes)
+            if missing:
+                print(f"Missing indexes: {', '.join(missing)}")
+            else:
+                print("All expected indexes are present.")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run schema migrations.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report missing indexes, do not apply migrations.",
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args.check))
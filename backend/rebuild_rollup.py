@@ -0,0 +1,47 @@
+"""
+rebuild_rollup.py
+
+Rebuilds the daily department/meal rollup used by the dashboard from the
+request lines, for a date range or for all data.
+
+Usage:
+    python rebuild_rollup.py                                   # everything
+    python rebuild_rollup.py --from 2025-01-01 --to 2025-01-31
+"""
+
+import argparse
+import asyncio
+from datetime import date
+from typing import Optional
+
+from db.database import engine
+from db.rollup import rebuild_rollup
+
+
+async def main_async(first_day: Optional[date], last_day: Optional[date]) -> None:
+    try:
+        async with engine.begin() as conn:
+            rows = await conn.run_sync(rebuild_rollup, first_day, last_day)
+        print(f"Rebuilt {rows} rollup rows.")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild the daily department meal rollup."
+    )
+    parser.add_argument(
+        "--from",
+        dest="first_day",
+        type=date.fromisoformat,
+        help="First day to rebuild (YYYY-MM-DD).",
+    )
+    parser.add_argument(
+        "--to",
+        dest="last_day",
+        type=date.fromisoformat,
+        help="Last day to rebuild (YYYY-MM-DD).",
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args.first_day, args.last_day))
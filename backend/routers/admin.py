@@ -0,0 +1,152 @@
+import logging
+from typing import List
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from db.models import AttendanceResyncJob
+from hris_db.attendance_resync import (
+    ResyncRangeError,
+    cancel_resync_job,
+    read_resync_job,
+    read_resync_jobs,
+    resume_resync_job,
+    resync_job_as_dict,
+    submit_resync_job,
+)
+from services.http_schema import (
+    AttendanceResyncJobResponse,
+    AttendanceResyncPayload,
+)
+from services.metrics import render_metrics
+from services.query_stats import read_endpoint_stats, reset_endpoint_stats
+from src.dependencies import AdminUserDep, SessionDep
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/admin/db-stats", status_code=status.HTTP_200_OK)
+async def get_db_stats(user: AdminUserDep):
+    """
+    Return per-endpoint SQL statistics collected since startup (or the last
+    reset): request count, query count, DB time, rows returned and statement
+    shapes that repeated within a single request.
+    """
+    return read_endpoint_stats()
+
+
+@router.delete("/admin/db-stats", status_code=status.HTTP_200_OK)
+async def clear_db_stats(user: AdminUserDep):
+    """
+    Reset the per-endpoint SQL statistics.
+    """
+    reset_endpoint_stats()
+    logger.info(f"User {user.username} reset the SQL statistics.")
+    return {"message": "SQL statistics reset"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Expose request latency, external call latency, connection pool usage and
+    background task counts in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
+async def get_resync_job_or_404(
+    session: SessionDep, job_id: int
+) -> AttendanceResyncJob:
+    job = await read_resync_job(session, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attendance resync job not found.",
+        )
+    return job
+
+
+@router.post(
+    "/admin/attendance-resync",
+    response_model=AttendanceResyncJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_attendance_resync(
+    payload: AttendanceResyncPayload, session: SessionDep, user: AdminUserDep
+) -> AttendanceResyncJobResponse:
+    """
+    Re-sync attendance from HRIS for a date range, one day at a time, in the
+    background. Submitting a range that already has an active job returns
+    that job.
+
+    :raises HTTPException: 400 for an invalid date range.
+    """
+    try:
+        job = await submit_resync_job(
+            session, payload.start_date, payload.end_date, user.id
+        )
+    except ResyncRangeError as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+        )
+    logger.info(
+        f"User {user.username} requested attendance resync {job.id}."
+    )
+    return resync_job_as_dict(job)
+
+
+@router.get(
+    "/admin/attendance-resync",
+    response_model=List[AttendanceResyncJobResponse],
+)
+async def get_attendance_resyncs(
+    session: SessionDep, user: AdminUserDep
+) -> List[AttendanceResyncJobResponse]:
+    """
+    List the most recent attendance resync jobs, newest first.
+    """
+    return [resync_job_as_dict(job) for job in await read_resync_jobs(session)]
+
+
+@router.get(
+    "/admin/attendance-resync/{job_id}",
+    response_model=AttendanceResyncJobResponse,
+)
+async def get_attendance_resync(
+    job_id: int, session: SessionDep, user: AdminUserDep
+) -> AttendanceResyncJobResponse:
+    """
+    Return the status and day progress of an attendance resync job.
+    """
+    return resync_job_as_dict(await get_resync_job_or_404(session, job_id))
+
+
+@router.post(
+    "/admin/attendance-resync/{job_id}/resume",
+    response_model=AttendanceResyncJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def resume_attendance_resync(
+    job_id: int, session: SessionDep, user: AdminUserDep
+) -> AttendanceResyncJobResponse:
+    """
+    Resume a failed or cancelled job from the first day it has not finished.
+    """
+    job = await get_resync_job_or_404(session, job_id)
+    return resync_job_as_dict(await resume_resync_job(session, job))
+
+
+@router.delete(
+    "/admin/attendance-resync/{job_id}",
+    response_model=AttendanceResyncJobResponse,
+)
+async def cancel_attendance_resync(
+    job_id: int, session: SessionDep, user: AdminUserDep
+) -> AttendanceResyncJobResponse:
+    """
+    Cancel a queued or running job. Days already re-synced are kept.
+    """
+    job = await get_resync_job_or_404(session, job_id)
+    return resync_job_as_dict(await cancel_resync_job(session, job))
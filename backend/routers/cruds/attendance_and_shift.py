@@ -1,17 +1,15 @@
 import logging
+from types import SimpleNamespace
 from typing import List, Optional
-from datetime import datetime, timedelta, date, time
+from datetime import datetime, time
 import pytz
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func
 from sqlalchemy.orm import selectinload
-from icecream import ic
 
-from hris_db.models import (
-    HRISEmployeeAttendanceWithDetails,
-    HRISShiftAssignment,
-)
+from db.attendance_reconciliation import match_attendance
+from db.bulk import bulk_update_by_id
 from db.models import RequestLine, Request
 
 # Default timezone
@@ -44,7 +42,6 @@ async def get_min_and_max_time(
 
 async def update_request_lines_with_attendance(
     session: AsyncSession,
-    hris_session: AsyncSession,
     start_time: str | None = None,
     end_time: str | None = None,
     page: int | None = 1,
@@ -55,15 +52,17 @@ async def update_request_lines_with_attendance(
 ) -> List[RequestLine]:
     """
     Updates RequestLine records with attendance_in and attendance_out values from
-    HRISEmployeeAttendanceWithDetails based on the Request's request_time.
+    the local attendance mirror based on the Request's request_time.
+
+    The attendance table is replicated from HRIS by hris_db.attendance_sync,
+    so this only queries the application database.
 
     Filters Requests with request_time between start_time and end_time and updates
-    each RequestLine by matching on both employee_code and the date portion of the
-    Request's request_time.
+    each RequestLine with the attendance of its employee that overlaps the meal
+    window of its request (see db.attendance_reconciliation.match_attendance).
 
     Args:
-        session (AsyncSession): Session used for RequestLine updates.
-        hris_session (AsyncSession): Session used for querying the attendance table.
+        session (AsyncSession): Session used for RequestLine updates and the attendance lookup.
         start_time (Optional[datetime]): Start datetime for filtering.
         end_time (Optional[datetime]): End datetime for filtering.
         page (int): Pagination page number.
@@ -110,164 +109,52 @@ async def update_request_lines_with_attendance(
 
     result = await session.execute(stmt)
     request_lines = result.scalars().all()
-    print(f"Found {len(request_lines)} request lines to update.")
+    logger.debug(f"Found {len(request_lines)} request lines to update.")
 
     if not request_lines:
         return []  # Nothing to update.
 
-    if not min_request_time or not max_request_time:
-        raise ValueError("Could not determine the min/max request times.")
-
-    # Collect employee_codes from the RequestLine records.
-    employee_codes = {str(rl.employee_code) for rl in request_lines}
-
-    # Query all attendance records for these employee codes within the date range.
-    attendance_stmt = (
-        select(HRISEmployeeAttendanceWithDetails)
-        .where(
-            HRISEmployeeAttendanceWithDetails.employee_code.in_(employee_codes)
-        )
-        .where(
-            HRISEmployeeAttendanceWithDetails.date.between(
-                min_request_time, max_request_time
-            )
-        )
-    )
-    attendance_result = await hris_session.execute(attendance_stmt)
-    attendance_records = attendance_result.scalars().all()
-
-    # Build a mapping from (employee_code, attendance_date) to its attendance record.
-    # Convert rec.date (a datetime) to a date object with .date()
-    attendance_map = {
-        (str(rec.employee_code), rec.date.date()): rec
-        for rec in attendance_records
-    }
-
-    # Update each RequestLine with the matching attendance record.
+    # The time each line is matched at; lines just submitted (by id) use
+    # the request's creation time.
+    lines = []
     for rl in request_lines:
-        # Ensure the associated Request and its request_time are available.
-
-        # Extract the date portion of the Request's request_time.
         if request_line_ids:
-            if not rl.request or not rl.request.created_time:
-                continue
-            request_date = rl.request.created_time.astimezone(cairo_tz).date()
+            matched_at = rl.request.created_time if rl.request else None
         else:
-            if not rl.request or not rl.request.request_time:
-                continue
-            request_date = rl.request.request_time.astimezone(cairo_tz).date()
+            matched_at = rl.request.request_time if rl.request else None
+        if matched_at is None:
+            continue
+        lines.append(
+            SimpleNamespace(
+                id=rl.id,
+                employee_code=rl.employee_code,
+                request_time=matched_at,
+                meal_id=rl.meal_id,
+            )
+        )
 
-        key = (str(rl.employee_code), request_date)
-        attendance_record = attendance_map.get(key)
-        if attendance_record:
-            rl.attendance_in = attendance_record.date_in
-            rl.attendance_out = attendance_record.date_out
-            session.add(rl)
+    # The attendance interval overlapping each line's meal window, from the
+    # local mirror (see db.attendance_reconciliation)
+    matches = await match_attendance(session, lines)
 
+    # Collect the new attendance values of each RequestLine that changes.
+    changes = {}
+    for rl in request_lines:
+        match = matches.get(rl.id)
+        if match:
+            values = dict(zip(("attendance_in", "attendance_out"), match))
+            changed = {
+                name: value
+                for name, value in values.items()
+                if getattr(rl, name) != value
+            }
+            if changed:
+                changes[rl.id] = changed
+
+    # One UPDATE per chunk of lines instead of one per line.
+    updated = await bulk_update_by_id(
+        session, RequestLine, changes, request_lines
+    )
     await session.commit()
+    logger.info(f"Updated attendance of {updated} request lines.")
     return request_lines
-
-
-async def read_attendances_from_hris(
-    hris_session: AsyncSession,
-    employee_codes: List[int],
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    batch_size: int = 100,
-) -> List[HRISEmployeeAttendanceWithDetails]:
-    """
-    Reads employee attendances within the last 3 days or a specified date range for the specified employee codes.
-
-    Args:
-        hris_session (AsyncSession): The database session.
-        employee_codes (List[int]): List of employee codes.
-        start_date (Optional[datetime]): Start date for filtering attendance.
-        end_date (Optional[datetime]): End date for filtering attendance.
-        batch_size (int): Number of employee codes to include per batch.
-
-    Returns:
-        List[HRISEmployeeAttendanceWithDetails]: List of attendances matching the criteria.
-    """
-    try:
-        filter_duration = datetime.now(cairo_tz) - timedelta(days=1)
-        all_attendances = []
-
-        for i in range(0, len(employee_codes), batch_size):
-            batch = employee_codes[i : i + batch_size]
-
-            statement = select(HRISEmployeeAttendanceWithDetails).where(
-                HRISEmployeeAttendanceWithDetails.employee_code.in_(batch)
-            )
-
-            if start_date and end_date:
-                statement = statement.where(
-                    HRISEmployeeAttendanceWithDetails.date.between(
-                        start_date, end_date
-                    )
-                )
-            else:
-                statement = statement.where(
-                    HRISEmployeeAttendanceWithDetails.date_in
-                    >= filter_duration
-                )
-
-            statement = statement.order_by(
-                HRISEmployeeAttendanceWithDetails.date_in.desc()
-            )
-
-            result = await hris_session.execute(statement)
-            all_attendances.extend(result.scalars().all())
-
-        return all_attendances
-
-    except Exception as e:
-        logger.error(f"Error reading recent attendances: {e}")
-        return []
-
-
-async def read_shifts_from_hris(
-    hris_session: AsyncSession,
-    employee_ids: List[int],
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    batch_size: int = 200,
-) -> List[HRISShiftAssignment]:
-    """
-    Reads employee shifts that match today's date for the specified employee IDs.
-
-    Args:
-        hris_session (AsyncSession): The database session.
-        employee_ids (List[int]): List of employee IDs.
-        start_date (Optional[datetime]): Start date for filtering shifts.
-        end_date (Optional[datetime]): End date for filtering shifts.
-        batch_size (int): Number of IDs to include per batch.
-
-    Returns:
-        List[HRISShiftAssignment]: List of shifts for the specified period.
-    """
-    try:
-        today = date.today()
-        all_shifts = []
-
-        for i in range(0, len(employee_ids), batch_size):
-            batch = employee_ids[i : i + batch_size]
-            statement = select(HRISShiftAssignment).where(
-                HRISShiftAssignment.employee_id.in_(batch)
-            )
-            if start_date and end_date:
-                statement = statement.where(
-                    HRISShiftAssignment.date_from.between(start_date, end_date)
-                )
-            else:
-                statement = statement.where(
-                    HRISShiftAssignment.date_from == today
-                )
-
-            result = await hris_session.execute(statement)
-            all_shifts.extend(result.scalars().all())
-
-        return all_shifts
-
-    except Exception as e:
-        logger.error(f"Error reading shifts: {e}")
-        return []
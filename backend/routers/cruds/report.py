@@ -1,79 +1,98 @@
 # Standard Library Imports
-from datetime import datetime
-from typing import List, Optional
-import icecream
+from datetime import date, datetime
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, func, case
-from sqlalchemy import func
+from sqlmodel import select, func
 
 # Project-Specific Imports
-from db.models import Department, Request, RequestLine, Employee, Account, Meal
+from db.models import DailyDepartmentMealRollup, Department, Meal
 from services.http_schema import ReportDashboardResponse, ReportDetailsResponse
 
 
+# Meal ids behind the legacy dinner/lunch fields of the dashboard
+DINNER_MEAL_ID = 1
+LUNCH_MEAL_ID = 2
+
+
+def _as_day(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
 async def read_requests_data(
-    session: AsyncSession, from_date: Optional[str], to_date: Optional[str]
+    session: AsyncSession,
+    from_date: Optional[datetime | str],
+    to_date: Optional[datetime | str],
 ) -> List[ReportDashboardResponse]:
     """
-    Fetches the number of dinner and lunch requests grouped by department.
+    Fetches the number of accepted requests per meal grouped by department.
+
+    Reads the daily department/meal rollup (see db.rollup) instead of
+    aggregating request lines, so the cost depends on the number of days and
+    departments in the range, not on the number of lines.
 
     Args:
         session (AsyncSession): The database session.
-        from_date (Optional[str]): Start date filter (inclusive).
-        to_date (Optional[str]): End date filter (inclusive).
+        from_date (Optional[datetime | str]): Start date filter (inclusive).
+        to_date (Optional[datetime | str]): End date filter (inclusive).
 
     Returns:
-        List[ReportDashboardResponse]: Aggregated data for dinner and lunch requests.
+        List[ReportDashboardResponse]: Accepted request counts per department,
+        per meal name and for the dinner and lunch meals.
     """
-    # Convert date strings to datetime objects
-    if from_date:
-        from_date = datetime.strptime(from_date, "%Y-%m-%d").replace(
-            hour=0, minute=0, second=0
-        )
-    if to_date:
-        to_date = datetime.strptime(to_date, "%Y-%m-%d").replace(
-            hour=23, minute=59, second=59
-        )
-
-    # CASE expressions for dinner (meal_id=1) and lunch (meal_id=2)
-    dinner_case = case((Request.meal_id == 1, 1), else_=0)
-    lunch_case = case((Request.meal_id == 2, 1), else_=0)
+    first_day = _as_day(from_date)
+    last_day = _as_day(to_date)
 
-    # Build the query
+    accepted = func.sum(DailyDepartmentMealRollup.accepted_count)
     statement = (
         select(
             Department.id,
             Department.name,
-            func.sum(dinner_case).label("dinner_requests"),
-            func.sum(lunch_case).label("lunch_requests"),
+            Meal.id.label("meal_id"),
+            Meal.name.label("meal"),
+            accepted.label("accepted"),
         )
-        .join(RequestLine, RequestLine.department_id == Department.id)
-        .join(Request, Request.id == RequestLine.request_id)
-        .where(RequestLine.is_accepted == True)  # Only accepted request lines
+        .join(
+            DailyDepartmentMealRollup,
+            DailyDepartmentMealRollup.department_id == Department.id,
+        )
+        .join(Meal, Meal.id == DailyDepartmentMealRollup.meal_id)
     )
 
     # Apply date filters if provided
-    if from_date and to_date:
+    if first_day and last_day:
         statement = statement.where(
-            Request.created_time.between(from_date, to_date)
+            DailyDepartmentMealRollup.day.between(first_day, last_day)
         )
 
-    # Group by department
-    statement = statement.group_by(Department.id, Department.name)
+    statement = statement.group_by(
+        Department.id, Department.name, Meal.id, Meal.name
+    ).having(accepted > 0)
 
-    # Execute the query
     result = await session.execute(statement)
     rows = result.all()
 
-    # Convert query rows to Pydantic models
-    response_data: List[ReportDashboardResponse] = [
-        ReportDashboardResponse(
-            id=dept_id,
-            department=dept_name,
-            dinner_requests=int(dinner_val or 0),  # Convert Decimal to int
-            lunch_requests=int(lunch_val or 0),  # Convert Decimal to int
-        )
-        for dept_id, dept_name, dinner_val, lunch_val in rows
-    ]
+    # Fold the (department, meal) rows into one record per department
+    departments: Dict[int, ReportDashboardResponse] = {}
+    for dept_id, dept_name, meal_id, meal_name, count in rows:
+        record = departments.get(dept_id)
+        if record is None:
+            record = ReportDashboardResponse(
+                id=dept_id,
+                department=dept_name,
+                dinner_requests=0,
+                lunch_requests=0,
+                meal_requests={},
+            )
+            departments[dept_id] = record
+        count = int(count or 0)  # Convert Decimal to int
+        record.meal_requests[meal_name] = count
+        if meal_id == DINNER_MEAL_ID:
+            record.dinner_requests = count
+        elif meal_id == LUNCH_MEAL_ID:
+            record.lunch_requests = count
 
-    return response_data
+    return list(departments.values())
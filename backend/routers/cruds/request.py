@@ -1,7 +1,7 @@
 import logging
 from typing import List, Optional, Dict
 from datetime import datetime
-from sqlmodel import select, func, case, desc
+from sqlmodel import select, func, case, desc, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import (
     Request,
@@ -11,10 +11,14 @@ from db.models import (
     Meal,
 )
 from routers.cruds.attendance_and_shift import (
-    read_shifts_from_hris,
     update_request_lines_with_attendance,
 )
+from hris_db.shift_snapshot import shift_snapshot
+from db.bulk import bulk_update_by_id
 from services.http_schema import RequestPageRecordResponse, RequestsResponse
+from routers.utils.pagination import RequestCursor, encode_cursor
+from db.search import name_search_condition
+from services.count_cache import CountMode, count_signature, resolve_count
 import pytz
 from fastapi import HTTPException, status
 
@@ -35,7 +39,7 @@ async def add_attendance_and_shift_to_request_line(
 
     Parameters:
         session (AsyncSession): The database session to commit updates.
-        hris_session (AsyncSession): The HRIS session used to read attendance and shift data.
+        hris_session (AsyncSession): The HRIS session used to read shift data.
         request_lines (List[RequestLine]): List of request line objects to update.
         attendance_in (bool): If True, update the attendance_in field.
         attendance_out (bool): If True, update the attendance_out field.
@@ -50,29 +54,31 @@ async def add_attendance_and_shift_to_request_line(
 
         await update_request_lines_with_attendance(
             session=session,
-            hris_session=hris_session,
             request_line_ids=[r.id for r in request_lines],
         )
         employee_ids = [line.employee_id for line in request_lines]
 
-        today_shifts = await read_shifts_from_hris(hris_session, employee_ids)
-
-        for line in request_lines:
-            # Get the shift hours for the employee
-            shift_hours = next(
-                (
-                    shift.duration_hours
-                    for shift in today_shifts
-                    if shift.employee_id == line.employee_id
-                ),
-                None,
+        # Today's shifts come from the shared snapshot; HRIS is only queried
+        # when it is not loaded yet or misses an employee.
+        today_shifts = await shift_snapshot.get_hours(
+            hris_session, employee_ids
+        )
+        if today_shifts.stale:
+            logger.warning(
+                "HRIS unavailable, shift hours taken from the last snapshot."
             )
 
-            # Update shift hours if available
-            if shift_hours is not None:
-                line.shift_hours = shift_hours
-
-            # Mark that data has been collected
+        # Write the shift hours of all lines in one UPDATE
+        await bulk_update_by_id(
+            session,
+            RequestLine,
+            {
+                line.id: {"shift_hours": today_shifts[line.employee_id]}
+                for line in request_lines
+                if line.employee_id in today_shifts
+            },
+            request_lines,
+        )
 
         logger.info(
             f"Data Retrieved Successfully for: {len(request_lines)} request lines"
@@ -112,10 +118,21 @@ async def read_requests(
     page_size: int | None = 13,
     download: bool | None = False,
     accept_future: bool | None = False,
+    cursor: RequestCursor | None = None,
+    count_mode: CountMode = "exact",
 ) -> RequestsResponse:
     """
     Retrieves paginated request data with optional filters.
 
+    Pages are ordered by (request_time, id) descending. When a cursor is given
+    the page starts right after the cursor's row (an index seek) instead of
+    skipping `(page - 1) * page_size` rows, so deep pages cost the same as the
+    first one. Every response carries `next_cursor` for the following page.
+
+    The total is counted once per filter set: cursors carry it forward, and
+    `count_mode` picks between an exact count, a short-lived cached count or
+    no count at all (`has_more` only).
+
     :param session: The async database session.
     :param start_time: Start date for filtering (format: 'MM/DD/YYYY, HH:MM:SS AM/PM').
     :param end_time: End date for filtering (format: 'MM/DD/YYYY, HH:MM:SS AM/PM').
@@ -124,11 +141,16 @@ async def read_requests(
     :param page: The current page number (1-based).
     :param page_size: Number of rows per page.
     :param download: If True, disables pagination.
+    :param cursor: Keyset position of the previous page's last row.
+    :param count_mode: "exact", "cached" or "none".
     :return: A dictionary containing paginated data and metadata.
     """
     start_dt = start_time
     end_dt = end_time
 
+    if cursor is not None:
+        page = cursor.page
+
     # Calculate pagination offset
     offset = (page - 1) * page_size
 
@@ -142,20 +164,43 @@ async def read_requests(
         filters.append(Request.request_time.between(start_dt, end_dt))
     if requester_id is not None:
         filters.append(Request.requester_id == requester_id)
-    if requester_name:
-        # Assuming Account is imported and available
-        filters.append(Account.fullname.ilike(f"%{requester_name}%"))
+    name_condition = name_search_condition(
+        Account.search_name, requester_name
+    )
+    if name_condition is not None:
+        filters.append(name_condition)
     if not accept_future:
         filters.append(Request.request_time <= current_time)
     filters.append(Request.is_deleted == False)
 
-    # Count total rows using the common filters
-    count_stmt = select(func.count()).select_from(Request)
-    for condition in filters:
-        count_stmt = count_stmt.where(condition)
-    total_rows_result = await session.execute(count_stmt)
-    total_rows = total_rows_result.scalar() or 0
-    total_pages = (total_rows + page_size - 1) // page_size
+    # Count total rows using the common filters, unless a cursor already
+    # carries the total counted for the first page
+    if cursor is not None and cursor.total is not None:
+        total_rows = cursor.total
+    else:
+        count_stmt = select(func.count()).select_from(Request)
+        if name_condition is not None:
+            count_stmt = count_stmt.join(
+                Account, Request.requester_id == Account.id
+            )
+        for condition in filters:
+            count_stmt = count_stmt.where(condition)
+        signature = count_signature(
+            "requests",
+            start=start_dt,
+            end=end_dt,
+            requester_id=requester_id,
+            requester_name=requester_name,
+            accept_future=accept_future,
+        )
+        total_rows = await resolve_count(
+            session, count_stmt, signature, count_mode
+        )
+    total_pages = (
+        (total_rows + page_size - 1) // page_size
+        if total_rows is not None
+        else None
+    )
 
     # Build the data query with necessary joins and aggregations
     data_stmt = (
@@ -199,7 +244,8 @@ async def read_requests(
         .having(
             func.sum(case((RequestLine.is_deleted == False, 1), else_=0)) > 0
         )
-        .order_by(desc(Request.request_time))
+        # id breaks ties so the keyset ordering is total
+        .order_by(desc(Request.request_time), desc(Request.id))
     )
 
     # Apply the same filters to the data query
@@ -208,12 +254,38 @@ async def read_requests(
 
     # Apply pagination if data is not being downloaded
     if not download:
-        data_stmt = data_stmt.offset(offset).limit(page_size)
+        if cursor is not None:
+            data_stmt = data_stmt.where(
+                or_(
+                    Request.request_time < cursor.request_time,
+                    and_(
+                        Request.request_time == cursor.request_time,
+                        Request.id < cursor.id,
+                    ),
+                )
+            ).limit(page_size + 1)
+        else:
+            data_stmt = data_stmt.offset(offset).limit(page_size + 1)
 
     # Execute the data query
     result = await session.execute(data_stmt)
     rows = result.fetchall()
 
+    # One extra row is fetched to tell whether another page exists
+    has_more = not download and len(rows) > page_size
+    next_cursor = None
+    if has_more:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            RequestCursor(
+                request_time=last.request_time,
+                id=last.id,
+                page=page + 1,
+                total=total_rows,
+            )
+        )
+
     # Transform each row into a response dictionary using Pydantic model validation
     items: List[Dict] = [
         RequestPageRecordResponse.model_validate(row).model_dump()
@@ -226,6 +298,8 @@ async def read_requests(
         page_size=page_size,
         total_pages=total_pages,
         total_rows=total_rows,
+        next_cursor=next_cursor,
+        has_more=has_more,
     )
 
 
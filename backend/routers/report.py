@@ -1,15 +1,50 @@
+import os
 import traceback
 import logging
 from typing import List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, status, Query
-from routers.cruds.attendance_and_shift import (
-    update_request_lines_with_attendance,
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from hris_db.attendance_sync import (
+    read_attendance_freshness,
+    trigger_attendance_backfill,
+)
+from db.attendance_reconciliation import reconcile_request_lines
+from services.http_schema import (
+    AttendanceReconciliationResponse,
+    ExportJobPayload,
+    ExportJobResponse,
+    ParquetExportPayload,
+    ReportDashboardResponse,
+    ReportDetailsResponse,
 )
-from services.http_schema import ReportDashboardResponse, ReportDetailsResponse
 from routers.utils.report_details import read_request_lines_with_attendance
+from routers.utils.export_jobs import (
+    ExportLimitError,
+    cancel_export_job,
+    delete_export_job,
+    export_job_as_dict,
+    export_job_filename,
+    read_export_job,
+    read_user_export_jobs,
+    submit_export_job,
+)
+from routers.utils.report_export import (
+    export_filename,
+    stream_report_csv,
+    write_report_xlsx,
+)
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import ExportJob
 from routers.cruds.report import read_requests_data
-from src.dependencies import SessionDep, HRISSessionDep
+from src.dependencies import (
+    AdminUserDep,
+    CurrentUserDep,
+    ReadSessionDep,
+    SessionDep,
+)
+from services.count_cache import CountMode
 
 # Initialize the API router and logger.
 router = APIRouter()
@@ -17,6 +52,12 @@ logger = logging.getLogger(__name__)
 
 DATE_FORMAT = "%Y-%m-%d"
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/zip",
+}
+
 
 def parse_date_range(
     start_time: Optional[str], end_time: Optional[str]
@@ -53,15 +94,15 @@ def parse_date_range(
     status_code=status.HTTP_200_OK,
 )
 async def get_requests(
-    session: SessionDep,
+    session: ReadSessionDep,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
 ):
     """
-    Retrieve the number of dinner and lunch requests grouped by department.
+    Retrieve the number of accepted requests per meal grouped by department.
 
-    This endpoint aggregates meal request data within an optional date range and groups
-    the results by department. It returns a list of ReportDashboardResponse objects, each
+    This endpoint reads the daily department/meal rollup within an optional date range
+    and groups the results by department. It returns a list of ReportDashboardResponse objects, each
     representing the aggregated request counts for a specific department.
 
     :param session: Asynchronous database session for MariaDB.
@@ -95,8 +136,7 @@ async def get_requests(
     status_code=status.HTTP_200_OK,
 )
 async def get_requests_data(
-    session: SessionDep,
-    hris_session: HRISSessionDep,
+    read_session: ReadSessionDep,
     start_time: str | None = None,
     end_time: str | None = None,
     page: int | None = 1,
@@ -104,6 +144,7 @@ async def get_requests_data(
     query: str | None = None,
     update_attendance: bool | None = False,
     download: bool | None = False,
+    count_mode: CountMode = "exact",
 ) -> ReportDetailsResponse:
     """
     Retrieve paginated request data with optional date filtering and search query.
@@ -112,14 +153,18 @@ async def get_requests_data(
     and supports pagination. Users can filter results by start and end dates, search
     using a query parameter, and indicate if the results should be prepared for download.
 
-    :param session: Asynchronous database session for MariaDB.
-    :param hris_session: Asynchronous session for the HRIS system.
+    Attendance is filled by the scheduled backfill job; update_attendance only
+    asks that job to run now, the request itself never writes. The response
+    says when attendance was last synced from HRIS and whether it is stale.
+
+    :param read_session: Session on the read replica.
     :param start_time: Optional start date filter (format: 'YYYY-MM-DD').
     :param end_time: Optional end date filter (format: 'YYYY-MM-DD').
     :param page: Page number for pagination (must be >= 1).
     :param page_size: Number of records per page (between 1 and 100).
     :param query: Optional search query to filter results based on employee name.
     :param download: Boolean flag indicating if the data should be formatted for download.
+    :param count_mode: "exact" (default), "cached" or "none" to skip the total count.
     :return: Dictionary containing paginated request data along with metadata.
     :raises HTTPException: If an HTTP error or unexpected error occurs.
     """
@@ -128,26 +173,21 @@ async def get_requests_data(
             end_time = start_time
         start_time, end_time = parse_date_range(start_time, end_time)
         if update_attendance:
-            await update_request_lines_with_attendance(
-                session=session,
-                hris_session=hris_session,
-                start_time=start_time,
-                end_time=end_time,
-                employee_name=query,
-                page=page,
-                page_size=page_size,
-                download=download,
-            )
+            trigger_attendance_backfill()
 
         request_lines = await read_request_lines_with_attendance(
-            session=session,
+            session=read_session,
             start_time=start_time,
             end_time=end_time,
             employee_name=query,
             page=page,
             page_size=page_size,
             download=download,
+            count_mode=count_mode,
         )
+        synced_at, stale = await read_attendance_freshness(read_session)
+        request_lines.attendance_synced_at = synced_at
+        request_lines.attendance_stale = stale
 
         # Log the number of records returned from the data retrieval.
         data_count = len(request_lines.request_lines)
@@ -170,3 +210,292 @@ async def get_requests_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error while retrieving request details.",
         )
+
+
+def parse_export_range(
+    start_time: str | None, end_time: str | None
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Parse the export date range the same way as /report/details, turning
+    invalid dates into a 400 response.
+    """
+    if start_time and not end_time:
+        end_time = start_time
+    try:
+        return parse_date_range(start_time, end_time)
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+        )
+
+
+@router.get(
+    "/report/attendance-reconciliation",
+    response_model=AttendanceReconciliationResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_attendance_reconciliation(
+    read_session: ReadSessionDep,
+    user: AdminUserDep,
+    start_time: str,
+    end_time: str | None = None,
+    missing_after: int | None = None,
+) -> AttendanceReconciliationResponse:
+    """
+    Reconcile the accepted request lines of a date range with attendance
+    (admins only).
+
+    Each line is checked against its meal's schedule window, including
+    windows and shifts that cross midnight, and the attended minutes inside
+    the window are summed. Lines with no attendance in their window are
+    listed in `missing_line_ids`, RECONCILIATION_MISSING_IDS_LIMIT at a
+    time; pass `next_missing_after` back as `missing_after` for the next
+    ones.
+
+    :param start_time: Start date (format: 'YYYY-MM-DD').
+    :param end_time: Optional end date, the start date by default.
+    :param missing_after: List the missing line ids after this id.
+    """
+    start_dt, end_dt = parse_export_range(start_time, end_time)
+    result = await reconcile_request_lines(read_session, start_dt, end_dt)
+    return result.summary(missing_after=missing_after)
+
+
+@router.get("/report/details/export.csv", status_code=status.HTTP_200_OK)
+async def export_report_details_csv(
+    user: CurrentUserDep,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    query: str | None = None,
+) -> StreamingResponse:
+    """
+    Stream the report details as a CSV file.
+
+    Rows are read through a server-side cursor and written in batches, so
+    memory use does not grow with the date range. The file starts with a
+    UTF-8 BOM so Excel displays Arabic names correctly.
+
+    :param start_time: Optional start date filter (format: 'YYYY-MM-DD').
+    :param end_time: Optional end date filter (format: 'YYYY-MM-DD').
+    :param query: Optional employee name search.
+    :return: A streaming CSV attachment.
+    """
+    start_dt, end_dt = parse_export_range(start_time, end_time)
+    filename = export_filename("csv", start_dt, end_dt)
+    return StreamingResponse(
+        stream_report_csv(start_dt, end_dt, query),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/report/details/export.xlsx", status_code=status.HTTP_200_OK)
+async def export_report_details_xlsx(
+    user: CurrentUserDep,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    query: str | None = None,
+) -> FileResponse:
+    """
+    Export the report details as an Excel workbook.
+
+    The workbook is built with openpyxl in write-only mode from the same
+    batched cursor as the CSV export and sent from a temporary file that is
+    removed once the response completes.
+
+    :param start_time: Optional start date filter (format: 'YYYY-MM-DD').
+    :param end_time: Optional end date filter (format: 'YYYY-MM-DD').
+    :param query: Optional employee name search.
+    :return: The .xlsx attachment.
+    :raises HTTPException: 501 if openpyxl is not installed.
+    """
+    start_dt, end_dt = parse_export_range(start_time, end_time)
+    try:
+        path = await write_report_xlsx(start_dt, end_dt, query)
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="XLSX export requires the openpyxl package.",
+        )
+    except Exception as err:
+        logger.error("Unexpected error while exporting report: %s", err)
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while exporting report details.",
+        )
+
+    return FileResponse(
+        path,
+        media_type=(
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        ),
+        filename=export_filename("xlsx", start_dt, end_dt),
+        background=BackgroundTask(os.remove, path),
+    )
+
+
+async def get_owned_export_job(
+    session: AsyncSession, job_id: str, user
+) -> ExportJob:
+    """
+    Return the export job if it belongs to the user (or the user is an
+    admin), otherwise raise 404.
+    """
+    job = await read_export_job(session, job_id)
+    if job is None or (
+        job.owner_id != user.id and "Admin" not in (user.roles or [])
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found.",
+        )
+    return job
+
+
+@router.post(
+    "/report/details/exports",
+    response_model=ExportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_export_job(
+    payload: ExportJobPayload, user: CurrentUserDep, session: SessionDep
+) -> ExportJobResponse:
+    """
+    Start a report details export in the background.
+
+    Poll GET /report/details/exports/{job_id} for progress and download the
+    file from /report/details/exports/{job_id}/download once the status is
+    "completed".
+
+    :raises HTTPException: 429 if the user already has the maximum number of
+        running exports.
+    """
+    start_dt, end_dt = parse_export_range(payload.start_time, payload.end_time)
+    try:
+        job = await submit_export_job(
+            session,
+            owner_id=user.id,
+            format=payload.format,
+            start_time=start_dt,
+            end_time=end_dt,
+            query=payload.query,
+        )
+    except ExportLimitError as err:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(err)
+        )
+    return export_job_as_dict(job)
+
+
+@router.post(
+    "/report/request-lines/exports",
+    response_model=ExportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_parquet_export_job(
+    payload: ParquetExportPayload, user: AdminUserDep, session: SessionDep
+) -> ExportJobResponse:
+    """
+    Start a Parquet export of the request lines for analytics (admins only).
+
+    The result is a zip archive of a dataset partitioned by day
+    (`day=YYYY-MM-DD/part-0.parquet`). The job is polled, downloaded and
+    cancelled through the /report/details/exports/{job_id} endpoints.
+
+    :raises HTTPException: 429 if the user already has the maximum number of
+        running exports.
+    """
+    start_dt, end_dt = parse_export_range(payload.start_time, payload.end_time)
+    try:
+        job = await submit_export_job(
+            session,
+            owner_id=user.id,
+            format="parquet",
+            start_time=start_dt,
+            end_time=end_dt,
+            query=None,
+        )
+    except ExportLimitError as err:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(err)
+        )
+    return export_job_as_dict(job)
+
+
+@router.get(
+    "/report/details/exports",
+    response_model=List[ExportJobResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def get_export_jobs(
+    user: CurrentUserDep, session: SessionDep
+) -> List[ExportJobResponse]:
+    """
+    List the current user's export jobs, newest first.
+    """
+    return [
+        export_job_as_dict(job)
+        for job in await read_user_export_jobs(session, user.id)
+    ]
+
+
+@router.get(
+    "/report/details/exports/{job_id}",
+    response_model=ExportJobResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_export_job(
+    job_id: str, user: CurrentUserDep, session: SessionDep
+) -> ExportJobResponse:
+    """
+    Return the status and row progress of an export job.
+    """
+    job = await get_owned_export_job(session, job_id, user)
+    return export_job_as_dict(job)
+
+
+@router.get("/report/details/exports/{job_id}/download")
+async def download_export_job(
+    job_id: str, user: CurrentUserDep, session: SessionDep
+) -> FileResponse:
+    """
+    Download the file of a completed export job.
+
+    :raises HTTPException: 409 if the export has not completed.
+    """
+    job = await get_owned_export_job(session, job_id, user)
+    if (
+        job.status != "completed"
+        or not job.path
+        or not os.path.exists(job.path)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job.status}, no file to download.",
+        )
+    return FileResponse(
+        job.path,
+        media_type=EXPORT_MEDIA_TYPES[job.format],
+        filename=export_job_filename(job),
+    )
+
+
+@router.delete(
+    "/report/details/exports/{job_id}",
+    response_model=ExportJobResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def cancel_export(
+    job_id: str, user: CurrentUserDep, session: SessionDep
+) -> ExportJobResponse:
+    """
+    Cancel a running export, or delete a finished one and its file.
+    """
+    job = await get_owned_export_job(session, job_id, user)
+    if job.finished_at is None:
+        job = await cancel_export_job(session, job)
+    else:
+        await delete_export_job(session, job)
+    logger.info("User %s cancelled export %s.", user.username, job.id)
+    return export_job_as_dict(job)
@@ -1,15 +1,18 @@
 from fastapi import HTTPException, status, APIRouter
 import traceback
 import logging
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 
 from routers.cruds.request import read_requests
 from services.http_schema import DeleteRequestLinesPayload, RequestsResponse
 import pytz
 from services.http_schema import ScheduleRequest
-from src.dependencies import SessionDep, CurrentUserDep
+from src.dependencies import ReadSessionDep, SessionDep, CurrentUserDep
+from db.database import mark_recent_write
 from db.models import Request, RequestLine
 from routers.cruds.request_lines import read_request_lines_by_request_id
+from routers.utils.pagination import decode_cursor
+from services.count_cache import CountMode
 
 # Default timezone
 cairo_tz = pytz.timezone("Africa/Cairo")
@@ -27,22 +30,36 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
 )
 async def get_requests(
-    session: SessionDep,
+    session: ReadSessionDep,
     user: CurrentUserDep,
     page: int | None = 1,
     page_size: int | None = 13,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
 ) -> RequestsResponse:
     """
     Retrieve a paginated list of requests with optional filtering.
+
+    `cursor` takes the `next_cursor` of the previous response and overrides
+    `page`.
     """
 
     try:
+        try:
+            page_cursor = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
+
         requests = await read_requests(
             session=session,
             page=page,
             page_size=page_size,
             requester_id=user.id,
             accept_future=True,
+            cursor=page_cursor,
+            count_mode=count_mode,
         )
         return requests
     except HTTPException as http_exc:
@@ -65,6 +82,7 @@ async def copy_request(
     user: CurrentUserDep,
     session: SessionDep,
     schedule_request: ScheduleRequest,
+    response: Response,
 ):
     """
     Copy an existing request along with its associated request lines and schedule it.
@@ -132,6 +150,7 @@ async def copy_request(
         ]
         session.add_all(new_request_lines)
         await session.commit()
+        mark_recent_write(response)
 
         logger.info(
             f"user: {user.username} - scheduled_time: {scheduled_time} - original request_id: {request_id} - new request_id: {new_request.id}"
@@ -157,6 +176,7 @@ async def delete_request_lines(
     user: CurrentUserDep,
     session: SessionDep,
     payload: DeleteRequestLinesPayload,
+    response: Response,
 ):
     """
     Marks the provided request lines as deleted and unaccepted.
@@ -194,6 +214,7 @@ async def delete_request_lines(
 
         session.add_all(orm_request_lines)
         await session.commit()
+        mark_recent_write(response)
 
         # Refresh each updated ORM object
         for request_line in orm_request_lines:
@@ -267,7 +288,10 @@ async def delete_request_lines(
 
 @router.delete("/history/delete/{id}")
 async def delete_request(
-    current_user: CurrentUserDep, session: SessionDep, id: int
+    current_user: CurrentUserDep,
+    session: SessionDep,
+    id: int,
+    response: Response,
 ):
     """
     Delete a Request by its ID.
@@ -293,6 +317,7 @@ async def delete_request(
         request.is_deleted = True
         session.add(request)
         await session.commit()
+        mark_recent_write(response)
         logger.info(
             f"User {current_user.username} successfully deleted Request wsith id {id}."
         )
@@ -9,7 +9,14 @@ import pytz
 import traceback
 import logging
 
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Query
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    status,
+    BackgroundTasks,
+    Query,
+    Response,
+)
 
 from db.crud import read_account
 from routers.cruds import request as crud
@@ -24,12 +31,17 @@ from services.http_schema import (
     UpdateRequestLinesPayload,
     UpdateRequestStatusPayload,
 )
-from src.dependencies import HRISSessionDep, SessionDep, CurrentUserDep
+from src.dependencies import ReadSessionDep, SessionDep, CurrentUserDep
 from routers.utils.request import (
-    create_request_lines_and_confirm,
-    send_confirmation_notification,
+    create_request_lines_and_confirm_task,
+    send_confirmation_notification_task,
 )
+from db.database import async_session_factory, mark_recent_write
+from hris_db.database import hris_read_session_factory
 from db.models import Account, Request
+from routers.utils.pagination import decode_cursor
+from services.count_cache import CountMode
+from services.metrics import add_tracked_task
 from icecream import ic
 
 # Default timezone for Cairo
@@ -118,7 +130,6 @@ def group_requests_by_meal(
 
 async def create_and_schedule_meal_group(
     session: AsyncSession,
-    hris_session: AsyncSession,
     meal_id: int,
     req_list: List[Dict],
     user: CurrentUserDep,
@@ -149,10 +160,9 @@ async def create_and_schedule_meal_group(
     session.add(new_request)
     await session.commit()
     await session.refresh(new_request)
-    background_tasks.add_task(
-        create_request_lines_and_confirm,
-        session=session,
-        hris_session=hris_session,
+    add_tracked_task(
+        background_tasks,
+        create_request_lines_and_confirm_task,
         request=new_request,
         request_lines=req_list,
         request_status_id=request_status_id,
@@ -160,13 +170,28 @@ async def create_and_schedule_meal_group(
     )
 
 
+async def prepare_scheduled_requests_task() -> None:
+    """
+    Promote due scheduled requests using sessions owned by the background task.
+
+    An AsyncSession only checks out a connection on its first query, so the
+    HRIS session only connects when a scheduled request is actually due and
+    needs attendance and shift data.
+    """
+    async with (
+        async_session_factory() as session,
+        hris_read_session_factory() as hris_session,
+    ):
+        await crud.prepare_scheduled_requests(session, hris_session)
+
+
 @router.post("/request/submit-request")
 async def create_request_endpoint(
     payload: RequestPayload,
     session: SessionDep,
     background_tasks: BackgroundTasks,
-    hris_session: HRISSessionDep,
     user: CurrentUserDep,
+    response: Response,
 ):
     """
     Create requests grouped by meal_id and process them in separate background tasks.
@@ -198,7 +223,6 @@ async def create_request_endpoint(
         for meal_id, req_list in meal_groups.items():
             await create_and_schedule_meal_group(
                 session=session,
-                hris_session=hris_session,
                 meal_id=meal_id,
                 req_list=req_list,
                 user=user,
@@ -207,6 +231,9 @@ async def create_request_endpoint(
                 request_status_id=request_status_id,
                 background_tasks=background_tasks,
             )
+        # The lines are written by the background tasks right after the
+        # response, well within the read-your-writes window
+        mark_recent_write(response)
 
         return {
             "message": f"{total_requests} Request(s) created successfully",
@@ -230,8 +257,7 @@ async def create_request_endpoint(
     status_code=status.HTTP_200_OK,
 )
 async def get_requests(
-    session: SessionDep,
-    hris_session: HRISSessionDep,
+    session: ReadSessionDep,
     background_tasks: BackgroundTasks,
     query: Optional[str] = Query(None, description="Search parameters"),
     start_time: Optional[str] = Query(
@@ -242,17 +268,30 @@ async def get_requests(
     page_size: int = Query(
         10, ge=1, le=100, description="Number of rows per page"
     ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page (overrides page)"
+    ),
+    count_mode: CountMode = Query(
+        "exact", description="Total count strategy: exact, cached or none"
+    ),
 ) -> RequestsResponse:
     """
     Retrieve a paginated list of requests with optional filtering.
+
+    Pass the `next_cursor` of a response as `cursor` to fetch the following
+    page by index seek; `page` is kept for backward compatibility.
     """
 
     try:
-        background_tasks.add_task(
-            crud.prepare_scheduled_requests, session, hris_session
-        )
+        add_tracked_task(background_tasks, prepare_scheduled_requests_task)
 
         start_time, end_time = parse_date_range(start_time, end_time)
+        try:
+            page_cursor = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
 
         requests = await crud.read_requests(
             session=session,
@@ -261,6 +300,8 @@ async def get_requests(
             requester_name=query,
             page=page,
             page_size=page_size,
+            cursor=page_cursor,
+            count_mode=count_mode,
         )
         return requests
     except HTTPException as http_exc:
@@ -295,9 +336,9 @@ async def update_order_status_endpoint(
         """
         Email Sender
         """
-        background_tasks.add_task(
-            send_confirmation_notification,
-            session=session,
+        add_tracked_task(
+            background_tasks,
+            send_confirmation_notification_task,
             request=request,
             requester_name=requester.fullname,
         )
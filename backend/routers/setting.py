@@ -22,7 +22,7 @@ from services.http_schema import (
     UpdateRolesRequest,
 )
 from services.schema import UserWithRoles
-from src.dependencies import SessionDep, CurrentUserDep
+from src.dependencies import ReadSessionDep, SessionDep, CurrentUserDep
 from icecream import ic
 
 router = APIRouter()
@@ -65,7 +65,7 @@ async def get_domain_users(
     response_model=SettingUserResponse,  # you can keep the response_model here
     status_code=status.HTTP_200_OK,
 )
-async def get_users(session: SessionDep):
+async def get_users(session: ReadSessionDep):
     try:
         domain_users = await read_domain_users(session)
         roles = await read_roles(session)
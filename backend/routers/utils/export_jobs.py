@@ -0,0 +1,505 @@
+"""
+Background report exports.
+
+An export job writes the report details to a file under EXPORT_DIR from an
+asyncio task, so the HTTP request that created it returns immediately. The
+client polls the job for row progress and downloads the file once it is
+complete. Finished files are removed EXPORT_TTL_MINUTES after completion by
+`cleanup_expired_exports`, which runs on the application scheduler.
+
+Besides the report details (CSV / XLSX), admins can export the raw request
+lines as a date-partitioned Parquet dataset, delivered as a zip archive.
+
+Jobs are rows of `export_job`, so any worker can report, serve or cancel a
+job whatever worker runs it; EXPORT_DIR must be a directory shared by all
+workers (e.g. a mounted volume). The worker that created a job claims and
+runs it, and writes its progress and a heartbeat every
+EXPORT_HEARTBEAT_SECONDS. A cancellation from another worker sets
+`cancel_requested`, which the running worker sees at its next heartbeat.
+Jobs whose heartbeat is older than EXPORT_LEASE_SECONDS (their worker
+stopped), and jobs still queued that long after creation (their worker
+stopped before claiming them), are marked failed by the cleanup.
+"""
+
+import os
+import uuid
+import shutil
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import WORKER_ID, async_session_factory, read_session_factory
+from db.models import ExportJob
+from routers.utils.parquet_export import (
+    build_request_lines_count_query,
+    write_request_lines_parquet,
+)
+from routers.utils.report_details import build_report_details_count_query
+from routers.utils.report_export import (
+    export_filename,
+    stream_report_csv,
+    write_report_xlsx,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_MAX_JOBS_PER_USER = int(os.getenv("EXPORT_MAX_JOBS_PER_USER", "2"))
+EXPORT_TTL_MINUTES = int(os.getenv("EXPORT_TTL_MINUTES", "60"))
+EXPORT_HEARTBEAT_SECONDS = float(os.getenv("EXPORT_HEARTBEAT_SECONDS", "5"))
+EXPORT_LEASE_SECONDS = int(os.getenv("EXPORT_LEASE_SECONDS", "60"))
+
+ExportFormat = Literal["csv", "xlsx", "parquet"]
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# File extension of the finished export per format
+FILE_EXTENSIONS = {"csv": "csv", "xlsx": "xlsx", "parquet": "parquet.zip"}
+
+# Optional dependency needed per format
+MISSING_DEPENDENCY_ERRORS = {
+    "xlsx": "XLSX export requires the openpyxl package.",
+    "parquet": "Parquet export requires the pyarrow package.",
+}
+
+
+class ExportLimitError(Exception):
+    """Raised when a user already has the maximum number of active exports."""
+
+
+# Tasks of the jobs this worker runs
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+def export_job_filename(job: ExportJob) -> str:
+    if job.format == "parquet":
+        return export_filename(
+            FILE_EXTENSIONS[job.format],
+            job.start_time,
+            job.end_time,
+            prefix="request-lines",
+        )
+    return export_filename(job.format, job.start_time, job.end_time)
+
+
+def export_job_expires_at(job: ExportJob) -> Optional[datetime]:
+    if job.finished_at is None:
+        return None
+    return job.finished_at + timedelta(minutes=EXPORT_TTL_MINUTES)
+
+
+def export_job_as_dict(job: ExportJob) -> Dict:
+    progress = None
+    if job.total_rows:
+        progress = round(min(job.rows_written / job.total_rows, 1.0) * 100, 1)
+    elif job.status == "completed":
+        progress = 100.0
+    return {
+        "id": job.id,
+        "format": job.format,
+        "status": job.status,
+        "rows_written": job.rows_written,
+        "total_rows": job.total_rows,
+        "progress": progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "expires_at": export_job_expires_at(job),
+        "filename": export_job_filename(job),
+    }
+
+
+async def read_export_job(
+    session: AsyncSession, job_id: str
+) -> Optional[ExportJob]:
+    return await session.get(ExportJob, job_id, populate_existing=True)
+
+
+async def read_user_export_jobs(
+    session: AsyncSession, owner_id: int
+) -> List[ExportJob]:
+    result = await session.execute(
+        select(ExportJob)
+        .where(ExportJob.owner_id == owner_id)
+        .order_by(ExportJob.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+def _remove_file(path: Optional[str]) -> None:
+    try:
+        if path:
+            os.remove(path)
+    except FileNotFoundError:
+        # Already removed, e.g. by the cleanup of another worker
+        pass
+
+
+async def _update_running(job: ExportJob, **values) -> bool:
+    """
+    Write the state of a job this worker runs. Returns False if the job is
+    no longer running here (its lease was taken over by the cleanup).
+    """
+    async with async_session_factory() as session:
+        result = await session.execute(
+            update(ExportJob)
+            .where(
+                ExportJob.id == job.id,
+                ExportJob.status == "running",
+                ExportJob.worker == WORKER_ID,
+            )
+            .values(
+                rows_written=job.rows_written,
+                total_rows=job.total_rows,
+                **values,
+            )
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+
+async def _finish(
+    job: ExportJob,
+    status: str,
+    error: Optional[str] = None,
+    path: Optional[str] = None,
+) -> None:
+    await _update_running(
+        job,
+        status=status,
+        error=error,
+        path=path,
+        finished_at=datetime.now(),
+    )
+
+
+async def _claim(job_id: str) -> Optional[ExportJob]:
+    """
+    Atomically move a queued job to running on this worker. Returns the job,
+    detached from any session, or None if it was cancelled or claimed first.
+    """
+    async with async_session_factory() as session:
+        result = await session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id, ExportJob.status == "queued")
+            .values(
+                status="running",
+                worker=WORKER_ID,
+                heartbeat_at=datetime.now(),
+            )
+        )
+        await session.commit()
+        if result.rowcount != 1:
+            return None
+        job = await session.get(ExportJob, job_id)
+        session.expunge(job)
+        return job
+
+
+async def _heartbeat(job: ExportJob, writer: asyncio.Task) -> None:
+    """
+    Report progress while the writer runs, and stop it when the job is
+    cancelled from any worker or its lease is lost.
+    """
+    while True:
+        await asyncio.wait({writer}, timeout=EXPORT_HEARTBEAT_SECONDS)
+        if writer.done():
+            return
+        alive = await _update_running(job, heartbeat_at=datetime.now())
+        async with async_session_factory() as session:
+            cancel_requested = await session.scalar(
+                select(ExportJob.cancel_requested).where(
+                    ExportJob.id == job.id
+                )
+            )
+        if not alive or cancel_requested:
+            writer.cancel()
+            return
+
+
+async def _count_rows(job: ExportJob) -> int:
+    if job.format == "parquet":
+        query = build_request_lines_count_query(job.start_time, job.end_time)
+    else:
+        query = build_report_details_count_query(
+            job.start_time, job.end_time, job.query
+        )
+    async with read_session_factory() as session:
+        result = await session.execute(query)
+        return result.scalar() or 0
+
+
+async def _write_csv(job: ExportJob, path: str) -> None:
+    def progress(rows: int) -> None:
+        job.rows_written = rows
+
+    with open(path, "wb") as handle:
+        async for chunk in stream_report_csv(
+            job.start_time, job.end_time, job.query, progress=progress
+        ):
+            await asyncio.to_thread(handle.write, chunk)
+
+
+async def _write_xlsx(job: ExportJob, path: str) -> None:
+    def progress(rows: int) -> None:
+        job.rows_written = rows
+
+    await write_report_xlsx(
+        job.start_time, job.end_time, job.query, path=path, progress=progress
+    )
+
+
+async def _write_parquet(job: ExportJob, path: str) -> None:
+    def progress(rows: int) -> None:
+        job.rows_written = rows
+
+    # The partitioned dataset is staged next to the archive, then dropped
+    directory = _staging_path(path)
+    try:
+        await write_request_lines_parquet(
+            job.start_time, job.end_time, directory, path, progress=progress
+        )
+    finally:
+        await asyncio.to_thread(shutil.rmtree, directory, True)
+
+
+_WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+
+def _final_path(job: ExportJob) -> str:
+    return os.path.join(EXPORT_DIR, f"{job.id}.{FILE_EXTENSIONS[job.format]}")
+
+
+def _partial_path(job: ExportJob) -> str:
+    return _final_path(job) + ".part"
+
+
+def _staging_path(path: str) -> str:
+    return path + ".d"
+
+
+async def _produce(job: ExportJob, path: str) -> None:
+    job.total_rows = await _count_rows(job)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    await _WRITERS[job.format](job, path)
+
+
+async def _run_job(job_id: str) -> None:
+    try:
+        job = await _claim(job_id)
+        if job is None:
+            return
+        final_path = _final_path(job)
+        partial_path = _partial_path(job)
+        try:
+            writer = asyncio.create_task(_produce(job, partial_path))
+            try:
+                await _heartbeat(job, writer)
+                await writer
+            finally:
+                if not writer.done():
+                    writer.cancel()
+                    await asyncio.gather(writer, return_exceptions=True)
+
+            os.replace(partial_path, final_path)
+            await _finish(job, "completed", path=final_path)
+            logger.info(
+                f"Export {job.id} completed with {job.rows_written} rows."
+            )
+        except asyncio.CancelledError:
+            _remove_file(partial_path)
+            await _finish(job, "cancelled")
+            logger.info(f"Export {job.id} cancelled.")
+        except ImportError:
+            _remove_file(partial_path)
+            await _finish(
+                job, "failed", MISSING_DEPENDENCY_ERRORS.get(job.format)
+            )
+        except Exception as e:
+            _remove_file(partial_path)
+            await _finish(job, "failed", "Export failed.")
+            logger.error(f"Export {job.id} failed: {e}", exc_info=True)
+    finally:
+        _tasks.pop(job_id, None)
+
+
+async def submit_export_job(
+    session: AsyncSession,
+    owner_id: int,
+    format: ExportFormat,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    query: Optional[str],
+) -> ExportJob:
+    """
+    Create an export job and start it in the background on this worker.
+
+    Raises:
+        ExportLimitError: If the user already has EXPORT_MAX_JOBS_PER_USER
+            queued or running exports.
+    """
+    active = await session.scalar(
+        select(func.count())
+        .select_from(ExportJob)
+        .where(
+            ExportJob.owner_id == owner_id,
+            ExportJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    if active >= EXPORT_MAX_JOBS_PER_USER:
+        raise ExportLimitError(
+            f"At most {EXPORT_MAX_JOBS_PER_USER} exports can run at once."
+        )
+
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        owner_id=owner_id,
+        format=format,
+        start_time=start_time,
+        end_time=end_time,
+        query=query,
+    )
+    session.add(job)
+    await session.commit()
+    _tasks[job.id] = asyncio.create_task(_run_job(job.id))
+    logger.info(f"User {owner_id} started {format} export {job.id}.")
+    return job
+
+
+async def cancel_export_job(
+    session: AsyncSession, job: ExportJob
+) -> ExportJob:
+    """
+    Cancel a queued or running job.
+
+    A job running on this worker is stopped before returning. One running on
+    another worker is flagged and stops at its next heartbeat, so it may
+    still be reported as running for EXPORT_HEARTBEAT_SECONDS.
+    """
+    # Another worker may have claimed or finished it since it was read
+    await session.refresh(job)
+    if job.status not in ACTIVE_STATUSES:
+        return job
+    job.cancel_requested = True
+    if job.status == "queued":
+        # Not claimed yet: the claim will fail
+        job.status = "cancelled"
+        job.finished_at = datetime.now()
+    session.add(job)
+    await session.commit()
+
+    task = _tasks.get(job.id)
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await session.refresh(job)
+    return job
+
+
+async def delete_export_job(session: AsyncSession, job: ExportJob) -> None:
+    """Forget a finished job and remove its file."""
+    _remove_file(job.path)
+    await session.delete(job)
+    await session.commit()
+
+
+async def cleanup_expired_exports() -> int:
+    """
+    Remove finished jobs older than EXPORT_TTL_MINUTES and their files, fail
+    the jobs whose worker stopped (running without heartbeats, or never
+    claimed), and remove stray files and staging directories left in
+    EXPORT_DIR.
+
+    Returns:
+        int: The number of files removed.
+    """
+    now = datetime.now()
+    lease_expired = now - timedelta(seconds=EXPORT_LEASE_SECONDS)
+    removed = 0
+    async with async_session_factory() as session:
+        interrupted = await session.execute(
+            update(ExportJob)
+            .where(
+                or_(
+                    and_(
+                        ExportJob.status == "running",
+                        ExportJob.heartbeat_at < lease_expired,
+                    ),
+                    # A job is claimed right after it is created
+                    and_(
+                        ExportJob.status == "queued",
+                        ExportJob.created_at < lease_expired,
+                    ),
+                )
+            )
+            .values(
+                status="failed",
+                error="Export interrupted.",
+                finished_at=now,
+            )
+        )
+        if interrupted.rowcount:
+            logger.warning(
+                f"Marked {interrupted.rowcount} interrupted export(s) failed."
+            )
+
+        expired = await session.execute(
+            select(ExportJob).where(
+                ExportJob.finished_at
+                <= now - timedelta(minutes=EXPORT_TTL_MINUTES)
+            )
+        )
+        for job in expired.scalars().all():
+            if job.path and os.path.exists(job.path):
+                removed += 1
+            _remove_file(job.path)
+            await session.delete(job)
+        await session.commit()
+
+        if os.path.isdir(EXPORT_DIR):
+            result = await session.execute(
+                select(ExportJob).where(
+                    (ExportJob.path != None)
+                    | ExportJob.status.in_(ACTIVE_STATUSES)
+                )
+            )
+            known = set()
+            for job in result.scalars().all():
+                partial_path = _partial_path(job)
+                known.update(
+                    (job.path, partial_path, _staging_path(partial_path))
+                )
+            cutoff = (now - timedelta(minutes=EXPORT_TTL_MINUTES)).timestamp()
+            for name in os.listdir(EXPORT_DIR):
+                path = os.path.join(EXPORT_DIR, name)
+                if path in known:
+                    continue
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    # Removed meanwhile, e.g. by the cleanup of another worker
+                    continue
+                if os.path.isfile(path):
+                    _remove_file(path)
+                    removed += 1
+                elif os.path.isdir(path):
+                    # A Parquet staging directory left by a crashed worker
+                    await asyncio.to_thread(shutil.rmtree, path, True)
+                    removed += 1
+
+    if removed:
+        logger.info(f"Removed {removed} expired export file(s).")
+    return removed
+
+
+async def cancel_all_export_jobs() -> None:
+    """Cancel the jobs running on this worker, used on application shutdown."""
+    tasks = [task for task in _tasks.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,73 @@
+import json
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RequestCursor:
+    """
+    Position of the last row of a page in the (request_time DESC, id DESC)
+    ordering used by the request listings.
+
+    Attributes:
+        request_time (datetime): request_time of the last row returned.
+        id (int): id of the last row returned, used as the tie-breaker.
+        page (int): The page number the cursor points to.
+        total (Optional[int]): Total rows counted on the first page, reused so
+            later pages of the same filters skip the count.
+    """
+
+    request_time: datetime
+    id: int
+    page: int
+    total: Optional[int] = None
+
+
+def encode_cursor(cursor: RequestCursor) -> str:
+    """
+    Encodes a cursor as an opaque URL-safe string.
+
+    Args:
+        cursor (RequestCursor): The cursor to encode.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    payload = {
+        "t": cursor.request_time.isoformat(),
+        "id": cursor.id,
+        "p": cursor.page,
+    }
+    if cursor.total is not None:
+        payload["n"] = cursor.total
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> RequestCursor:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Args:
+        value (str): The opaque cursor string.
+
+    Returns:
+        RequestCursor: The decoded cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return RequestCursor(
+            request_time=datetime.fromisoformat(payload["t"]),
+            id=int(payload["id"]),
+            page=int(payload.get("p", 1)),
+            total=int(payload["n"]) if "n" in payload else None,
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor.") from e
@@ -0,0 +1,224 @@
+"""
+Columnar export of request lines for analytics.
+
+Request lines joined with their employee, department, meal, request and
+requester are written to Parquet, one file per day of request_time in a
+hive-style layout (`day=YYYY-MM-DD/part-0.parquet`) so pyarrow / pandas can
+read a date range without opening the other days. Timestamps are typed as
+Africa/Cairo timestamps and codes as integers.
+
+Rows are fetched in batches through a server-side cursor; building the Arrow
+batches and writing the files runs in a worker thread so the event loop only
+waits on the database. pyarrow is an optional dependency imported on use.
+"""
+
+import os
+import asyncio
+import logging
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pytz
+from sqlalchemy import func, select
+
+from db.database import read_session_factory
+from db.models import (
+    Account,
+    Department,
+    Employee,
+    Meal,
+    Request,
+    RequestLine,
+)
+
+logger = logging.getLogger(__name__)
+
+PARQUET_BATCH_SIZE = int(os.getenv("PARQUET_BATCH_SIZE", "50000"))
+
+cairo_tz = pytz.timezone("Africa/Cairo")
+
+# column name -> (arrow type name, select expression)
+COLUMNS = {
+    "request_line_id": ("int64", RequestLine.id),
+    "request_id": ("int64", Request.id),
+    "request_time": ("timestamp", Request.request_time),
+    "request_status_id": ("int32", Request.status_id),
+    "requester_id": ("int64", Account.id),
+    "requester": ("string", Account.username),
+    "requester_title": ("string", Account.title),
+    "employee_id": ("int64", Employee.id),
+    "employee_code": ("int64", Employee.code),
+    "employee_name": ("string", Employee.name),
+    "employee_title": ("string", Employee.title),
+    "department_id": ("int64", Department.id),
+    "department": ("string", Department.name),
+    "meal_id": ("int32", Meal.id),
+    "meal": ("string", Meal.name),
+    "is_accepted": ("bool", RequestLine.is_accepted),
+    "is_deleted": ("bool", RequestLine.is_deleted),
+    "attendance_in": ("timestamp", RequestLine.attendance_in),
+    "attendance_out": ("timestamp", RequestLine.attendance_out),
+    "shift_hours": ("int32", RequestLine.shift_hours),
+    "notes": ("string", RequestLine.notes),
+}
+TIMESTAMP_COLUMNS = [
+    name for name, (kind, _) in COLUMNS.items() if kind == "timestamp"
+]
+
+
+def arrow_schema():
+    """
+    The Arrow schema of the export.
+
+    :raises ImportError: If pyarrow is not installed.
+    """
+    import pyarrow as pa
+
+    types = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("s", tz="Africa/Cairo"),
+    }
+    return pa.schema(
+        [(name, types[kind]) for name, (kind, _) in COLUMNS.items()]
+    )
+
+
+def build_request_lines_query(
+    start_time: Optional[datetime], end_time: Optional[datetime]
+):
+    """
+    Builds the request lines query, ordered by request_time so each day's
+    rows arrive together.
+    """
+    query = (
+        select(*[expr.label(name) for name, (_, expr) in COLUMNS.items()])
+        .join(Request, Request.id == RequestLine.request_id)
+        .join(Employee, Employee.id == RequestLine.employee_id)
+        .join(Department, Department.id == RequestLine.department_id)
+        .join(Meal, Meal.id == RequestLine.meal_id)
+        .join(Account, Account.id == Request.requester_id)
+        .order_by(Request.request_time, RequestLine.id)
+    )
+    if start_time and end_time:
+        query = query.where(Request.request_time.between(start_time, end_time))
+    return query
+
+
+def build_request_lines_count_query(
+    start_time: Optional[datetime], end_time: Optional[datetime]
+):
+    query = select(func.count()).select_from(RequestLine)
+    query = query.join(Request, Request.id == RequestLine.request_id)
+    if start_time and end_time:
+        query = query.where(Request.request_time.between(start_time, end_time))
+    return query
+
+
+def _localize(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored datetimes are naive Cairo local time
+    if value is None or value.tzinfo is not None:
+        return value
+    return cairo_tz.localize(value)
+
+
+class _PartitionedWriter:
+    """
+    Writes record batches to one Parquet file per day. Rows arrive ordered
+    by request_time, so only the current day's file is open at a time.
+    """
+
+    def __init__(self, directory: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.directory = directory
+        self.schema = arrow_schema()
+        self._day: Optional[str] = None
+        self._writer = None
+
+    def _open(self, day: str) -> None:
+        self.close()
+        day_dir = os.path.join(self.directory, f"day={day}")
+        os.makedirs(day_dir, exist_ok=True)
+        self._writer = self._pq.ParquetWriter(
+            os.path.join(day_dir, "part-0.parquet"),
+            self.schema,
+            compression="zstd",
+        )
+        self._day = day
+
+    def write_rows(self, rows: List) -> None:
+        """Convert a batch of rows to Arrow and append it per day."""
+        by_day: Dict[str, List] = {}
+        for row in rows:
+            by_day.setdefault(f"{row.request_time:%Y-%m-%d}", []).append(row)
+
+        for day, day_rows in by_day.items():
+            columns = {
+                name: [getattr(row, name) for row in day_rows]
+                for name in COLUMNS
+            }
+            for name in TIMESTAMP_COLUMNS:
+                columns[name] = [_localize(value) for value in columns[name]]
+            batch = self._pa.RecordBatch.from_pydict(
+                columns, schema=self.schema
+            )
+            if day != self._day:
+                self._open(day)
+            self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _zip_directory(directory: str, path: str) -> None:
+    # Parquet pages are already compressed, so the archive only stores them
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                archive.write(full_path, os.path.relpath(full_path, directory))
+
+
+async def write_request_lines_parquet(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    directory: str,
+    path: str,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Export request lines to a date-partitioned Parquet dataset under
+    `directory` and package it as a zip archive at `path`.
+
+    :param progress: Called with the number of rows written after each batch.
+    :return: The number of rows written.
+    :raises ImportError: If pyarrow is not installed.
+    """
+    writer = _PartitionedWriter(directory)
+    query = build_request_lines_query(start_time, end_time)
+    rows_written = 0
+    try:
+        async with read_session_factory() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=PARQUET_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                await asyncio.to_thread(writer.write_rows, partition)
+                rows_written += len(partition)
+                if progress is not None:
+                    progress(rows_written)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    await asyncio.to_thread(_zip_directory, directory, path)
+    logger.info(f"Exported {rows_written} request lines to Parquet.")
+    return rows_written
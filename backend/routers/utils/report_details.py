@@ -6,8 +6,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import models from both databases
 from db.models import RequestLine, Employee, Department, Request, Account, Meal
+from db.search import name_search_condition
 from services.schema import ReportDetailsRecord
 from services.http_schema import ReportDetailsResponse
+from services.count_cache import CountMode, count_signature, resolve_count
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,8 +35,9 @@ def apply_common_filters(
 
     if start_dt and end_dt:
         query = query.where(Request.request_time.between(start_dt, end_dt))
-    if employee_name:
-        query = query.where(Employee.name.ilike(f"%{employee_name}%"))
+    name_condition = name_search_condition(Employee.search_name, employee_name)
+    if name_condition is not None:
+        query = query.where(name_condition)
     return query
 
 
@@ -54,6 +57,52 @@ def build_joined_query(query):
     )
 
 
+def build_report_details_query(
+    start_dt: Optional[datetime],
+    end_dt: Optional[datetime],
+    employee_name: Optional[str],
+):
+    """
+    Builds the filtered report details row query shared by the paginated
+    listing and the file exports.
+
+    :param start_dt: Parsed start datetime.
+    :param end_dt: Parsed end datetime.
+    :param employee_name: Employee name search.
+    :return: The data query, without pagination.
+    """
+    query = select(
+        RequestLine.id,
+        Employee.code.label("employee_code"),
+        Employee.name.label("employee_name"),
+        Employee.title.label("employee_title"),
+        Department.name.label("department"),
+        Account.username.label("requester_name"),
+        Account.title.label("requester_title"),
+        Request.request_time,
+        Meal.name.label("meal"),
+        RequestLine.attendance_in,
+        RequestLine.attendance_out,
+        RequestLine.shift_hours,
+        RequestLine.notes,
+    )
+    query = build_joined_query(query)
+    return apply_common_filters(query, start_dt, end_dt, employee_name)
+
+
+def build_report_details_count_query(
+    start_dt: Optional[datetime],
+    end_dt: Optional[datetime],
+    employee_name: Optional[str],
+):
+    """
+    Builds the COUNT(*) query matching build_report_details_query.
+    """
+    query = select(func.count()).select_from(RequestLine)
+    query = build_joined_query(query)
+    return apply_common_filters(query, start_dt, end_dt, employee_name)
+
+
 async def read_request_lines(
     session: AsyncSession,
     start_time: Optional[str] = None,
@@ -63,8 +112,9 @@ async def read_request_lines(
     stmt = select(RequestLine).where(RequestLine.is_accepted == True)
     if start_time and end_time:
         stmt = stmt.where(Request.request_time.between(start_time, end_time))
-    if employee_name:
-        stmt = stmt.where(Employee.name.ilike(f"%{employee_name}%"))
+    name_condition = name_search_condition(Employee.search_name, employee_name)
+    if name_condition is not None:
+        stmt = stmt.where(name_condition)
     rows = await session.execute(stmt)
 
     result = rows.scalars().all()
@@ -79,6 +129,7 @@ async def read_request_lines_with_attendance(
     page: int | None = 1,
     page_size: int | None = 13,
     download: bool | None = False,
+    count_mode: CountMode = "exact",
 ) -> ReportDetailsResponse:
     """
     Retrieves paginated request data with optional filters.
@@ -90,6 +141,7 @@ async def read_request_lines_with_attendance(
     :param page: The current page number (1-based).
     :param page_size: Number of rows per page.
     :param download: If True, pagination is not applied.
+    :param count_mode: "exact", "cached" or "none" (see services.count_cache).
     :return: A dictionary containing paginated data and metadata.
     """
     # Parse dates (if provided)
@@ -98,43 +150,40 @@ async def read_request_lines_with_attendance(
     offset = (page - 1) * page_size
 
     # Build count query
-    count_query = select(func.count()).select_from(RequestLine)
-    count_query = build_joined_query(count_query)
-    count_query = apply_common_filters(
-        count_query, start_time, end_time, employee_name
+    count_query = build_report_details_count_query(
+        start_time, end_time, employee_name
     )
 
-    total_rows_result = await session.execute(count_query)
-    total_rows = total_rows_result.scalar() or 0
-    total_pages = (total_rows + page_size - 1) // page_size
-
-    # Build data query
-    data_query = select(
-        RequestLine.id,
-        Employee.code.label("employee_code"),
-        Employee.name.label("employee_name"),
-        Employee.title.label("employee_title"),
-        Department.name.label("department"),
-        Account.username.label("requester_name"),
-        Account.title.label("requester_title"),
-        Request.request_time,
-        Meal.name.label("meal"),
-        RequestLine.attendance_in,
-        RequestLine.attendance_out,
-        RequestLine.shift_hours,
-        RequestLine.notes,
+    total_rows = await resolve_count(
+        session,
+        count_query,
+        count_signature(
+            "report_details",
+            start=start_time,
+            end=end_time,
+            employee_name=employee_name,
+        ),
+        count_mode,
     )
-    data_query = build_joined_query(data_query)
-    data_query = apply_common_filters(
-        data_query, start_time, end_time, employee_name
+    total_pages = (
+        (total_rows + page_size - 1) // page_size
+        if total_rows is not None
+        else None
     )
 
-    # Apply pagination if not in download mode
+    # Build data query
+    data_query = build_report_details_query(start_time, end_time, employee_name)
+
+    # Apply pagination if not in download mode; one extra row tells whether
+    # another page exists
     if not download:
-        data_query = data_query.offset(offset).limit(page_size)
+        data_query = data_query.offset(offset).limit(page_size + 1)
 
     result = await session.execute(data_query)
     rows = result.fetchall()
+    has_more = not download and len(rows) > page_size
+    if has_more:
+        rows = rows[:page_size]
 
     # Transform rows into the expected response format
     request_lines = [ReportDetailsRecord.model_validate(row) for row in rows]
@@ -145,4 +194,5 @@ async def read_request_lines_with_attendance(
         page_size=page_size,
         total_pages=total_pages,
         total_rows=total_rows,
+        has_more=has_more,
     )
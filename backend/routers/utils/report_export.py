@@ -0,0 +1,173 @@
+import io
+import os
+import csv
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from db.database import read_session_factory
+from db.models import Request, RequestLine
+from routers.utils.report_details import build_report_details_query
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+UTF8_BOM = "\ufeff"
+
+# (header, row attribute) in file column order
+EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ("ID", "id"),
+    ("Employee Code", "employee_code"),
+    ("Employee Name", "employee_name"),
+    ("Employee Title", "employee_title"),
+    ("Department", "department"),
+    ("Requester", "requester_name"),
+    ("Requester Title", "requester_title"),
+    ("Request Time", "request_time"),
+    ("Meal", "meal"),
+    ("Attendance In", "attendance_in"),
+    ("Attendance Out", "attendance_out"),
+    ("Shift Hours", "shift_hours"),
+    ("Notes", "notes"),
+]
+
+
+def _format_value(value):
+    # Same datetime format as the JSON report (ReportDetailsRecord)
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return value
+
+
+async def iter_report_rows(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    employee_name: Optional[str],
+) -> AsyncIterator[List[tuple]]:
+    """
+    Yields batches of report details rows read through a server-side cursor.
+
+    The session is owned by the iterator: a StreamingResponse body runs after
+    the request dependencies have been closed.
+
+    :param start_time: Parsed start datetime.
+    :param end_time: Parsed end datetime.
+    :param employee_name: Employee name search.
+    :return: Batches of at most EXPORT_BATCH_SIZE rows, in EXPORT_COLUMNS order.
+    """
+    query = build_report_details_query(
+        start_time, end_time, employee_name
+    ).order_by(Request.request_time, RequestLine.id)
+
+    async with read_session_factory() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield [
+                tuple(
+                    getattr(row, attribute) for _, attribute in EXPORT_COLUMNS
+                )
+                for row in partition
+            ]
+
+
+async def stream_report_csv(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    employee_name: Optional[str],
+    progress: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams the report details as UTF-8 CSV, one chunk per batch.
+
+    The file starts with a byte order mark so Excel reads Arabic names
+    correctly.
+
+    :param progress: Called with the number of rows written after each batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write(UTF8_BOM)
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    yield buffer.getvalue().encode("utf-8")
+
+    rows_written = 0
+    async for batch in iter_report_rows(start_time, end_time, employee_name):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_format_value(value) for value in row] for row in batch
+        )
+        rows_written += len(batch)
+        if progress is not None:
+            progress(rows_written)
+        yield buffer.getvalue().encode("utf-8")
+
+    logger.info(f"Exported {rows_written} report rows as CSV.")
+
+
+async def write_report_xlsx(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    employee_name: Optional[str],
+    path: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> str:
+    """
+    Writes the report details to an .xlsx file using openpyxl's write-only
+    mode, which flushes rows to disk as they are appended.
+
+    :param path: Target file; a temporary file is created when omitted.
+    :param progress: Called with the number of rows written after each batch.
+    :return: Path of the file; the caller removes it once it has been sent.
+    :raises ImportError: If openpyxl is not installed.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report Details")
+    sheet.append([header for header, _ in EXPORT_COLUMNS])
+
+    rows_written = 0
+    async for batch in iter_report_rows(start_time, end_time, employee_name):
+        for row in batch:
+            sheet.append(row)
+        rows_written += len(batch)
+        if progress is not None:
+            progress(rows_written)
+
+    if path is None:
+        handle, path = tempfile.mkstemp(
+            prefix="report-details-", suffix=".xlsx"
+        )
+        os.close(handle)
+    try:
+        await asyncio.to_thread(workbook.save, path)
+    except Exception:
+        os.remove(path)
+        raise
+
+    logger.info(f"Exported {rows_written} report rows as XLSX.")
+    return path
+
+
+def export_filename(
+    extension: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    prefix: str = "report-details",
+) -> str:
+    if start_time and end_time:
+        return (
+            f"{prefix}-{start_time:%Y-%m-%d}-to-{end_time:%Y-%m-%d}"
+            f".{extension}"
+        )
+    return f"{prefix}.{extension}"
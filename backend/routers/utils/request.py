@@ -6,6 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from jinja2 import Environment, FileSystemLoader
 
 from db.crud import read_email_with_role
+from db.database import async_session_factory
+from hris_db.database import hris_read_session_factory
 from db.models import Request, RequestLine
 from routers.cruds.request import add_attendance_and_shift_to_request_line
 from routers.cruds.request_lines import read_request_lines
@@ -217,3 +219,43 @@ async def create_request_lines_and_confirm(
         raise
 
 
+async def create_request_lines_and_confirm_task(
+    request: Request,
+    request_lines: List[Dict],
+    request_status_id: int,
+    requester: str,
+) -> None:
+    """
+    Background task wrapper around create_request_lines_and_confirm.
+
+    Opens its own sessions because the request's sessions are closed
+    before background tasks run. The HRIS session only connects when the
+    request is processed immediately.
+    """
+    async with (
+        async_session_factory() as session,
+        hris_read_session_factory() as hris_session,
+    ):
+        await create_request_lines_and_confirm(
+            session=session,
+            hris_session=hris_session,
+            request=request,
+            request_lines=request_lines,
+            request_status_id=request_status_id,
+            requester=requester,
+        )
+
+
+async def send_confirmation_notification_task(
+    request: Request,
+    requester_name: str,
+) -> None:
+    """
+    Background task wrapper around send_confirmation_notification with its own session.
+    """
+    async with async_session_factory() as session:
+        await send_confirmation_notification(
+            session=session,
+            request=request,
+            requester_name=requester_name,
+        )
@@ -7,6 +7,7 @@ import bonsai
 from bonsai.errors import AuthenticationError, LDAPError
 from dotenv import load_dotenv
 from services.schema import DomainUser  # Ensure this path is correct
+from services.metrics import observe_external_call
 
 # Logger configuration
 logger = logging.getLogger(__name__)
@@ -51,7 +52,9 @@ async def search_ldap(
     client.set_credentials("SIMPLE", user=LDAP_USER, password=LDAP_PASSWORD)
 
     try:
-        async with client.connect(is_async=True) as conn:
+        async with observe_external_call(
+            "ldap", "search"
+        ), client.connect(is_async=True) as conn:
             logger.info(f"Connected to LDAP: {LDAP_URL}")
 
             attributes: List[str] = ["sAMAccountName", "displayName", "title"]
@@ -121,7 +124,9 @@ async def authenticate_and_get_user(
     client.set_credentials("SIMPLE", user=user_dn, password=password)
 
     try:
-        async with client.connect(is_async=True, timeout=5) as conn:
+        async with observe_external_call(
+            "ldap", "authenticate"
+        ), client.connect(is_async=True, timeout=5) as conn:
             logger.info(f"User {username} authenticated successfully.")
 
             # Search the entire Andalusia organizational unit
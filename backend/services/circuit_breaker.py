@@ -0,0 +1,159 @@
+"""
+Circuit breaker for calls to an external service.
+
+After `failure_threshold` consecutive failures the breaker opens and every
+call fails fast with CircuitOpenError instead of waiting on a service that
+is down. Once `reset_timeout` seconds have passed the breaker is half-open:
+up to `half_open_max_calls` probe calls go through while the others are
+still rejected. A successful probe closes the breaker, a failed one opens it
+again for another `reset_timeout`.
+
+The state of every breaker is exposed as circuit_breaker_state and rejected
+calls are counted in circuit_breaker_rejections_total.
+"""
+
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Callable
+
+from services.metrics import (
+    circuit_breaker_rejections,
+    register_circuit_breaker,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"{name} circuit breaker is open, retry in {retry_after:.0f}s."
+        )
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probes.
+
+    The state is only changed from the event loop thread, so no lock is
+    needed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        register_circuit_breaker(self)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        return self._state == CLOSED
+
+    def _open(self) -> None:
+        if self._state != OPEN:
+            logger.warning(
+                f"{self.name} circuit breaker opened after "
+                f"{self._failures} consecutive failure(s)."
+            )
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probes = 0
+
+    def _before_call(self) -> bool:
+        """
+        Let a call through or raise CircuitOpenError.
+
+        Returns:
+            bool: True if the call is a half-open probe.
+        """
+        if self._state == OPEN:
+            waited = self._clock() - self._opened_at
+            if waited < self.reset_timeout:
+                circuit_breaker_rejections.inc(breaker=self.name)
+                raise CircuitOpenError(self.name, self.reset_timeout - waited)
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"{self.name} circuit breaker half-open, probing.")
+
+        if self._state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                circuit_breaker_rejections.inc(breaker=self.name)
+                raise CircuitOpenError(self.name, 0)
+            self._probes += 1
+            return True
+        return False
+
+    def _release_probe(self) -> None:
+        # A probe that outlived its half-open period finds the count reset
+        self._probes = max(0, self._probes - 1)
+
+    def _on_success(self, probe: bool) -> None:
+        if probe:
+            self._release_probe()
+            if self._state == HALF_OPEN:
+                logger.info(f"{self.name} circuit breaker closed.")
+                self._state = CLOSED
+        self._failures = 0
+
+    def _on_failure(self, probe: bool) -> None:
+        if probe:
+            self._release_probe()
+        self._failures += 1
+        if probe or self._failures >= self.failure_threshold:
+            self._open()
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Run the enclosed call through the breaker.
+
+        Any exception raised inside counts as a failure; a cancelled call
+        counts as neither.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with its
+                probes already running.
+        """
+        probe = self._before_call()
+        try:
+            yield
+        except Exception:
+            self._on_failure(probe)
+            raise
+        except BaseException:
+            if probe:
+                self._release_probe()
+            raise
+        else:
+            self._on_success(probe)
+
+    def reset(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._probes = 0
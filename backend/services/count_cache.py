@@ -0,0 +1,122 @@
+"""
+Total-row counts for the paginated listings.
+
+The listings support three count modes:
+    exact   run COUNT(*) on every call (the default)
+    cached  reuse a count for the same filters for COUNT_CACHE_TTL_SECONDS,
+            dropped as soon as a request or request line is written
+    none    skip the count; the response only says whether more rows exist
+
+`cached` is opt-in: the cache and its invalidation live in one process, so
+with several workers a count may lag writes made on another worker by up to
+COUNT_CACHE_TTL_SECONDS.
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Literal, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CountMode = Literal["exact", "cached", "none"]
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+
+# Tables whose writes change the listing counts
+COUNTED_TABLES = {"request", "request_line"}
+
+# signature -> (count, stored at)
+_counts: Dict[str, Tuple[int, float]] = {}
+
+
+def count_signature(listing: str, **filters) -> str:
+    """
+    Build the cache key for a listing and its filter values.
+    """
+    parts = [f"{name}={filters[name]!r}" for name in sorted(filters)]
+    return f"{listing}|" + "|".join(parts)
+
+
+def read_cached_count(signature: str) -> Optional[int]:
+    entry = _counts.get(signature)
+    if entry is None:
+        return None
+    count, stored_at = entry
+    if time.monotonic() - stored_at > COUNT_CACHE_TTL_SECONDS:
+        _counts.pop(signature, None)
+        return None
+    return count
+
+
+def invalidate_counts() -> None:
+    """Drop every cached count."""
+    _counts.clear()
+
+
+async def resolve_count(
+    session: AsyncSession,
+    count_stmt,
+    signature: str,
+    mode: CountMode = "exact",
+) -> Optional[int]:
+    """
+    Return the total row count for a listing according to the count mode.
+
+    Returns:
+        Optional[int]: The count, or None in "none" mode.
+    """
+    if mode == "none":
+        return None
+    if mode == "cached":
+        cached = read_cached_count(signature)
+        if cached is not None:
+            return cached
+
+    result = await session.execute(count_stmt)
+    count = result.scalar() or 0
+    if mode == "cached":
+        _counts[signature] = (count, time.monotonic())
+    return count
+
+
+def _touches_counted_tables(session: Session) -> bool:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in COUNTED_TABLES:
+            return True
+    return False
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    if _touches_counted_tables(session):
+        session.info["invalidate_counts"] = True
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    # Bulk UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in COUNTED_TABLES:
+            orm_execute_state.session.info["invalidate_counts"] = True
+
+
+def _after_commit(session: Session) -> None:
+    if session.info.pop("invalidate_counts", False):
+        invalidate_counts()
+
+
+def install_count_invalidation() -> None:
+    """
+    Clear the count cache whenever a session commits a change to a request
+    or a request line. Safe to call more than once.
+    """
+    if event.contains(Session, "after_commit", _after_commit):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _after_commit)
@@ -1,8 +1,8 @@
 from ast import Dict
-from datetime import time
+from datetime import date, time
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 from db.schemas import AccountRead, RoleRead
 from services.schema import (
     Department,
@@ -86,6 +86,8 @@ class ReportDashboardResponse(BaseModel):
     department: str
     dinner_requests: int
     lunch_requests: int
+    # accepted requests per meal name, for any number of meals
+    meal_requests: dict[str, int] = {}
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -215,8 +217,12 @@ class RequestsResponse(BaseModel):
     data: List[RequestPageRecordResponse]
     current_page: int
     page_size: int
-    total_pages: int
-    total_rows: int
+    # None when the listing was requested with count_mode=none
+    total_pages: int | None
+    total_rows: int | None
+    # Opaque keyset cursor for the next page, None on the last page
+    next_cursor: str | None = None
+    has_more: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -251,16 +257,80 @@ class ScheduleRequest(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ExportJobPayload(BaseModel):
+    format: Literal["csv", "xlsx"] = "csv"
+    start_time: str | None = None
+    end_time: str | None = None
+    query: str | None = None
+
+
+class ParquetExportPayload(BaseModel):
+    start_time: str | None = None
+    end_time: str | None = None
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    format: str
+    status: str
+    rows_written: int
+    total_rows: int | None
+    progress: float | None
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+    expires_at: datetime | None
+    filename: str
+
+
+class AttendanceResyncPayload(BaseModel):
+    start_date: date
+    end_date: date
+
+
+class AttendanceResyncJobResponse(BaseModel):
+    id: int
+    start_day: date
+    end_day: date
+    next_day: date | None
+    status: str
+    days_total: int
+    days_done: int
+    progress: float | None
+    attendance_rows: int
+    lines_updated: int
+    error: str | None
+    created_at: datetime
+    updated_at: datetime | None
+    finished_at: datetime | None
+
+
 class ReportDetailsResponse(BaseModel):
     request_lines: List[ReportDetailsRecord] | None
     current_page: int | None
     page_size: int | None
     total_pages: int | None
     total_rows: int | None
+    has_more: bool = False
+    # Attendance comes from the local HRIS mirror; `attendance_stale` is set
+    # when it could not be refreshed recently (e.g. HRIS is down)
+    attendance_synced_at: datetime | None = None
+    attendance_stale: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class AttendanceReconciliationResponse(BaseModel):
+    lines_total: int
+    lines_present: int
+    lines_missing: int
+    overlap_minutes_total: int
+    # One page of the missing line ids, in id order
+    missing_line_ids: List[int]
+    # Pass as `missing_after` for the next page; None on the last one
+    next_missing_after: int | None = None
+
+
 class DepartmentWithEmployees(BaseModel):
     department: str
     employees: List[Employee]
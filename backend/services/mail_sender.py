@@ -4,6 +4,7 @@ import asyncio
 from typing import List, Optional
 
 from dotenv import load_dotenv
+from services.metrics import observe_external_call
 from exchangelib import (
     Credentials,
     Account,
@@ -154,7 +155,8 @@ class EmailSender:
             )
 
             # Use asyncio.to_thread to avoid blocking in async context
-            await asyncio.to_thread(message.send)
+            async with observe_external_call("ews", "send_email"):
+                await asyncio.to_thread(message.send)
 
             logger.info("Email sent successfully.")
         except Exception as e:
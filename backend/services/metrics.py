@@ -0,0 +1,325 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Only what the API needs is implemented (counters, gauges and histograms with
+labels) so the /metrics endpoint works without any external service or
+client library.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Iterable[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Gauge that is either set directly or computed at scrape time by a
+    callback returning {label values: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        *args,
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        if self._collect is not None:
+            values.update(self._collect())
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> ([per-bucket counts], sum, count)
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------------------------
+# Application metrics
+# ------------------------------------------------------------------------------
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    labels=("method", "route", "status"),
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+external_call_duration = Histogram(
+    "external_call_duration_seconds",
+    "Latency of calls to HRIS, LDAP and EWS.",
+    labels=("service", "operation", "outcome"),
+)
+background_tasks_pending = Gauge(
+    "background_tasks_pending",
+    "Background tasks scheduled and not yet finished.",
+)
+
+_pools: Dict[str, AsyncEngine] = {}
+
+
+def _collect_pool(stat: str) -> Callable[[], Dict[LabelValues, float]]:
+    def collect() -> Dict[LabelValues, float]:
+        values = {}
+        for name, async_engine in _pools.items():
+            pool = async_engine.pool
+            reader = getattr(pool, stat, None)
+            if callable(reader):
+                values[(name,)] = reader()
+        return values
+
+    return collect
+
+
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    labels=("engine",),
+    collect=_collect_pool("checkedout"),
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Connections opened beyond the pool size.",
+    labels=("engine",),
+    collect=_collect_pool("overflow"),
+)
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured pool size.",
+    labels=("engine",),
+    collect=_collect_pool("size"),
+)
+
+
+def register_pool(name: str, async_engine: AsyncEngine) -> None:
+    """Expose the pool statistics of an engine under the given name."""
+    _pools[name] = async_engine
+
+
+_breakers: Dict[str, object] = {}
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _collect_breakers() -> Dict[LabelValues, float]:
+    return {
+        (name,): _BREAKER_STATES.get(breaker.state, 0)
+        for name, breaker in _breakers.items()
+    }
+
+
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    labels=("breaker",),
+    collect=_collect_breakers,
+)
+circuit_breaker_rejections = Counter(
+    "circuit_breaker_rejections_total",
+    "Calls rejected because the circuit breaker was open.",
+    labels=("breaker",),
+)
+
+
+def register_circuit_breaker(breaker) -> None:
+    """Expose the state of a circuit breaker under its name."""
+    _breakers[breaker.name] = breaker
+
+
+@asynccontextmanager
+async def observe_external_call(service: str, operation: str):
+    """
+    Time an outbound call and record it in external_call_duration_seconds.
+    """
+    started = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        external_call_duration.observe(
+            time.perf_counter() - started,
+            service=service,
+            operation=operation,
+            outcome=outcome,
+        )
+
+
+async def _run_tracked(func: Callable, *args, **kwargs):
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        background_tasks_pending.dec()
+
+
+def add_tracked_task(
+    background_tasks, func: Callable, *args, **kwargs
+) -> None:
+    """
+    Schedule `func` on a FastAPI BackgroundTasks and count it in
+    background_tasks_pending from now until it finishes.
+    """
+    background_tasks.add_task(_run_tracked, func, *args, **kwargs)
+    background_tasks_pending.inc()
@@ -0,0 +1,178 @@
+import os
+import re
+import time
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Warn when one statement shape runs more than this many times in a request.
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "10"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|:\w+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape: literals and bind placeholders become
+    `?` and IN lists of any length collapse to `(?)`.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryStats:
+    """
+    SQL activity recorded for a single HTTP request.
+    """
+
+    queries: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def repeated(
+        self, threshold: int = SQL_REPEAT_WARN_THRESHOLD
+    ) -> Dict[str, int]:
+        """Statement shapes that ran more than `threshold` times."""
+        return {
+            shape: count
+            for shape, count in self.fingerprints.items()
+            if count > threshold
+        }
+
+
+@dataclass
+class EndpointQueryStats:
+    """
+    Running totals of SQL activity for one endpoint.
+    """
+
+    requests: int = 0
+    queries: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    max_queries: int = 0
+    repeated_statements: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": (
+                round(self.queries / self.requests, 2) if self.requests else 0
+            ),
+            "max_queries": self.max_queries,
+            "db_time_ms": round(self.db_time * 1000, 2),
+            "avg_db_time_ms": (
+                round(self.db_time * 1000 / self.requests, 2)
+                if self.requests
+                else 0
+            ),
+            "rows": self.rows,
+            "repeated_statements": dict(
+                self.repeated_statements.most_common(10)
+            ),
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+_endpoint_stats: Dict[str, EndpointQueryStats] = {}
+
+
+def start_request_stats() -> QueryStats:
+    """Begin recording SQL activity for the current request context."""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def record_endpoint_stats(endpoint: str, stats: QueryStats) -> None:
+    """
+    Fold one request's stats into the endpoint totals and warn on repeated
+    statement shapes (likely N+1 patterns).
+    """
+    totals = _endpoint_stats.setdefault(endpoint, EndpointQueryStats())
+    totals.requests += 1
+    totals.queries += stats.queries
+    totals.db_time += stats.db_time
+    totals.rows += stats.rows
+    totals.max_queries = max(totals.max_queries, stats.queries)
+
+    for shape, count in stats.repeated().items():
+        totals.repeated_statements[shape] += 1
+        logger.warning(
+            f"Possible N+1 on {endpoint}: statement ran {count} times: "
+            f"{shape[:200]}"
+        )
+
+
+def read_endpoint_stats() -> Dict[str, Dict]:
+    """Snapshot of the per-endpoint totals, busiest endpoints first."""
+    return {
+        endpoint: totals.as_dict()
+        for endpoint, totals in sorted(
+            _endpoint_stats.items(),
+            key=lambda item: item[1].queries,
+            reverse=True,
+        )
+    }
+
+
+def reset_endpoint_stats() -> None:
+    _endpoint_stats.clear()
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    # Kept on the execution context, which ends with the statement whether
+    # it succeeds or fails
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    started = getattr(context, "_query_start", None)
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += elapsed
+    # rowcount is the affected rows of a write, not rows returned
+    if not (context.isinsert or context.isupdate or context.isdelete):
+        stats.rows += max(getattr(cursor, "rowcount", 0) or 0, 0)
+    stats.fingerprints[fingerprint(statement)] += 1
+
+
+def install_query_stats(async_engine: AsyncEngine) -> None:
+    """
+    Attach the statement timing hooks to an async engine. Safe to call more
+    than once for the same engine.
+    """
+    sync_engine = async_engine.sync_engine
+    if event.contains(
+        sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
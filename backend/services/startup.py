@@ -8,10 +8,31 @@ from contextlib import asynccontextmanager
 from sqlmodel.ext.asyncio.session import AsyncSession
 from passlib.context import CryptContext
 
-from db.database import get_application_session
+from db.database import (
+    engine,
+    get_application_session,
+    warm_up_application_engine,
+    dispose_application_engine,
+)
+from db.migrations import check_expected_indexes
 
-from hris_db.database import get_hris_session
+from hris_db.database import get_hris_session, haris_db_engine
 from hris_db.clone import schedule_replication, scheduler
+from hris_db.attendance_sync import (
+    schedule_attendance_backfill,
+    schedule_attendance_sync,
+)
+from hris_db.shift_snapshot import schedule_shift_snapshot_refresh
+from hris_db.attendance_resync import (
+    resume_interrupted_resync_jobs,
+    schedule_resync_reclaim,
+    stop_resync_jobs,
+)
+from apscheduler.triggers.interval import IntervalTrigger
+from routers.utils.export_jobs import (
+    cancel_all_export_jobs,
+    cleanup_expired_exports,
+)
 
 # Load environment variables
 load_dotenv()
@@ -29,12 +50,25 @@ async def lifespan(app: FastAPI):
     Application lifespan management. Sets up the database and replication process.
     """
     try:
+        await warm_up_application_engine()
+        await check_expected_indexes(engine)
 
         schedule_replication(HRISSessionDep, SessionDep)
+        schedule_attendance_sync()
+        schedule_attendance_backfill()
+        schedule_shift_snapshot_refresh()
+        schedule_resync_reclaim()
+        scheduler.add_job(
+            cleanup_expired_exports,
+            trigger=IntervalTrigger(minutes=10),
+            id="export_cleanup_task",
+            replace_existing=True,
+        )
         if not scheduler.running:
             scheduler.start()
         else:
             logger.info("Scheduler already running, skipping start.")
+        await resume_interrupted_resync_jobs()
 
         yield
     except Exception as e:
@@ -43,3 +77,8 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         scheduler.shutdown()
+        await cancel_all_export_jobs()
+        await stop_resync_jobs()
+        # Dispose both engines to clean up pooled connections
+        await dispose_application_engine()
+        await haris_db_engine.dispose()
@@ -6,7 +6,8 @@ An async-compatible database setup and seed script for a SQLModel project.
 Steps:
 1. Create the database if it doesn't exist (synchronous).
 2. Create tables if they don't exist (synchronous).
-3. Seed default values (async).
+3. Apply pending schema migrations.
+4. Seed default values (async).
 """
 
 import asyncio
@@ -22,6 +23,7 @@ from dotenv import load_dotenv
 
 from hris_db.database import get_hris_session
 from hris_db.clone import replicate
+from db.migrations import run_migrations
 
 # Import models from your project
 from db.models import (
@@ -114,6 +116,9 @@ async def create_tables(async_engine: AsyncEngine) -> None:
         async with async_engine.begin() as conn:
             await conn.run_sync(SQLModel.metadata.create_all)
         print("Tables created successfully.")
+        async with async_engine.connect() as conn:
+            applied = await conn.run_sync(run_migrations)
+        print(f"Applied migrations: {applied or 'none'}")
     except OperationalError as e:
         print(f"Error creating tables: {e}")
         exit(1)
@@ -8,8 +8,12 @@ from fastapi import Request, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
-from db.database import get_application_session
-from hris_db.database import get_hris_session
+from db.database import (
+    get_application_session,
+    get_read_session,
+    has_recent_write,
+)
+from hris_db.database import get_hris_read_session
 from services.http_schema import User
 from icecream import ic
 from fastapi import Depends
@@ -32,7 +36,7 @@ async def decrypt(token: str):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 
-async def get_current_user(request: Request):
+def extract_token(request: Request) -> str | None:
     token = request.cookies.get("session")  # Try to get from cookies
 
     if not token:
@@ -42,6 +46,12 @@ async def get_current_user(request: Request):
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split(" ")[1]
 
+    return token
+
+
+async def get_current_user(request: Request):
+    token = extract_token(request)
+
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -60,6 +70,33 @@ async def get_current_user(request: Request):
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+async def get_request_read_session(request: Request):
+    """
+    Provide a read session for the current request.
+
+    Reads go to the replica unless the client carries the read-your-writes
+    flag set by a recent write (see db.database.mark_recent_write), in which
+    case they go to the primary so the user sees their own submission.
+    """
+    async for session in get_read_session(
+        use_primary=has_recent_write(request)
+    ):
+        yield session
+
+
+async def get_admin_user(
+    user: Annotated[User, Depends(get_current_user)],
+) -> User:
+    """
+    Ensure the current user has the Admin role.
+    """
+    if "Admin" not in (user.roles or []):
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_application_session)]
-HRISSessionDep = Annotated[AsyncSession, Depends(get_hris_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_request_read_session)]
+HRISSessionDep = Annotated[AsyncSession, Depends(get_hris_read_session)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
+AdminUserDep = Annotated[User, Depends(get_admin_user)]
@@ -4,6 +4,10 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 from jose import jwt, JWTError
 import os
+import time
+
+from services.metrics import http_request_duration, http_requests_in_flight
+from services.query_stats import record_endpoint_stats, start_request_stats
 
 from dotenv import load_dotenv
 
@@ -67,3 +71,65 @@ class TokenRenewalMiddleware(BaseHTTPMiddleware):
             pass
 
         return await call_next(request)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware that records SQL activity per request and reports it in the
+    X-DB-Queries and X-DB-Time (milliseconds) response headers.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = start_request_stats()
+        response = await call_next(request)
+
+        route = request.scope.get("route")
+        endpoint = (
+            f"{request.method} {route.path}"
+            if route is not None
+            else f"{request.method} {request.url.path}"
+        )
+        record_endpoint_stats(endpoint, stats)
+
+        response.headers["X-DB-Queries"] = str(stats.queries)
+        response.headers["X-DB-Time"] = f"{stats.db_time * 1000:.2f}"
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records request latency per route template and
+    the number of requests in flight for the /metrics endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # Use the route template so path parameters do not explode the
+            # label cardinality; unmatched paths share one label.
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=str(status_code),
+            )
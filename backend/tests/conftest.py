@@ -0,0 +1,56 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from services import metrics
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path_factory):
+    """
+    Provides a SQLite engine with the application tables. The database is a
+    file so that concurrent sessions (e.g. background jobs) share it.
+    """
+    path = tmp_path_factory.mktemp("db") / "app.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    """
+    Provides a session factory bound to the SQLite engine. Test modules that
+    need data override this fixture (or `session`) and seed it.
+    """
+    return sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+
+@pytest_asyncio.fixture
+async def session(session_factory):
+    """
+    Provides a session on the SQLite engine.
+    """
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture(autouse=True)
+def metrics_registry():
+    """
+    Drops the metrics and circuit breakers a test registers, so they do not
+    leak into the global registries seen by later tests.
+    """
+    registry = list(metrics.REGISTRY)
+    breakers = dict(metrics._breakers)
+    yield
+    metrics.REGISTRY[:] = registry
+    metrics._breakers.clear()
+    metrics._breakers.update(breakers)
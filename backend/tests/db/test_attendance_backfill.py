@@ -0,0 +1,181 @@
+from datetime import date, datetime, time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from db.attendance_backfill import (
+    BACKFILL_NAME,
+    apply_attendance_for_day,
+    backfill_attendance,
+)
+from db.models import (
+    Attendance,
+    MealSchedule,
+    Request,
+    RequestLine,
+    SyncState,
+)
+
+NOW = datetime(2025, 3, 2, 12, 0)
+CHECK_IN = datetime(2025, 3, 1, 8, 0)
+CHECK_OUT = datetime(2025, 3, 1, 20, 0)
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    """
+    Seeds one request of three lines: employee 10 has attendance in the
+    mirror, employee 20 has none yet and employee 30 is already filled.
+    """
+    session.add(
+        Request(
+            id=1,
+            requester_id=1,
+            meal_id=1,
+            status_id=3,
+            request_time=datetime(2025, 3, 1, 18, 0),
+        )
+    )
+    session.add_all(
+        [
+            RequestLine(
+                id=code // 10,
+                employee_id=code,
+                employee_code=code,
+                department_id=1,
+                request_id=1,
+                meal_id=1,
+            )
+            for code in (10, 20)
+        ]
+        + [
+            RequestLine(
+                id=3,
+                employee_id=30,
+                employee_code=30,
+                department_id=1,
+                request_id=1,
+                meal_id=1,
+                attendance_in=CHECK_IN,
+                attendance_out=CHECK_OUT,
+                shift_hours=8,
+            )
+        ]
+    )
+    session.add(
+        Attendance(
+            id=100,
+            employee_code=10,
+            date=datetime(2025, 3, 1),
+            date_in=CHECK_IN,
+            date_out=CHECK_OUT,
+        )
+    )
+    await session.commit()
+    return session
+
+
+async def shift_hours(day, employee_ids):
+    return {employee_id: 12 for employee_id in employee_ids}
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(session):
+    # One line per chunk and one chunk per run
+    updated = await backfill_attendance(
+        session, chunk_size=1, max_chunks=1, now=NOW
+    )
+    assert updated == 1
+    state = await session.get(SyncState, BACKFILL_NAME)
+    assert state.position == 1
+
+    # The next run continues after line 1 and reaches the end
+    await backfill_attendance(session, chunk_size=1, max_chunks=5, now=NOW)
+    assert state.position is None
+
+    result = await session.execute(
+        select(
+            RequestLine.id,
+            RequestLine.attendance_in,
+            RequestLine.attendance_out,
+        ).order_by(RequestLine.id)
+    )
+    assert [tuple(row) for row in result.all()] == [
+        (1, CHECK_IN, CHECK_OUT),
+        (2, None, None),
+        (3, CHECK_IN, CHECK_OUT),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_missing_shift_hours(session):
+    updated = await backfill_attendance(
+        session, shift_hours=shift_hours, now=NOW
+    )
+
+    # Line 3 is complete and left alone
+    assert updated == 2
+    result = await session.execute(
+        select(RequestLine.shift_hours).order_by(RequestLine.id)
+    )
+    assert result.scalars().all() == [12, 12, 8]
+
+
+@pytest.mark.asyncio
+async def test_backfill_ignores_lines_outside_window(session):
+    later = datetime(2025, 3, 20, 12, 0)
+    assert await backfill_attendance(session, now=later) == 0
+
+
+@pytest.mark.asyncio
+async def test_apply_attendance_for_day_matches_mirror(session):
+    day = date(2025, 3, 1)
+
+    # Line 1 gets the mirror's attendance, line 3's is cleared as the mirror
+    # has none for employee 30
+    assert await apply_attendance_for_day(session, day) == 2
+    await session.commit()
+    # A second run for the same day changes nothing
+    assert await apply_attendance_for_day(session, day) == 0
+
+    result = await session.execute(
+        select(RequestLine.attendance_in).order_by(RequestLine.id)
+    )
+    assert result.scalars().all() == [CHECK_IN, None, None]
+
+
+@pytest.mark.asyncio
+async def test_backfill_takes_the_attendance_of_the_meal_window(session):
+    # Meal 1 is served from 19:00 to 02:00; employee 20 worked a morning
+    # and an evening shift that day
+    session.add(
+        MealSchedule(
+            meal_id=1, schedule_from=time(19, 0), schedule_to=time(2, 0)
+        )
+    )
+    evening = (datetime(2025, 3, 1, 19, 30), datetime(2025, 3, 2, 1, 0))
+    session.add_all(
+        [
+            Attendance(
+                id=101,
+                employee_code=20,
+                date=datetime(2025, 3, 1),
+                date_in=evening[0],
+                date_out=evening[1],
+            ),
+            Attendance(
+                id=102,
+                employee_code=20,
+                date=datetime(2025, 3, 1),
+                date_in=datetime(2025, 3, 1, 6, 0),
+                date_out=datetime(2025, 3, 1, 14, 0),
+            ),
+        ]
+    )
+    await session.commit()
+
+    await backfill_attendance(session, now=NOW)
+
+    line = await session.get(RequestLine, 2)
+    assert (line.attendance_in, line.attendance_out) == evening
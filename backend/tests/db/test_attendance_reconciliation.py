@@ -0,0 +1,169 @@
+from datetime import datetime, time, timezone
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from db.attendance_reconciliation import (
+    Reconciliation,
+    reconcile,
+    reconcile_request_lines,
+    to_local_time,
+)
+from db.models import Attendance, MealSchedule, Request, RequestLine
+
+# Dinner is served from 19:00 to 02:00 the next day
+DINNER = {2: [(time(19, 0), time(2, 0))]}
+
+
+def test_overnight_window_matches_attendance_across_midnight():
+    result = reconcile(
+        line_ids=[1, 2, 3],
+        employee_codes=[10, 20, 30],
+        request_times=[
+            datetime(2025, 3, 1, 18, 0),
+            # Ordered after midnight: still the window of March 1st
+            datetime(2025, 3, 2, 0, 30),
+            datetime(2025, 3, 1, 18, 0),
+        ],
+        meal_ids=[2, 2, 2],
+        schedules=DINNER,
+        attendance_codes=[10, 20, 30],
+        attendance_in=[
+            datetime(2025, 3, 1, 15, 0),
+            datetime(2025, 3, 1, 20, 0),
+            datetime(2025, 3, 1, 8, 0),
+        ],
+        attendance_out=[
+            datetime(2025, 3, 2, 1, 30),
+            None,
+            datetime(2025, 3, 1, 17, 0),
+        ],
+    )
+
+    # Employee 20 only has a check-in: present, no measurable overlap.
+    # Employee 30 left before the window opened.
+    assert result.present.tolist() == [True, True, False]
+    assert result.overlap_minutes.tolist() == [390, 0, 0]
+    assert result.missing_line_ids == [3]
+    assert result.attendance_index.tolist() == [0, 1, -1]
+
+
+def test_longest_overlap_is_the_lines_attendance():
+    result = reconcile(
+        line_ids=[1],
+        employee_codes=[10],
+        request_times=[datetime(2025, 3, 1, 18, 0)],
+        meal_ids=[2],
+        schedules=DINNER,
+        attendance_codes=[10, 10, 10, 20],
+        attendance_in=[
+            # Day shift, over before dinner
+            datetime(2025, 3, 1, 6, 0),
+            datetime(2025, 3, 1, 18, 0),
+            datetime(2025, 3, 1, 22, 0),
+            datetime(2025, 3, 1, 19, 0),
+        ],
+        attendance_out=[
+            datetime(2025, 3, 1, 14, 0),
+            datetime(2025, 3, 1, 20, 0),
+            datetime(2025, 3, 2, 6, 0),
+            datetime(2025, 3, 2, 2, 0),
+        ],
+    )
+
+    # 22:00-02:00 overlaps dinner for 4 hours, 18:00-20:00 for one
+    assert result.attendance_index.tolist() == [2]
+
+
+def test_missing_line_ids_are_paged():
+    result = Reconciliation(
+        line_ids=np.array([5, 1, 2, 3, 4]),
+        present=np.array([False, False, True, False, False]),
+        overlap_minutes=np.zeros(5, dtype=np.int64),
+        attendance_index=np.full(5, -1),
+    )
+
+    first = result.summary(limit=2)
+    last = result.summary(missing_after=first["next_missing_after"], limit=2)
+
+    assert first["lines_missing"] == 4
+    assert (first["missing_line_ids"], first["next_missing_after"]) == (
+        [1, 3],
+        3,
+    )
+    assert (last["missing_line_ids"], last["next_missing_after"]) == (
+        [4, 5],
+        None,
+    )
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    """
+    Seeds a dinner schedule, two accepted dinner lines and the attendance of
+    one of them.
+    """
+    session.add(
+        MealSchedule(
+            meal_id=2, schedule_from=time(19, 0), schedule_to=time(2, 0)
+        )
+    )
+    session.add(
+        Request(
+            id=1,
+            requester_id=1,
+            meal_id=2,
+            status_id=3,
+            request_time=datetime(2025, 3, 1, 18, 0),
+        )
+    )
+    session.add_all(
+        [
+            RequestLine(
+                id=code // 10,
+                employee_id=code,
+                employee_code=code,
+                department_id=1,
+                request_id=1,
+                meal_id=2,
+            )
+            for code in (10, 20)
+        ]
+    )
+    session.add(
+        Attendance(
+            id=100,
+            employee_code=10,
+            date=datetime(2025, 3, 1),
+            date_in=datetime(2025, 3, 1, 20, 0),
+            date_out=datetime(2025, 3, 2, 3, 0),
+        )
+    )
+    await session.commit()
+    return session
+
+
+@pytest.mark.asyncio
+async def test_reconcile_request_lines_flags_missing_attendance(session):
+    result = await reconcile_request_lines(
+        session, datetime(2025, 3, 1), datetime(2025, 3, 1, 23, 59, 59)
+    )
+
+    assert result.summary() == {
+        "lines_total": 2,
+        "lines_present": 1,
+        "lines_missing": 1,
+        "overlap_minutes_total": 360,
+        "missing_line_ids": [2],
+        "next_missing_after": None,
+    }
+
+
+def test_request_times_are_matched_in_cairo_time():
+    stored = datetime(2025, 3, 1, 18, 0)
+    utc = datetime(2025, 3, 1, 16, 0, tzinfo=timezone.utc)
+
+    # Stored values are Cairo time already, whatever the host's zone
+    assert to_local_time(stored) == stored
+    assert to_local_time(utc) == stored
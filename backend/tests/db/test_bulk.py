@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from db import bulk
+from db.bulk import bulk_update_by_id
+from db.models import RequestLine
+
+
+@pytest_asyncio.fixture
+async def session(session, monkeypatch):
+    """
+    Seeds three request lines, with a chunk size that forces two UPDATE
+    statements.
+    """
+    monkeypatch.setattr(bulk, "BULK_UPDATE_CHUNK_SIZE", 2)
+
+    session.add_all(
+        [
+            RequestLine(
+                id=line_id,
+                employee_id=1,
+                employee_code=10,
+                department_id=1,
+                request_id=1,
+                meal_id=1,
+                shift_hours=8,
+            )
+            for line_id in (1, 2, 3)
+        ]
+    )
+    await session.commit()
+    return session
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_writes_only_given_columns(session):
+    lines = (await session.execute(select(RequestLine))).scalars().all()
+    check_in = datetime(2025, 3, 1, 8, 0)
+
+    updated = await bulk_update_by_id(
+        session,
+        RequestLine,
+        {
+            1: {"attendance_in": check_in, "shift_hours": 12},
+            3: {"attendance_in": check_in},
+        },
+        lines,
+    )
+    await session.commit()
+
+    assert updated == 2
+    # Loaded objects carry the new values without being flushed again
+    assert lines[0].shift_hours == 12
+    assert not session.dirty
+
+    result = await session.execute(
+        select(
+            RequestLine.id, RequestLine.attendance_in, RequestLine.shift_hours
+        ).order_by(RequestLine.id)
+    )
+    assert [tuple(row) for row in result.all()] == [
+        (1, check_in, 12),
+        (2, None, 8),
+        (3, check_in, 8),
+    ]
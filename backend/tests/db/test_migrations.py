@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import MetaData, Table, create_engine, inspect, select, text
+from sqlmodel import SQLModel
+
+from db.migrations import (
+    HOT_PATH_INDEXES,
+    find_missing_indexes,
+    run_migrations,
+)
+
+
+@pytest.fixture
+def legacy_engine():
+    """
+    Provides an in-memory SQLite database created the way older deployments
+    were: all tables present, none of the hot path indexes and no
+    normalized search names.
+    """
+    engine = create_engine("sqlite://")
+    legacy_metadata = MetaData()
+    for table in SQLModel.metadata.sorted_tables:
+        Table(
+            table.name,
+            legacy_metadata,
+            *[
+                column._copy()
+                for column in table.columns
+                if column.name != "search_name"
+            ],
+        )
+    legacy_metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_missing_indexes_are_reported(legacy_engine):
+    with legacy_engine.connect() as conn:
+        missing = find_missing_indexes(conn)
+
+    for table_name, index_name, _ in HOT_PATH_INDEXES:
+        assert f"{table_name}.{index_name}" in missing
+
+
+def test_run_migrations_creates_indexes_once(legacy_engine):
+    with legacy_engine.connect() as conn:
+        applied = run_migrations(conn)
+        assert applied == [1, 2, 3, 4, 5, 6, 7, 8]
+        assert find_missing_indexes(conn) == []
+
+        # A second run is a no-op.
+        assert run_migrations(conn) == []
+
+    index_names = {
+        ix["name"] for ix in inspect(legacy_engine).get_indexes("request")
+    }
+    assert "ix_request_deleted_time" in index_names
+
+
+def test_name_search_migration_backfills_normalized_names(legacy_engine):
+    with legacy_engine.connect() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO account (id, username, fullname) "
+                "VALUES (1, 'ahmed', 'أحمد عبدالله')"
+            )
+        )
+        conn.commit()
+
+        run_migrations(conn)
+
+        account = Table("account", MetaData(), autoload_with=conn)
+        search_name = conn.execute(select(account.c.search_name)).scalar_one()
+
+    assert search_name == "احمد عبدالله"
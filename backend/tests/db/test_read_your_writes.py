@@ -0,0 +1,66 @@
+import time
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from db import database
+from db.database import (
+    DB_READ_YOUR_WRITES_SECONDS,
+    READ_PRIMARY_COOKIE,
+    READ_PRIMARY_HEADER,
+    has_recent_write,
+    mark_recent_write,
+)
+
+
+def make_request(headers=()):
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in headers
+            ],
+        }
+    )
+
+
+def test_write_sets_cookie_and_header(monkeypatch):
+    monkeypatch.setattr(database, "read_engine", object())
+    response = Response()
+
+    mark_recent_write(response)
+
+    until = int(response.headers[READ_PRIMARY_HEADER])
+    assert 0 < until - time.time() <= DB_READ_YOUR_WRITES_SECONDS
+    assert f"{READ_PRIMARY_COOKIE}={until}" in response.headers["set-cookie"]
+
+
+def test_no_flag_without_replica():
+    response = Response()
+
+    mark_recent_write(response)
+
+    assert READ_PRIMARY_HEADER not in response.headers
+
+
+def test_flag_is_read_from_cookie_or_echoed_header():
+    until = str(int(time.time()) + 5)
+
+    assert has_recent_write(
+        make_request([("cookie", f"{READ_PRIMARY_COOKIE}={until}")])
+    )
+    assert has_recent_write(make_request([(READ_PRIMARY_HEADER, until)]))
+    assert not has_recent_write(make_request())
+
+
+def test_expired_or_out_of_window_flags_are_ignored():
+    now = int(time.time())
+    for value in (
+        str(now - 1),
+        str(now + DB_READ_YOUR_WRITES_SECONDS + 60),
+        "garbage",
+    ):
+        assert not has_recent_write(
+            make_request([(READ_PRIMARY_HEADER, value)])
+        )
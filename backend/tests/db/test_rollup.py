@@ -0,0 +1,128 @@
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db.models import DailyDepartmentMealRollup, Request, RequestLine
+from db.rollup import install_rollup_maintenance, rebuild_rollup
+
+
+@pytest_asyncio.fixture
+async def engine(engine):
+    """
+    Installs the rollup maintenance hooks.
+    """
+    install_rollup_maintenance()
+    return engine
+
+
+async def read_rollup(session):
+    result = await session.execute(
+        select(
+            DailyDepartmentMealRollup.day,
+            DailyDepartmentMealRollup.department_id,
+            DailyDepartmentMealRollup.meal_id,
+            DailyDepartmentMealRollup.accepted_count,
+            DailyDepartmentMealRollup.total_count,
+        ).order_by(
+            DailyDepartmentMealRollup.department_id,
+            DailyDepartmentMealRollup.meal_id,
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+def make_line(request_id, employee_id, department_id):
+    return RequestLine(
+        request_id=request_id,
+        employee_id=employee_id,
+        employee_code=employee_id,
+        department_id=department_id,
+        meal_id=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_rollup_follows_line_writes(engine):
+    day = date(2025, 3, 1)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        request = Request(
+            requester_id=1,
+            meal_id=1,
+            created_time=datetime(2025, 3, 1, 9, 30),
+        )
+        session.add(request)
+        await session.commit()
+
+        lines = [
+            make_line(request.id, 1, 10),
+            make_line(request.id, 2, 10),
+            make_line(request.id, 3, 20),
+        ]
+        session.add_all(lines)
+        await session.commit()
+        assert await read_rollup(session) == [
+            (day, 10, 1, 2, 2),
+            (day, 20, 1, 1, 1),
+        ]
+
+        # Rejecting and deleting a line moves it out of the counts
+        lines[0].is_accepted = False
+        lines[0].is_deleted = True
+        await session.commit()
+        assert await read_rollup(session) == [
+            (day, 10, 1, 1, 1),
+            (day, 20, 1, 1, 1),
+        ]
+
+        # A rebuild reproduces the incrementally maintained rows
+        incremental = await read_rollup(session)
+        await session.run_sync(
+            lambda sync_session: rebuild_rollup(sync_session.connection())
+        )
+        assert await read_rollup(session) == incremental
+
+
+@pytest.mark.asyncio
+async def test_rollup_moves_counts_between_cells(engine):
+    day = date(2025, 3, 1)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        request = Request(
+            requester_id=1,
+            meal_id=1,
+            created_time=datetime(2025, 3, 1, 9, 30),
+        )
+        session.add(request)
+        await session.commit()
+        lines = [make_line(request.id, 1, 10), make_line(request.id, 2, 10)]
+        session.add_all(lines)
+        await session.commit()
+
+        # The old department's cell gives the line up
+        lines[0].department_id = 20
+        await session.commit()
+        assert await read_rollup(session) == [
+            (day, 10, 1, 1, 1),
+            (day, 20, 1, 1, 1),
+        ]
+
+        # Changing the request's meal moves all its lines, including a
+        # line change made in the same flush
+        request.meal_id = 2
+        lines[1].is_accepted = False
+        await session.commit()
+        assert await read_rollup(session) == [
+            (day, 10, 1, 0, 0),
+            (day, 10, 2, 0, 1),
+            (day, 20, 1, 0, 0),
+            (day, 20, 2, 1, 1),
+        ]
+
+        # Apart from emptied cells, a rebuild reproduces the same rows
+        incremental = [row for row in await read_rollup(session) if row[4]]
+        await session.run_sync(
+            lambda sync_session: rebuild_rollup(sync_session.connection())
+        )
+        assert await read_rollup(session) == incremental
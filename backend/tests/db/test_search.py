@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+
+from db.models import Department, Employee
+from db.search import name_search_condition, normalize_name
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("أحمد", "احمد"),
+        ("إسلام", "اسلام"),
+        ("آمنة", "امنه"),
+        ("مُصْطَفَى", "مصطفي"),
+        ("فاطمـــة", "فاطمه"),
+        ("  Mohamed   ALI ", "mohamed ali"),
+    ],
+)
+def test_normalize_name(raw, expected):
+    assert normalize_name(raw) == expected
+
+
+def test_mysql_uses_fulltext_match():
+    condition = name_search_condition(Employee.search_name, "أحمد علي")
+    sql = str(condition.compile(dialect=mysql.dialect()))
+    assert sql.startswith("MATCH (employee.search_name) AGAINST (")
+    assert "IN BOOLEAN MODE" in sql
+
+
+def test_short_terms_fall_back_to_like():
+    condition = name_search_condition(Employee.search_name, "م")
+    sql = str(condition.compile(dialect=mysql.dialect()))
+    assert "LIKE" in sql
+
+
+@pytest.mark.asyncio
+async def test_search_matches_spelling_variants(session):
+    session.add(Department(id=1, name="IT"))
+    session.add(
+        Employee(
+            id=1, code=100, name="أحمد مصطفى", is_active=True, department_id=1
+        )
+    )
+    await session.commit()
+
+    stmt = select(Employee.id).where(
+        name_search_condition(Employee.search_name, "احمد مصطفي")
+    )
+    result = await session.execute(stmt)
+    assert result.scalars().all() == [1]
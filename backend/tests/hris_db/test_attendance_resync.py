@@ -0,0 +1,294 @@
+import asyncio
+import contextlib
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, update
+
+from db.database import WORKER_ID
+from db.models import Attendance, AttendanceResyncJob, Request, RequestLine
+from hris_db import attendance_resync
+from hris_db.attendance_resync import (
+    cancel_resync_job,
+    resume_interrupted_resync_jobs,
+    resume_resync_job,
+    submit_resync_job,
+)
+
+MARCH_1 = date(2025, 3, 1)
+MARCH_3 = date(2025, 3, 3)
+CHECK_IN = datetime(2025, 3, 1, 8, 0)
+CHECK_OUT = datetime(2025, 3, 1, 20, 0)
+
+# What HRIS holds, per day
+HRIS_ATTENDANCE = {
+    MARCH_1: [
+        dict(
+            id=100,
+            employee_code=10,
+            date=datetime(2025, 3, 1),
+            date_in=CHECK_IN,
+            date_out=CHECK_OUT,
+        )
+    ],
+}
+
+
+class FakeHRIS:
+    """
+    Stands in for replace_attendance_window: swaps a day of the mirror for
+    HRIS_ATTENDANCE, optionally failing once or running a hook on a day.
+    """
+
+    def __init__(self):
+        self.days = []
+        self.fail_on = None
+        self.on_day = {}
+
+    async def __call__(self, hris_session, app_session, start, end):
+        day = start.date()
+        self.days.append(day)
+        if day == self.fail_on:
+            self.fail_on = None
+            raise RuntimeError("HRIS unavailable")
+        if day in self.on_day:
+            await self.on_day[day]()
+        await app_session.execute(
+            delete(Attendance).where(
+                Attendance.date >= start, Attendance.date < end
+            )
+        )
+        rows = HRIS_ATTENDANCE.get(day, [])
+        app_session.add_all(Attendance(**row) for row in rows)
+        return len(rows), None
+
+
+@pytest.fixture
+def hris(monkeypatch, session_factory):
+    fake = FakeHRIS()
+    monkeypatch.setattr(
+        attendance_resync, "async_session_factory", session_factory
+    )
+    monkeypatch.setattr(
+        attendance_resync,
+        "hris_read_session_factory",
+        contextlib.nullcontext,
+    )
+    monkeypatch.setattr(attendance_resync, "replace_attendance_window", fake)
+    yield fake
+    attendance_resync._tasks.clear()
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    """Seeds a request on March 1st for employees 10 and 20."""
+    session.add(
+        Request(
+            id=1,
+            requester_id=1,
+            meal_id=1,
+            status_id=3,
+            request_time=datetime(2025, 3, 1, 18, 0),
+        )
+    )
+    session.add_all(
+        RequestLine(
+            id=code // 10,
+            employee_id=code,
+            employee_code=code,
+            department_id=1,
+            request_id=1,
+            meal_id=1,
+        )
+        for code in (10, 20)
+    )
+    await session.commit()
+    return session
+
+
+async def settle():
+    """Wait for the jobs started by this worker."""
+    await asyncio.gather(
+        *attendance_resync._tasks.values(), return_exceptions=True
+    )
+
+
+async def reload(session, job):
+    return await session.get(
+        AttendanceResyncJob, job.id, populate_existing=True
+    )
+
+
+async def running_elsewhere(session, heartbeat_at):
+    job = AttendanceResyncJob(
+        start_day=MARCH_1,
+        end_day=MARCH_3,
+        next_day=MARCH_1,
+        days_total=3,
+        status="running",
+        worker="other-host:1",
+        heartbeat_at=heartbeat_at,
+    )
+    session.add(job)
+    await session.commit()
+    return job
+
+
+async def request_line_attendance(session):
+    result = await session.execute(
+        select(RequestLine.attendance_in, RequestLine.attendance_out).order_by(
+            RequestLine.id
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_resumes_from_its_checkpoint(session, hris):
+    hris.fail_on = date(2025, 3, 2)
+
+    job = await submit_resync_job(session, MARCH_1, MARCH_3, None)
+    await settle()
+
+    job = await reload(session, job)
+    assert job.status == "failed"
+    assert job.error == "HRIS unavailable"
+    assert (job.days_done, job.next_day) == (1, date(2025, 3, 2))
+    assert job.worker == WORKER_ID
+
+    await resume_resync_job(session, job)
+    await settle()
+
+    job = await reload(session, job)
+    assert job.status == "completed"
+    assert job.days_done == 3 and job.next_day is None
+    # March 1st was not redone
+    assert hris.days == [
+        MARCH_1,
+        date(2025, 3, 2),
+        date(2025, 3, 2),
+        MARCH_3,
+    ]
+    assert await request_line_attendance(session) == [
+        (CHECK_IN, CHECK_OUT),
+        (None, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rerunning_a_range_changes_nothing(session, hris):
+    first = await submit_resync_job(session, MARCH_1, MARCH_1, None)
+    await settle()
+    filled = await request_line_attendance(session)
+
+    second = await submit_resync_job(session, MARCH_1, MARCH_1, None)
+    await settle()
+
+    first, second = await reload(session, first), await reload(session, second)
+    assert second.id != first.id
+    assert (first.status, first.lines_updated) == ("completed", 1)
+    assert (second.status, second.lines_updated) == ("completed", 0)
+    assert await request_line_attendance(session) == filled
+
+
+@pytest.mark.asyncio
+async def test_active_range_is_submitted_once(session, hris):
+    first = await submit_resync_job(session, MARCH_1, MARCH_3, None)
+    second = await submit_resync_job(session, MARCH_1, MARCH_3, None)
+    await settle()
+
+    assert second.id == first.id
+
+
+@pytest.mark.asyncio
+async def test_cancel_flag_stops_the_job_between_days(
+    session, session_factory, hris
+):
+    async def cancel_from_another_worker():
+        async with session_factory() as other:
+            await other.execute(
+                update(AttendanceResyncJob).values(cancel_requested=True)
+            )
+            await other.commit()
+
+    hris.on_day[MARCH_1] = cancel_from_another_worker
+
+    job = await submit_resync_job(session, MARCH_1, MARCH_3, None)
+    await settle()
+
+    job = await reload(session, job)
+    # The day in progress is finished and checkpointed, the next not started
+    assert job.status == "cancelled"
+    assert (job.days_done, job.next_day) == (1, date(2025, 3, 2))
+    assert hris.days == [MARCH_1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_flags_a_job_running_on_another_worker(session, hris):
+    job = await running_elsewhere(session, datetime.now())
+
+    job = await cancel_resync_job(session, job)
+
+    # Only its worker stops it, before its next day
+    assert job.status == "running"
+    assert job.cancel_requested
+
+
+@pytest.mark.asyncio
+async def test_cancel_ends_a_job_whose_worker_stopped(session, hris):
+    job = await running_elsewhere(session, datetime.now() - timedelta(days=1))
+
+    job = await cancel_resync_job(session, job)
+
+    assert job.status == "cancelled"
+    assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_a_live_lease_is_not_claimed(session, hris):
+    job = await running_elsewhere(session, datetime.now())
+
+    assert await resume_interrupted_resync_jobs() == 0
+    async with attendance_resync.async_session_factory() as other:
+        assert not await attendance_resync._claim(other, job.id)
+
+    job = await reload(session, job)
+    assert job.worker == "other-host:1"
+    assert hris.days == []
+
+
+@pytest.mark.asyncio
+async def test_an_expired_lease_is_resumed(session, hris):
+    job = await running_elsewhere(session, datetime.now() - timedelta(days=1))
+
+    assert await resume_interrupted_resync_jobs() == 1
+    await settle()
+
+    job = await reload(session, job)
+    assert job.status == "completed"
+    assert job.worker == WORKER_ID
+    assert hris.days == [MARCH_1, date(2025, 3, 2), MARCH_3]
+
+
+@pytest.mark.asyncio
+async def test_a_job_claimed_by_another_worker_stops(
+    session, session_factory, hris
+):
+    async def taken_over():
+        async with session_factory() as other:
+            await other.execute(
+                update(AttendanceResyncJob).values(worker="other-host:1")
+            )
+            await other.commit()
+
+    hris.on_day[MARCH_1] = taken_over
+
+    job = await submit_resync_job(session, MARCH_1, MARCH_3, None)
+    await settle()
+
+    job = await reload(session, job)
+    # Its day was rolled back and the job left to the new owner
+    assert job.status == "running"
+    assert (job.days_done, job.next_day) == (0, MARCH_1)
+    assert hris.days == [MARCH_1]
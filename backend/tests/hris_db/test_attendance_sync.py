@@ -0,0 +1,156 @@
+import contextlib
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+
+from db.models import Attendance, SyncState
+from hris_db import attendance_sync
+from hris_db.attendance_sync import SYNC_NAME, sync_attendance
+from hris_db.models import HRISEmployeeAttendanceWithDetails
+
+NOW = datetime(2025, 3, 10, 12, 0)
+
+source = HRISEmployeeAttendanceWithDetails.__table__
+
+
+def punch(id, date, code="1001"):
+    return {
+        "Id": id,
+        "EmployeeCode": code,
+        "Date": date,
+        "DateIn": date + timedelta(hours=8),
+        "DateOut": date + timedelta(hours=17),
+    }
+
+
+@pytest_asyncio.fixture
+async def hris_session(engine, session_factory, monkeypatch):
+    """
+    A session on a copy of the HRIS attendance view, next to the
+    application tables in the test database.
+    """
+    monkeypatch.setattr(
+        attendance_sync,
+        "hris_call",
+        lambda operation: contextlib.nullcontext(),
+    )
+    # Small batches, so a window is written in several
+    monkeypatch.setattr(attendance_sync, "ATTENDANCE_SYNC_BATCH_SIZE", 2)
+    async with engine.begin() as conn:
+        await conn.run_sync(source.create)
+    async with session_factory() as session:
+        yield session
+
+
+async def hris_has(hris_session, *rows):
+    await hris_session.execute(insert(source), list(rows))
+    await hris_session.commit()
+
+
+async def local_attendance(session):
+    result = await session.execute(
+        select(Attendance.id, Attendance.date).order_by(Attendance.id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_first_sync_starts_initial_days_back(session, hris_session):
+    await hris_has(
+        hris_session,
+        punch(1, NOW - timedelta(days=120)),
+        punch(2, NOW - timedelta(days=3)),
+        punch(3, NOW - timedelta(days=2)),
+        punch(4, NOW - timedelta(days=1)),
+        # Not numeric: cannot match a request line
+        punch(5, NOW - timedelta(days=1), code="A-7"),
+    )
+
+    assert await sync_attendance(hris_session, session, now=NOW) == 3
+
+    state = await session.get(SyncState, SYNC_NAME)
+    assert state.watermark == NOW - timedelta(days=1)
+    assert state.last_synced_at == NOW
+    assert [id for id, _ in await local_attendance(session)] == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_late_arrivals_are_picked_up(session, hris_session):
+    watermark = NOW - timedelta(hours=1)
+    await hris_has(hris_session, punch(1, watermark))
+    await sync_attendance(hris_session, session, now=NOW)
+
+    # Recorded after the last sync, dated before its watermark
+    late = punch(2, watermark - timedelta(hours=24))
+    too_late = punch(3, watermark - timedelta(days=5))
+    await hris_has(hris_session, late, too_late)
+    later = NOW + timedelta(minutes=10)
+    assert await sync_attendance(hris_session, session, now=later) == 2
+
+    state = await session.get(SyncState, SYNC_NAME)
+    # An older record does not move the watermark back
+    assert state.watermark == watermark
+    assert [id for id, _ in await local_attendance(session)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_records_deleted_in_hris_leave_the_window(session, hris_session):
+    session.add(
+        Attendance(
+            id=9,
+            employee_code=1001,
+            date=NOW - timedelta(days=1),
+        )
+    )
+    session.add(SyncState(name=SYNC_NAME, watermark=NOW))
+    await session.commit()
+    await hris_has(hris_session, punch(1, NOW - timedelta(hours=2)))
+
+    await sync_attendance(hris_session, session, now=NOW)
+
+    assert await local_attendance(session) == [(1, NOW - timedelta(hours=2))]
+
+
+@pytest.mark.asyncio
+async def test_moved_record_is_stored_once(session, hris_session):
+    # Synced long ago, then corrected in HRIS to a date inside the window
+    old_date = NOW - timedelta(days=30)
+    session.add(Attendance(id=7, employee_code=1001, date=old_date))
+    session.add(SyncState(name=SYNC_NAME, watermark=NOW))
+    await session.commit()
+    await hris_has(hris_session, punch(7, NOW - timedelta(hours=3)))
+
+    await sync_attendance(hris_session, session, now=NOW)
+
+    assert await local_attendance(session) == [(7, NOW - timedelta(hours=3))]
+
+
+@pytest.mark.asyncio
+async def test_repeated_record_id_fails_the_sync(
+    session, hris_session, monkeypatch
+):
+    class FannedOut:
+        """The view's rows, each repeated as if a join fanned it out."""
+
+        def __init__(self, result):
+            self.result = result
+
+        async def partitions(self):
+            async for partition in self.result.partitions():
+                yield [copy for row in partition for copy in (row, row)]
+
+    stream_rows = hris_session.stream
+
+    async def stream(statement):
+        return FannedOut(await stream_rows(statement))
+
+    await hris_has(hris_session, punch(1, NOW - timedelta(hours=1)))
+    monkeypatch.setattr(hris_session, "stream", stream)
+
+    with pytest.raises(ValueError, match="record 1 twice"):
+        await sync_attendance(hris_session, session, now=NOW)
+    await session.rollback()
+
+    assert await session.get(SyncState, SYNC_NAME) is None
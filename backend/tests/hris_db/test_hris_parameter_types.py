@@ -0,0 +1,65 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import Column, MetaData, Table
+from sqlalchemy.dialects.mssql import pyodbc
+from sqlalchemy.schema import CreateTable
+
+from hris_db.models import HRISEmployeeAttendanceWithDetails, HRISEmployee
+from hris_db.records import select_attendance_records
+
+# The pyodbc type codes passed to cursor.setinputsizes()
+DBAPI = SimpleNamespace(SQL_VARCHAR="SQL_VARCHAR", SQL_WVARCHAR="SQL_WVARCHAR")
+
+dialect = pyodbc.dialect()
+
+
+def bound_parameter_types(statement):
+    """
+    Compile a statement for mssql+pyodbc and return, per bound parameter,
+    its SQL type and the type code it is sent to the driver with.
+    """
+    compiled = statement.compile(dialect=dialect)
+    types = {}
+    for bind, name in compiled.bind_names.items():
+        impl = bind.type.dialect_impl(dialect)
+        dbapi_type = None
+        if hasattr(impl, "length"):
+            dbapi_type = impl.get_dbapi_type(DBAPI)
+        types[name] = (str(bind.type), dbapi_type)
+    return types
+
+
+def test_attendance_lookup_binds_codes_as_nvarchar():
+    source = HRISEmployeeAttendanceWithDetails
+    statement = (
+        select_attendance_records()
+        .where(source.employee_code.in_(["1001", "1002"]))
+        .where(source.date.between(datetime(2025, 3, 1), datetime(2025, 4, 1)))
+    )
+
+    types = bound_parameter_types(statement)
+
+    assert types["EmployeeCode_1"] == ("NVARCHAR(50)", "SQL_WVARCHAR")
+    assert types["Date_1"][0] == "DATETIME"
+    # The column is compared as is, never wrapped in a conversion
+    sql = str(statement.compile(dialect=dialect))
+    assert "CAST" not in sql and "CONVERT" not in sql
+
+
+def test_temp_key_table_matches_the_joined_column():
+    column = HRISEmployeeAttendanceWithDetails.employee_code
+    # Built the way hris_db.queries.read_with_temp_table builds it
+    key_table = Table(
+        "#keys_test", MetaData(), Column("key", column.type, primary_key=True)
+    )
+
+    ddl = str(CreateTable(key_table).compile(dialect=dialect))
+
+    assert "[key] NVARCHAR(50) NOT NULL" in ddl
+
+
+def test_hris_text_columns_are_nvarchar():
+    for column in HRISEmployee.__table__.columns:
+        if column.type.python_type is str:
+            assert column.type.compile(dialect=dialect).startswith("NVARCHAR(")
@@ -0,0 +1,110 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from hris_db import queries
+from hris_db.queries import read_in_batches
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeHRIS:
+    """
+    Stands in for the HRIS sessions: a "statement" is the batch of keys it
+    returns as rows. Tracks the batches running at once; a batch can be
+    delayed, parked until `release` is set, or fail.
+    """
+
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+        self.delays = {}
+        self.fail_on = None
+        self.release = asyncio.Event()
+        self.release.set()
+        self.cancelled = []
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        yield self
+
+    async def execute(self, batch):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(batch[0], 0))
+            if batch[0] == self.fail_on:
+                raise ConnectionError(f"batch {batch[0]} failed")
+            await self.release.wait()
+            return FakeResult(list(batch))
+        except asyncio.CancelledError:
+            self.cancelled.append(batch[0])
+            raise
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def hris(monkeypatch):
+    fake = FakeHRIS()
+    monkeypatch.setattr(queries, "hris_read_session_factory", fake.session)
+    monkeypatch.setattr(
+        queries, "hris_call", lambda operation: contextlib.nullcontext()
+    )
+    return fake
+
+
+def as_is(batch):
+    return batch
+
+
+@pytest.mark.asyncio
+async def test_results_are_in_batch_order(hris):
+    # The first batches finish last
+    hris.delays = {0: 0.03, 2: 0.02, 4: 0.01}
+
+    rows = await read_in_batches(as_is, list(range(7)), 2, "test")
+
+    assert rows == list(range(7))
+
+
+@pytest.mark.asyncio
+async def test_no_keys_runs_no_query(hris):
+    assert await read_in_batches(as_is, [], 2, "test") == []
+    assert hris.most_running == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped(hris):
+    hris.delays = {key: 0.01 for key in range(10)}
+
+    rows = await read_in_batches(
+        as_is, list(range(10)), 1, "test", concurrency=3
+    )
+
+    assert len(rows) == 10
+    assert hris.most_running == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_cancels_the_others(hris):
+    hris.fail_on = 2
+    hris.delays = {2: 0.01}
+    # The other batches never finish on their own
+    hris.release.clear()
+
+    with pytest.raises(ConnectionError, match="batch 2 failed"):
+        await read_in_batches(as_is, list(range(4)), 1, "test")
+
+    assert sorted(hris.cancelled) == [0, 1, 3]
+    assert hris.running == 0
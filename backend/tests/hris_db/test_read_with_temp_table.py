@@ -0,0 +1,126 @@
+import contextlib
+
+import pytest
+from sqlalchemy.dialects.mssql import pyodbc
+from sqlalchemy.schema import CreateTable
+
+from hris_db import queries
+from hris_db.models import HRISEmployeeAttendanceWithDetails
+from hris_db.queries import read_with_temp_table
+from hris_db.records import select_attendance_records
+
+dialect = pyodbc.dialect()
+source = HRISEmployeeAttendanceWithDetails
+
+
+class FakeConnection:
+    """
+    Records what read_with_temp_table runs, compiled for mssql+pyodbc.
+    The lookup itself (the last statement) returns no rows, or fails.
+    """
+
+    def __init__(self):
+        self.ddl = []
+        self.inserts = []
+        self.lookup = None
+        self.lookup_error = None
+        self.drop_error = None
+        self.invalidated = False
+
+    async def run_sync(self, operation):
+        table = operation.__self__
+        if operation.__name__ == "create":
+            self.ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        else:
+            self.ddl.append(f"DROP TABLE {table.name}")
+            if self.drop_error is not None:
+                raise self.drop_error
+
+    async def execute(self, statement):
+        compiled = statement.compile(dialect=dialect)
+        if statement.is_insert:
+            self.inserts.append(compiled.params)
+            return None
+        self.lookup = str(compiled)
+        if self.lookup_error is not None:
+            raise self.lookup_error
+        return self
+
+    async def invalidate(self):
+        self.invalidated = True
+
+    def all(self):
+        return []
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = FakeConnection()
+
+    class FakeSession:
+        async def connection(self):
+            return conn
+
+    @contextlib.asynccontextmanager
+    async def session_factory():
+        yield FakeSession()
+
+    monkeypatch.setattr(queries, "hris_read_session_factory", session_factory)
+    monkeypatch.setattr(
+        queries, "hris_call", lambda operation: contextlib.nullcontext()
+    )
+    return conn
+
+
+def build_statement(keys):
+    return select_attendance_records().where(source.employee_code.in_(keys))
+
+
+async def lookup(codes):
+    return await read_with_temp_table(
+        build_statement,
+        codes,
+        source.employee_code.type,
+        "test",
+        scalars=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_keys_are_joined_through_a_temp_table(conn):
+    codes = [str(code) for code in range(2500)] + ["1", "2"]
+
+    assert await lookup(codes) == []
+
+    create, drop = conn.ddl
+    table = create.split("[")[1].split("]")[0]
+    assert table.startswith("#keys_")
+    assert "[key] NVARCHAR(50) NOT NULL" in create
+    # Duplicates are dropped, at most 1,000 rows per INSERT
+    assert [len(params) for params in conn.inserts] == [1000, 1000, 500]
+    assert f"IN (SELECT [{table}].[key] \nFROM [{table}])" in conn.lookup
+    assert drop == f"DROP TABLE {table}"
+    assert not conn.invalidated
+
+
+@pytest.mark.asyncio
+async def test_temp_table_is_dropped_when_the_lookup_fails(conn):
+    conn.lookup_error = ConnectionError("lookup failed")
+
+    with pytest.raises(ConnectionError, match="lookup failed"):
+        await lookup(["1001"])
+
+    assert conn.ddl[-1].startswith("DROP TABLE #keys_")
+    assert not conn.invalidated
+
+
+@pytest.mark.asyncio
+async def test_failed_drop_keeps_the_lookup_error(conn):
+    conn.lookup_error = ConnectionError("lookup failed")
+    conn.drop_error = ConnectionError("connection is broken")
+
+    with pytest.raises(ConnectionError, match="lookup failed"):
+        await lookup(["1001"])
+
+    # The connection is not reused with the table still in it
+    assert conn.invalidated
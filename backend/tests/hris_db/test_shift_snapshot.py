@@ -0,0 +1,150 @@
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+from hris_db import shift_snapshot as module
+from hris_db.shift_snapshot import ShiftSnapshot
+
+MONDAY = date(2025, 3, 3)
+TUESDAY = date(2025, 3, 4)
+WEDNESDAY = date(2025, 3, 5)
+
+# What HRIS holds: day -> employee_id -> duration_hours
+HRIS_SHIFTS = {
+    MONDAY: {10: 8.0, 20: 12.0},
+    TUESDAY: {10: 8.0},
+    WEDNESDAY: {10: 6.0},
+}
+
+
+class FakeHRIS:
+    """
+    Stands in for ShiftSnapshot._load. Records every query, can fail, and
+    can park queries until `release` is set.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.fail = False
+        self.release = None
+
+    async def __call__(self, hris_session, day, employee_ids=None):
+        self.queries.append((day, employee_ids and sorted(employee_ids)))
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise ConnectionError("HRIS unavailable")
+        hours = HRIS_SHIFTS.get(day, {})
+        if employee_ids is None:
+            return dict(hours)
+        return {key: hours[key] for key in employee_ids if key in hours}
+
+
+@pytest.fixture
+def hris():
+    return FakeHRIS()
+
+
+@pytest.fixture
+def snapshot(hris):
+    snapshot = ShiftSnapshot()
+    snapshot._load = hris
+    return snapshot
+
+
+@pytest.mark.asyncio
+async def test_loaded_day_is_served_from_the_snapshot(snapshot, hris):
+    first = await snapshot.get_hours(None, [10, 20], MONDAY)
+    second = await snapshot.get_hours(None, [20], MONDAY)
+
+    assert first == {10: 8.0, 20: 12.0} and not first.stale
+    assert second == {20: 12.0}
+    assert hris.queries == [(MONDAY, None)]
+
+
+@pytest.mark.asyncio
+async def test_missing_employees_are_looked_up_once(snapshot, hris):
+    await snapshot.get_hours(None, [10], TUESDAY)
+    # Employee 20 got an assignment after the day was loaded
+    HRIS_SHIFTS[TUESDAY][20] = 12.0
+    try:
+        assert await snapshot.get_hours(None, [20, 30], TUESDAY) == {20: 12.0}
+        # 30 has no assignment and is not queried again
+        assert await snapshot.get_hours(None, [20, 30], TUESDAY) == {20: 12.0}
+    finally:
+        del HRIS_SHIFTS[TUESDAY][20]
+
+    assert hris.queries == [(TUESDAY, None), (TUESDAY, [20, 30])]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(snapshot, hris):
+    hris.release = asyncio.Event()
+
+    lookups = [
+        asyncio.create_task(snapshot.get_hours(None, [10], MONDAY))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    hris.release.set()
+    results = await asyncio.gather(*lookups)
+
+    assert all(result == {10: 8.0} for result in results)
+    assert hris.queries == [(MONDAY, None)]
+
+
+@pytest.mark.asyncio
+async def test_loaded_days_are_served_during_another_load(snapshot, hris):
+    await snapshot.get_hours(None, [10], MONDAY)
+    hris.release = asyncio.Event()
+
+    loading = asyncio.create_task(snapshot.get_hours(None, [10], TUESDAY))
+    await asyncio.sleep(0)
+    # Tuesday's HRIS query is parked; Monday does not wait for it
+    hit = await asyncio.wait_for(
+        snapshot.get_hours(None, [20], MONDAY), timeout=1
+    )
+    hris.release.set()
+
+    assert hit == {20: 12.0}
+    assert await loading == {10: 8.0}
+
+
+@pytest.mark.asyncio
+async def test_stale_day_is_reloaded(snapshot, hris, monkeypatch):
+    await snapshot.get_hours(None, [10], MONDAY)
+    monkeypatch.setitem(HRIS_SHIFTS, MONDAY, {10: 9.0})
+    snapshot._days[MONDAY].loaded_at = time.monotonic() - 3600 * 24
+
+    result = await snapshot.get_hours(None, [10], MONDAY)
+
+    assert result == {10: 9.0} and not result.stale
+    assert hris.queries == [(MONDAY, None), (MONDAY, None)]
+
+
+@pytest.mark.asyncio
+async def test_stale_day_is_served_when_hris_fails(snapshot, hris):
+    await snapshot.get_hours(None, [10], MONDAY)
+    snapshot._days[MONDAY].loaded_at = time.monotonic() - 3600 * 24
+    hris.fail = True
+
+    result = await snapshot.get_hours(None, [10, 20], MONDAY)
+    unloaded = await snapshot.get_hours(None, [10], TUESDAY)
+
+    assert result == {10: 8.0, 20: 12.0} and result.stale
+    assert unloaded == {} and unloaded.stale
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_day_is_evicted(snapshot, hris, monkeypatch):
+    monkeypatch.setattr(module, "SHIFT_SNAPSHOT_DAYS", 2)
+    await snapshot.get_hours(None, [10], MONDAY)
+    await snapshot.get_hours(None, [10], TUESDAY)
+    # Monday is used again, so Tuesday is the least recently used
+    await snapshot.get_hours(None, [10], MONDAY)
+
+    await snapshot.get_hours(None, [10], WEDNESDAY)
+
+    assert list(snapshot._days) == [MONDAY, WEDNESDAY]
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+import pytest
+
+from routers.utils.pagination import RequestCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = RequestCursor(
+        request_time=datetime(2025, 3, 1, 13, 45, 10), id=4821, page=7
+    )
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+
+
+@pytest.mark.parametrize("value", ["", "not-a-cursor", "eyJ0IjoxfQ"])
+def test_invalid_cursor_raises_value_error(value):
+    with pytest.raises(ValueError):
+        decode_cursor(value)
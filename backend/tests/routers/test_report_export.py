@@ -0,0 +1,316 @@
+import os
+import asyncio
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from db.database import WORKER_ID
+from db.models import (
+    Account,
+    Department,
+    Employee,
+    ExportJob,
+    Meal,
+    Request,
+    RequestLine,
+)
+from routers.utils import export_jobs, parquet_export, report_export
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    """
+    Seeds two accepted request lines and points the export at the factory.
+    """
+    factory = session_factory
+    async with factory() as session:
+        session.add_all(
+            [
+                Department(id=1, name="IT"),
+                Meal(id=1, name="Dinner"),
+                Account(id=1, username="requester", title="Manager"),
+                Employee(
+                    id=1,
+                    code=10,
+                    name="أحمد علي",
+                    is_active=True,
+                    department_id=1,
+                ),
+                Request(
+                    id=1,
+                    requester_id=1,
+                    meal_id=1,
+                    status_id=3,
+                    request_time=datetime(2025, 3, 1, 18, 0),
+                ),
+            ]
+        )
+        session.add_all(
+            [
+                RequestLine(
+                    request_id=1,
+                    employee_id=1,
+                    employee_code=10,
+                    department_id=1,
+                    meal_id=1,
+                    notes=note,
+                )
+                for note in ("first", 'with "quotes", commas')
+            ]
+        )
+        await session.commit()
+
+    monkeypatch.setattr(report_export, "read_session_factory", factory)
+    monkeypatch.setattr(export_jobs, "read_session_factory", factory)
+    monkeypatch.setattr(export_jobs, "async_session_factory", factory)
+    monkeypatch.setattr(parquet_export, "read_session_factory", factory)
+    monkeypatch.setattr(report_export, "EXPORT_BATCH_SIZE", 1)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_rows_with_bom(session_factory):
+    chunks = [
+        chunk
+        async for chunk in report_export.stream_report_csv(None, None, None)
+    ]
+    content = b"".join(chunks).decode("utf-8")
+
+    assert content.startswith("\ufeffID,Employee Code,Employee Name")
+    assert "أحمد علي" in content
+    assert '"with ""quotes"", commas"' in content
+    assert "2025-03-01 18:00:00" in content
+    # Header plus one chunk per row at a batch size of 1
+    assert len(chunks) == 3
+
+
+async def run_export(session, owner_id, format="csv"):
+    job = await export_jobs.submit_export_job(
+        session, owner_id, format, None, None, None
+    )
+    await export_jobs._tasks[job.id]
+    return await export_jobs.read_export_job(session, job.id)
+
+
+def running_elsewhere(owner_id, heartbeat_at):
+    return ExportJob(
+        id=f"remote{owner_id}",
+        owner_id=owner_id,
+        format="csv",
+        status="running",
+        worker="other-host:1",
+        heartbeat_at=heartbeat_at,
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_job_writes_file_with_progress(
+    session_factory, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+
+    async with session_factory() as session:
+        job = await run_export(session, 1)
+
+        assert job.status == "completed"
+        assert job.worker == WORKER_ID
+        assert job.total_rows == job.rows_written == 2
+        assert export_jobs.export_job_as_dict(job)["progress"] == 100.0
+        with open(job.path, encoding="utf-8-sig") as handle:
+            assert len(handle.read().splitlines()) == 3
+
+        # Expired jobs are forgotten and their files removed
+        monkeypatch.setattr(export_jobs, "EXPORT_TTL_MINUTES", 0)
+        assert await export_jobs.cleanup_expired_exports() == 1
+        assert await export_jobs.read_export_job(session, job.id) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_are_limited_per_user_and_cancellable(
+    session_factory, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "EXPORT_MAX_JOBS_PER_USER", 1)
+    started, release = asyncio.Event(), asyncio.Event()
+    write_csv = export_jobs._WRITERS["csv"]
+
+    async def gated_writer(job, path):
+        started.set()
+        await release.wait()
+        await write_csv(job, path)
+
+    monkeypatch.setitem(export_jobs._WRITERS, "csv", gated_writer)
+
+    async with session_factory() as session:
+        job = await export_jobs.submit_export_job(
+            session, 7, "csv", None, None, None
+        )
+        await started.wait()
+        with pytest.raises(export_jobs.ExportLimitError):
+            await export_jobs.submit_export_job(
+                session, 7, "csv", None, None, None
+            )
+
+        job = await export_jobs.cancel_export_job(session, job)
+        assert job.status == "cancelled"
+        assert list(tmp_path.iterdir()) == []
+
+        # The cancelled job no longer counts against the limit
+        release.set()
+        other = await run_export(session, 7)
+        assert other.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_other_workers_count_and_are_cancelled_by_flag(
+    session_factory, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "EXPORT_MAX_JOBS_PER_USER", 1)
+
+    async with session_factory() as session:
+        remote = running_elsewhere(7, datetime.now())
+        session.add(remote)
+        await session.commit()
+
+        # The limit holds across workers
+        with pytest.raises(export_jobs.ExportLimitError):
+            await export_jobs.submit_export_job(
+                session, 7, "csv", None, None, None
+            )
+
+        # Cancelling flags the job for the worker running it
+        remote = await export_jobs.cancel_export_job(session, remote)
+        assert remote.cancel_requested
+        assert remote.status == "running"
+
+        # A job that was claimed cannot be claimed again
+        assert await export_jobs._claim(remote.id) is None
+
+
+@pytest.mark.asyncio
+async def test_running_export_stops_when_flagged_from_another_worker(
+    session_factory, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "EXPORT_HEARTBEAT_SECONDS", 0.01)
+    started = asyncio.Event()
+
+    async def never_ending_writer(job, path):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setitem(export_jobs._WRITERS, "csv", never_ending_writer)
+
+    async with session_factory() as session:
+        job = await export_jobs.submit_export_job(
+            session, 1, "csv", None, None, None
+        )
+        await started.wait()
+
+        # What cancel_export_job does on a worker that does not run the job
+        job.cancel_requested = True
+        session.add(job)
+        await session.commit()
+        await export_jobs._tasks[job.id]
+
+        job = await export_jobs.read_export_job(session, job.id)
+        assert job.status == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_cleanup_fails_jobs_whose_worker_stopped(session_factory):
+    async with session_factory() as session:
+        session.add(running_elsewhere(1, datetime.now() - timedelta(hours=1)))
+        session.add(running_elsewhere(2, datetime.now()))
+        await session.commit()
+
+        await export_jobs.cleanup_expired_exports()
+
+        stale = await export_jobs.read_export_job(session, "remote1")
+        alive = await export_jobs.read_export_job(session, "remote2")
+        assert (stale.status, stale.error) == ("failed", "Export interrupted.")
+        assert alive.status == "running"
+
+
+@pytest.mark.asyncio
+async def test_cleanup_fails_jobs_never_claimed(session_factory):
+    async with session_factory() as session:
+        for owner_id, created_at in (
+            # Its worker stopped before claiming it
+            (1, datetime.now() - timedelta(hours=1)),
+            (2, datetime.now()),
+        ):
+            session.add(
+                ExportJob(
+                    id=f"queued{owner_id}",
+                    owner_id=owner_id,
+                    format="csv",
+                    created_at=created_at,
+                )
+            )
+        await session.commit()
+
+        await export_jobs.cleanup_expired_exports()
+
+        stale = await export_jobs.read_export_job(session, "queued1")
+        fresh = await export_jobs.read_export_job(session, "queued2")
+        # No longer holds one of the user's active export slots
+        assert stale.status == "failed"
+        assert fresh.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_cleanup_removes_stray_staging_directories(
+    session_factory, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+    async with session_factory() as session:
+        session.add(running_elsewhere(1, datetime.now()))
+        await session.commit()
+    active = tmp_path / "remote1.csv.part.d"
+    stray = tmp_path / "crashed.parquet.zip.part.d"
+    for directory in (active, stray):
+        (directory / "day=2025-03-01").mkdir(parents=True)
+        old = (datetime.now() - timedelta(days=1)).timestamp()
+        os.utime(directory, (old, old))
+
+    assert await export_jobs.cleanup_expired_exports() == 1
+
+    assert active.exists()
+    assert not stray.exists()
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_job_writes_typed_daily_partitions(
+    session_factory, tmp_path, monkeypatch
+):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+
+    async with session_factory() as session:
+        job = await run_export(session, 1, "parquet")
+
+    assert job.status == "completed"
+    assert job.rows_written == 2
+    assert export_jobs.export_job_filename(job) == "request-lines.parquet.zip"
+    # Only the archive is left behind
+    assert [path.name for path in tmp_path.iterdir()] == [
+        f"{job.id}.parquet.zip"
+    ]
+
+    extracted = tmp_path / "extracted"
+    with zipfile.ZipFile(job.path) as archive:
+        assert archive.namelist() == ["day=2025-03-01/part-0.parquet"]
+        archive.extractall(extracted)
+
+    table = pq.read_table(extracted / "day=2025-03-01" / "part-0.parquet")
+    assert table.num_rows == 2
+    assert str(table.schema.field("employee_code").type) == "int64"
+    assert table.schema.field("request_time").type.tz == "Africa/Cairo"
+    row = table.to_pylist()[0]
+    assert row["employee_name"] == "أحمد علي"
+    assert row["request_time"].strftime("%Y-%m-%d %H:%M") == "2025-03-01 18:00"
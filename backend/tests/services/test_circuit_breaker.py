@@ -0,0 +1,65 @@
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.metrics import render_metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def fail(breaker: CircuitBreaker) -> None:
+    with pytest.raises(ConnectionError):
+        async with breaker.guard():
+            raise ConnectionError("HRIS unreachable")
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test_open", failure_threshold=2, reset_timeout=30, clock=clock
+    )
+
+    await fail(breaker)
+    assert breaker.state == "closed"
+    await fail(breaker)
+    assert breaker.state == "open"
+
+    # The call is not attempted while the breaker is open
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        async with breaker.guard():
+            calls.append(1)
+    assert calls == []
+
+    output = render_metrics()
+    assert 'circuit_breaker_state{breaker="test_open"} 2' in output
+    assert 'circuit_breaker_rejections_total{breaker="test_open"} 1' in output
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test_probe", failure_threshold=1, reset_timeout=30, clock=clock
+    )
+    await fail(breaker)
+
+    # After the reset timeout one probe goes through and fails: open again
+    clock.now = 31
+    await fail(breaker)
+    assert breaker.state == "open"
+
+    clock.now = 62
+    async with breaker.guard():
+        assert breaker.state == "half_open"
+        # Only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            async with breaker.guard():
+                pass
+    assert breaker.state == "closed"
@@ -0,0 +1,44 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from db.models import Request
+from services.count_cache import (
+    install_count_invalidation,
+    invalidate_counts,
+    resolve_count,
+)
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    """
+    Installs the count invalidation hooks and starts from an empty cache.
+    """
+    install_count_invalidation()
+    invalidate_counts()
+    return session
+
+
+@pytest.mark.asyncio
+async def test_cached_count_is_dropped_on_write(session):
+    count_stmt = select(func.count()).select_from(Request)
+
+    assert await resolve_count(session, count_stmt, "requests", "cached") == 0
+
+    # Rows added without the ORM do not invalidate: the cached value is served
+    await session.execute(
+        Request.__table__.insert().values(requester_id=1, meal_id=1)
+    )
+    assert await resolve_count(session, count_stmt, "requests", "cached") == 0
+    assert await resolve_count(session, count_stmt, "requests", "exact") == 1
+
+    session.add(Request(requester_id=1, meal_id=1))
+    await session.commit()
+    assert await resolve_count(session, count_stmt, "requests", "cached") == 2
+
+
+@pytest.mark.asyncio
+async def test_none_mode_skips_the_count(session):
+    count_stmt = select(func.count()).select_from(Request)
+    assert await resolve_count(session, count_stmt, "requests", "none") is None
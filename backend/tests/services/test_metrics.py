@@ -0,0 +1,63 @@
+import pytest
+from fastapi import BackgroundTasks
+
+from services.metrics import (
+    REGISTRY,
+    Histogram,
+    add_tracked_task,
+    background_tasks_pending,
+    external_call_duration,
+    observe_external_call,
+    render_metrics,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(
+        "test_latency_seconds",
+        "Latency used by the tests.",
+        labels=("route",),
+        buckets=(0.1, 1.0),
+    )
+    histogram.observe(0.05, route="/requests")
+    histogram.observe(0.5, route="/requests")
+
+    output = render_metrics()
+
+    assert 'test_latency_seconds_bucket{route="/requests",le="0.1"} 1' in output
+    assert 'test_latency_seconds_bucket{route="/requests",le="1"} 2' in output
+    assert 'test_latency_seconds_bucket{route="/requests",le="+Inf"} 2' in output
+    assert 'test_latency_seconds_count{route="/requests"} 2' in output
+    assert histogram in REGISTRY
+
+
+@pytest.mark.asyncio
+async def test_external_call_records_error_outcome():
+    with pytest.raises(RuntimeError):
+        async with observe_external_call("ldap", "search"):
+            raise RuntimeError("server down")
+
+    assert ("ldap", "search", "error") in external_call_duration._values
+
+
+@pytest.mark.asyncio
+async def test_tracked_task_is_pending_from_scheduling_to_completion():
+    pending = background_tasks_pending._values.get((), 0.0)
+    background_tasks = BackgroundTasks()
+    calls = []
+
+    async def task(value):
+        assert background_tasks_pending._values[()] == pending + 1
+        calls.append(value)
+
+    add_tracked_task(background_tasks, task, 1)
+    assert background_tasks_pending._values[()] == pending + 1
+
+    await background_tasks()
+
+    assert calls == [1]
+    assert background_tasks_pending._values[()] == pending
+
+
+def test_metrics_registered_by_a_test_are_dropped():
+    assert all(metric.name != "test_latency_seconds" for metric in REGISTRY)
@@ -0,0 +1,75 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    delete,
+    insert,
+    text,
+    update,
+)
+from sqlalchemy.exc import OperationalError
+
+from services.query_stats import (
+    fingerprint,
+    install_query_stats,
+    start_request_stats,
+)
+
+
+@pytest_asyncio.fixture
+async def engine(engine):
+    """
+    Installs the query hooks on the SQLite engine.
+    """
+    install_query_stats(engine)
+    return engine
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    first = fingerprint(
+        "SELECT * FROM role WHERE id IN (?, ?, ?) AND name = 'a'"
+    )
+    second = fingerprint("SELECT *  FROM role WHERE id IN (?) AND name = 'bb'")
+    assert first == second == "SELECT * FROM role WHERE id IN (?) AND name = ?"
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_counted(engine):
+    stats = start_request_stats()
+
+    async with engine.connect() as conn:
+        for user_id in range(12):
+            await conn.execute(text("SELECT :id"), {"id": user_id})
+
+    assert stats.queries == 12
+    assert stats.db_time > 0
+    assert list(stats.repeated(threshold=10).values()) == [12]
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_nothing_on_the_connection(engine):
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+        raw = await conn.get_raw_connection()
+        assert "query_start" not in raw.info
+
+
+@pytest.mark.asyncio
+async def test_written_rows_are_not_counted_as_returned(engine):
+    table = Table("counted", MetaData(), Column("id", Integer))
+    async with engine.begin() as conn:
+        await conn.run_sync(table.create)
+    stats = start_request_stats()
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(table), [{"id": 1}, {"id": 2}, {"id": 3}])
+        await conn.execute(update(table).values(id=table.c.id + 1))
+        await conn.execute(delete(table))
+
+    assert stats.queries == 3
+    assert stats.rows == 0
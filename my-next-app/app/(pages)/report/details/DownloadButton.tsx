@@ -2,28 +2,52 @@
 
 import { Button } from "@/components/ui/button";
 import { Download as DownloadIcon } from "lucide-react";
-import { fetchReportDetails } from "@/lib/actions/report-details";
-import { tableDownload } from "@/components/Table/table-download";
+import clientAxiosInstance from "@/lib/clientAxiosInstance";
 
 interface DownloadButtonProps {
   query: string;
-  page: number;
   startDate: string;
   endDate: string;
 }
 
+/**
+ * Downloads the report details from the streaming CSV export endpoint,
+ * which reads the rows in batches on the server instead of returning every
+ * line of the range in one JSON response.
+ */
 export default function DownloadButton({
   query,
-  page,
   startDate,
   endDate,
 }: DownloadButtonProps) {
   async function handleDownload() {
-    console.log("Inside download");
-    const download = true;
-    const response = await fetchReportDetails(query, page, startDate, endDate, download);
-    if (response?.request_lines) {
-      await tableDownload(response.request_lines);
+    try {
+      const response = await clientAxiosInstance.get(
+        "/report/details/export.csv",
+        {
+          params: {
+            ...(query && { query }),
+            ...(startDate && { start_time: startDate }),
+            ...(endDate && { end_time: endDate }),
+          },
+          responseType: "blob",
+        }
+      );
+
+      const disposition: string = response.headers["content-disposition"] ?? "";
+      const filename =
+        disposition.match(/filename="?([^"]+)"?/)?.[1] ?? "report_details.csv";
+
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = filename;
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error("Error downloading report details:", error);
     }
   }
 
@@ -22,7 +22,6 @@ interface PageProps {
 export default function Page({ searchParams }: PageProps) {
   // Extract query parameters for the DownloadButton
   const query = searchParams?.query || "";
-  const page = Number(searchParams?.page) || 1;
   const startDate = searchParams?.startDate || "";
   const endDate = searchParams?.endDate || "";
 
@@ -40,7 +39,6 @@ export default function Page({ searchParams }: PageProps) {
           <URLSwitch placeholder="Update Attendance" />
           <DownloadButton
             query={query}
-            page={page}
             startDate={startDate}
             endDate={endDate}
           />
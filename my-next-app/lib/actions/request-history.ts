@@ -3,6 +3,12 @@
 import axiosInstance from '@/lib/axiosInstance';
 import { cookies } from 'next/headers';
 
+// Read-your-writes flag set by the backend after a write. Server actions call
+// the backend from the server, so the flag is kept in a browser cookie here
+// and echoed back as a header on the next reads.
+const READ_PRIMARY_COOKIE = 'read_primary_until';
+const READ_PRIMARY_HEADER = 'x-read-primary-until';
+
 /**
  * Fetches the history of requests.
  *
@@ -24,9 +30,14 @@ export async function getHistoryRequests(page: number = 1): Promise<RequestsResp
       delete axiosInstance.defaults.headers.common['Authorization'];
     }
 
+    const readPrimaryUntil = cookieStore.get(READ_PRIMARY_COOKIE)?.value;
+
     // Pass the params object to axiosInstance.
     const response = await axiosInstance.get('/requests/history', {
       params: { page: page.toString() },
+      headers: readPrimaryUntil
+        ? { [READ_PRIMARY_HEADER]: readPrimaryUntil }
+        : undefined,
     });
 
     return response.data;
@@ -56,6 +67,15 @@ export async function deleteHistoryRequestLines(
     const response = await axiosInstance.delete("history/request-lines/delete", {
       data: { deleted_lines: deletedRequestLines },
     });
+
+    const readPrimaryUntil = response.headers[READ_PRIMARY_HEADER];
+    if (readPrimaryUntil) {
+      cookieStore.set(READ_PRIMARY_COOKIE, readPrimaryUntil, {
+        maxAge: Math.max(0, Number(readPrimaryUntil) - Math.floor(Date.now() / 1000)),
+        httpOnly: true,
+        sameSite: 'lax',
+      });
+    }
     return response.data;
     
   } catch (error) {
@@ -73,6 +73,13 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       });
     }
 
+    // Forward the backend's read-your-writes cookie so the history page
+    // reads this submission from the primary database.
+    const setCookie = apiResponse.headers.get("set-cookie");
+    if (setCookie) {
+      res.setHeader("Set-Cookie", setCookie);
+    }
+
     return res.status(200).json({
       status: "success",
       data,